@@ -0,0 +1,402 @@
+"""
+Sinh dữ liệu giả lập cỡ production để tái hiện các vấn đề hiệu năng, vd.
+
+    flask generate-data --candidates 2000000 --companies 200000 --jobs 1000000 \
+        --applications 20000000 --workers 8
+
+- Ghi bằng INSERT nhiều dòng theo lô lớn qua Core (không qua ORM); id được tính trước
+  nên không phải đọc lại id vừa sinh.
+- Phân phối lệch như dữ liệu thật: số tin của công ty và lượt ứng tuyển của tin theo luật Zipf
+  (vài tin "viral", rất nhiều công ty chỉ có vài tin), số đơn của ứng viên có đuôi dài.
+- Tất định theo seed: mỗi khối dữ liệu có Random riêng tính từ seed và số thứ tự khối,
+  nên kết quả như nhau dù chạy bằng bao nhiêu tiến trình.
+"""
+import itertools
+import math
+import multiprocessing
+import random
+import string
+import time
+from bisect import bisect
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from applygo import app, db, changes, passwords, recommend, search, similar, stats
+from applygo.migrations import has_table
+from applygo.models import User, CandidateProfile, Company, Job, Application, ApplicationMonthlyStat, ActivityLog, \
+    UploadJob, Category, CvTemplate, UserRole, CompanyStatus, ApplicationStatus, JobStatus, JobRecommendation, \
+    THOUSANDS_PER_MILLION
+
+CHUNK_SIZE = 50_000  # số bản ghi mỗi khối: đơn vị chia việc cho các tiến trình và của Random riêng
+MASK64 = 2 ** 64 - 1
+
+CATEGORIES = {
+    "IT - Software": ("Lập trình, phát triển phần mềm",
+                      ["Python Developer", "Java Developer", "Frontend Developer (ReactJS)", "Backend Developer (Node.js)",
+                       "DevOps Engineer", "Mobile Developer (Flutter)", "Data Engineer", "Tester / QA"]),
+    "Marketing": ("Tiếp thị, quảng cáo",
+                  ["Digital Marketing Executive", "Content Marketing", "SEO Specialist", "Brand Manager"]),
+    "Finance": ("Ngân hàng, tài chính",
+                ["Kế toán tổng hợp", "Chuyên viên phân tích tài chính", "Giao dịch viên ngân hàng", "Kiểm toán viên"]),
+    "Design": ("Thiết kế đồ họa, UI/UX",
+               ["UI/UX Designer", "Graphic Designer", "Motion Designer"]),
+    "Education": ("Giảng dạy, đào tạo",
+                  ["Giáo viên tiếng Anh", "Trợ giảng", "Chuyên viên đào tạo"]),
+    "Sales": ("Kinh doanh, bán hàng",
+              ["Nhân viên kinh doanh", "Account Manager", "Telesales"]),
+    "Human Resources": ("Nhân sự, tuyển dụng",
+                        ["Chuyên viên tuyển dụng", "HR Generalist", "C&B Specialist"]),
+    "Logistics": ("Vận tải, kho vận, xuất nhập khẩu",
+                  ["Nhân viên xuất nhập khẩu", "Điều phối kho", "Purchasing Officer"]),
+}
+# Tỉ trọng tin tuyển dụng theo danh mục (cùng thứ tự với CATEGORIES)
+CATEGORY_WEIGHTS = [35, 12, 12, 8, 6, 15, 6, 6]
+
+LOCATIONS = ["Hanoi", "Ho Chi Minh", "Da Nang", "Hai Phong", "Can Tho", "Remote"]
+LOCATION_WEIGHTS = [35, 40, 10, 5, 4, 6]
+LEVELS = [("Intern", 3, 6), ("Junior", 8, 15), ("Middle", 15, 25), ("Senior", 25, 45), ("Lead", 40, 70)]
+LEVEL_WEIGHTS = [10, 30, 30, 22, 8]
+JOB_STATUSES = [JobStatus.OPEN.value, JobStatus.CLOSED.value, JobStatus.PAUSED.value]
+JOB_STATUS_WEIGHTS = [80, 15, 5]
+
+SKILLS = [
+    "Python, Flask, SQLAlchemy", "Java, Spring Boot", "JavaScript, ReactJS", "C#, .NET", "Ruby on Rails",
+    "Go, Docker, Kubernetes", "PHP, Laravel", "Node.js, Express", "Machine Learning, Python",
+    "Data Analysis, Python, SQL", "SEO, Google Ads", "Excel, Kế toán", "Figma, Photoshop", "Tiếng Anh, IELTS 7.0",
+]
+EDUCATION = ["Bachelor of Computer Science", "Cử nhân Kinh tế", "Cử nhân Ngôn ngữ Anh", "Kỹ sư Điện tử",
+             "Thạc sĩ Quản trị Kinh doanh", "Cao đẳng Thiết kế"]
+FAMILY_NAMES = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Phan", "Vũ", "Võ", "Đặng", "Bùi", "Đỗ", "Hồ", "Ngô"]
+FAMILY_WEIGHTS = [38, 11, 9, 7, 5, 4, 4, 4, 4, 3, 3, 3, 2, 2]
+MIDDLE_NAMES = ["Văn", "Thị", "Minh", "Ngọc", "Thanh", "Đức", "Hoàng", "Quốc", "Thu", "Gia"]
+GIVEN_NAMES = ["An", "Bình", "Chi", "Dũng", "Giang", "Hà", "Hải", "Hiếu", "Hoa", "Hùng", "Khánh", "Lan", "Linh",
+               "Long", "Mai", "Nam", "Ngọc", "Phong", "Phúc", "Quân", "Sơn", "Tâm", "Thảo", "Trang", "Trung", "Tuấn",
+               "Vy", "Yến"]
+COMPANY_TYPES = ["Công ty TNHH", "Công ty Cổ phần", "Tập đoàn"]
+COMPANY_WORDS = ["Ánh Dương", "Bình Minh", "Hoàng Gia", "Phương Nam", "Thiên Long", "Đông Á", "Việt Tiến", "Tân Phát",
+                 "An Khang", "Hưng Thịnh", "Sao Mai", "Trường Sơn"]
+COMPANY_FIELDS = ["Software", "Solutions", "Technology", "Media", "Finance", "Education", "Design", "Logistics"]
+STREETS = ["Nguyen Trai", "Le Loi", "Tran Hung Dao", "Hai Ba Trung", "Ly Thuong Kiet", "Nguyen Hue", "Cau Giay"]
+USER_IMAGES = ["avatar1.png", "avatar2.png", "avatar3.png", "avatar4.png"]
+COMPANY_LOGOS = ["logo1.png", "logo2.png", "logo3.png", "logo4.png"]
+TEMPLATES = [("Simple", "simple"), ("Modern", "modern"), ("Professional", "professional")]
+
+# Tables được xóa trước khi sinh (theo thứ tự khóa ngoại)
+RESET_MODELS = [ActivityLog, UploadJob, ApplicationMonthlyStat, JobRecommendation, Application, Job, Company,
+                CandidateProfile, User, CvTemplate, Category]
+
+_cum_weights = {}
+
+
+def zipf_cum_weights(n, s):
+    """Trọng số cộng dồn của phân phối Zipf trên n hạng (hạng 0 phổ biến nhất), cache theo tiến trình."""
+    key = (n, s)
+    if key not in _cum_weights:
+        _cum_weights[key] = list(itertools.accumulate(1.0 / (rank + 1) ** s for rank in range(n)))
+    return _cum_weights[key]
+
+
+def draw_rank(rng, cum_weights):
+    return bisect(cum_weights, rng.random() * cum_weights[-1])
+
+
+def coprime_step(n):
+    step = max(1, int(n * 0.6180339887)) | 1
+    while math.gcd(step, n) != 1:
+        step += 1
+    return step
+
+
+def scatter(rank, n, step, offset):
+    """Hoán vị rank -> vị trí: các tin/công ty "hot" nằm rải rác thay vì dồn ở các id đầu."""
+    return (rank * step + offset) % n
+
+
+def unit(seed, n):
+    """Số giả ngẫu nhiên trong [0, 1) chỉ phụ thuộc (seed, n) (splitmix64), dùng khi cần tính lại ở tiến trình khác."""
+    z = (n + (seed + 1) * 0x9E3779B97F4A7C15) & MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return (z ^ (z >> 31)) / 2 ** 64
+
+
+def job_created_at(spec, job_id):
+    # Bình phương để tin mới nhiều hơn tin cũ
+    return spec["end"] - timedelta(seconds=spec["days"] * 86400 * unit(spec["seed"], job_id) ** 2)
+
+
+def _ago(spec, rng):
+    return spec["end"] - timedelta(seconds=rng.random() * spec["days"] * 86400)
+
+
+def candidate_rows(spec, rng, start, stop, extra):
+    users, profiles = [], []
+    for i in range(start, stop):
+        n = i + 1
+        created_at = _ago(spec, rng)
+        users.append(dict(id=spec["candidate_user_base"] + i, username=f"user{n}", email=f"user{n}@example.com",
+                          password=spec["password"], role=UserRole.CANDIDATE.value,
+                          image_url=rng.choice(USER_IMAGES), created_at=created_at, updated_at=created_at))
+        full_name = f"{rng.choices(FAMILY_NAMES, FAMILY_WEIGHTS)[0]} {rng.choice(MIDDLE_NAMES)} {rng.choice(GIVEN_NAMES)}"
+        profiles.append(dict(id=n, user_id=spec["candidate_user_base"] + i, full_name=full_name,
+                             phone=f"09{n % 10 ** 8:08d}", skills=rng.choice(SKILLS),
+                             experience=f"{rng.randint(0, 12)} years experience", education=rng.choice(EDUCATION),
+                             cv_template=rng.choice(TEMPLATES)[1], created_at=created_at, updated_at=created_at))
+    yield User.__table__, users
+    yield CandidateProfile.__table__, profiles
+
+
+def company_rows(spec, rng, start, stop, extra):
+    users, companies = [], []
+    for i in range(start, stop):
+        n = i + 1
+        created_at = _ago(spec, rng)
+        users.append(dict(id=spec["company_user_base"] + i, username=f"company{n}", email=f"company{n}@example.com",
+                          password=spec["password"], role=UserRole.COMPANY.value,
+                          image_url=rng.choice(USER_IMAGES), created_at=created_at, updated_at=created_at))
+        status = CompanyStatus.PENDING.value if rng.random() < spec["pending_companies"] \
+            else CompanyStatus.APPROVED.value
+        companies.append(dict(id=n, user_id=spec["company_user_base"] + i,
+                              name=f"{rng.choice(COMPANY_TYPES)} {rng.choice(COMPANY_WORDS)} "
+                                   f"{rng.choice(COMPANY_FIELDS)} {n}",
+                              address=f"{rng.randint(1, 500)} {rng.choice(STREETS)}, "
+                                      f"{rng.choices(LOCATIONS[:5], LOCATION_WEIGHTS[:5])[0]}",
+                              website=f"www.company{n}.com", logo_url=rng.choice(COMPANY_LOGOS),
+                              mst="".join(rng.choices(string.digits, k=10)), status=status,
+                              created_at=created_at, updated_at=created_at))
+    yield User.__table__, users
+    yield Company.__table__, companies
+
+
+def job_rows(spec, rng, start, stop, extra):
+    category_names = list(CATEGORIES)
+    company_cum = zipf_cum_weights(spec["companies"], spec["company_skew"])
+    rows = []
+    for i in range(start, stop):
+        job_id = i + 1
+        category = rng.choices(range(len(category_names)), CATEGORY_WEIGHTS)[0]
+        name = category_names[category]
+        role = rng.choice(CATEGORIES[name][1])
+        level, low, high = rng.choices(LEVELS, LEVEL_WEIGHTS)[0]
+        salary_min = rng.randint(low, (low + high) // 2)
+        salary_max = salary_min + rng.randint(3, max(3, high - low))
+        skills = rng.choice(SKILLS)
+        location = rng.choices(LOCATIONS, LOCATION_WEIGHTS)[0]
+        company_id = scatter(draw_rank(rng, company_cum), spec["companies"], spec["company_step"],
+                             spec["company_offset"]) + 1
+        created_at = job_created_at(spec, job_id)
+        rows.append(dict(
+            id=job_id, company_id=company_id, category_id=spec["category_ids"][category],
+            title=f"{level} {role}",
+            description=f"Tuyển {role} cấp độ {level} làm việc tại {location}. "
+                        f"Tham gia các dự án {name.lower()} cùng đội ngũ trẻ, năng động.",
+            requirements=f"Kinh nghiệm với {skills}. Chủ động, ham học hỏi.",
+            location=location, salary=f"{salary_min}-{salary_max} triệu",
+            salary_min=salary_min * THOUSANDS_PER_MILLION, salary_max=salary_max * THOUSANDS_PER_MILLION,
+            status=rng.choices(JOB_STATUSES, JOB_STATUS_WEIGHTS)[0],
+            created_at=created_at, updated_at=created_at,
+        ))
+    yield Job.__table__, rows
+
+
+def application_rows(spec, rng, start, stop, extra):
+    """Đơn của các ứng viên [start, stop): quota đơn chia theo trọng số Pareto (ứng viên rải CV rất nhiều)."""
+    quota, first_id = extra
+    counts = [0] * (stop - start)
+    weights = [min(rng.paretovariate(1.2), 50.0) for _ in counts]
+    for index in rng.choices(range(len(counts)), weights, k=quota):
+        counts[index] += 1
+    # Mỗi ứng viên nộp tối đa một đơn cho mỗi tin; phần vượt chuyển cho ứng viên khác để đủ quota
+    max_per_candidate = max(1, spec["jobs"] // 2)
+    overflow = sum(max(0, count - max_per_candidate) for count in counts)
+    for index in range(len(counts)):
+        counts[index] = min(counts[index], max_per_candidate)
+        room = min(overflow, max_per_candidate - counts[index])
+        counts[index] += room
+        overflow -= room
+
+    job_cum = zipf_cum_weights(spec["jobs"], spec["job_skew"])
+    application_id = first_id
+    rows = []
+    for offset, count in enumerate(counts):
+        profile_id = start + offset + 1
+        job_ids = set()
+        for _ in range(count):
+            while True:
+                job_id = scatter(draw_rank(rng, job_cum), spec["jobs"], spec["job_step"], spec["job_offset"]) + 1
+                if job_id not in job_ids:
+                    break
+            job_ids.add(job_id)
+            posted = job_created_at(spec, job_id)
+            applied_at = posted + (spec["end"] - posted) * rng.random() ** 3  # phần lớn đơn nộp ngay sau khi đăng
+            if spec["end"] - applied_at > timedelta(days=14):
+                status = rng.choices(spec["statuses"], (30, 25, 45))[0]
+            else:
+                status = rng.choices(spec["statuses"], (80, 5, 15))[0]
+            rows.append(dict(id=application_id, candidate_profile_id=profile_id, job_id=job_id, status=status,
+                             applied_at=applied_at, updated_at=applied_at))
+            application_id += 1
+            if len(rows) >= spec["batch_size"]:
+                yield Application.__table__, rows
+                rows = []
+    yield Application.__table__, rows
+
+
+BUILDERS = {
+    "candidates": candidate_rows,
+    "companies": company_rows,
+    "jobs": job_rows,
+    "applications": application_rows,
+}
+
+
+def _chunks(total):
+    for chunk, start in enumerate(range(0, total, CHUNK_SIZE)):
+        yield chunk, start, min(start + CHUNK_SIZE, total)
+
+
+def plan(spec):
+    """Danh sách các pha, mỗi pha là list task (kind, chunk, start, stop, extra) chạy song song được."""
+    phases = [
+        [("candidates", chunk, start, stop, None) for chunk, start, stop in _chunks(spec["candidates"])],
+        [("companies", chunk, start, stop, None) for chunk, start, stop in _chunks(spec["companies"])],
+        [("jobs", chunk, start, stop, None) for chunk, start, stop in _chunks(spec["jobs"])],
+    ]
+    # Quota đơn của mỗi khối ứng viên tỉ lệ với số ứng viên trong khối; id đơn của khối bắt đầu từ first_id
+    tasks, first_id, assigned = [], 1, 0
+    candidates = max(spec["candidates"], 1)
+    if spec["jobs"]:
+        for chunk, start, stop in _chunks(spec["candidates"]):
+            quota = spec["applications"] * stop // candidates - assigned
+            assigned += quota
+            tasks.append(("applications", chunk, start, stop, (quota, first_id)))
+            first_id += quota
+    phases.append(tasks)
+    return phases
+
+
+def _set_fast_load(conn, enabled):
+    if conn.dialect.name == "mysql":
+        value = 0 if enabled else 1
+        conn.execute(text(f"SET SESSION foreign_key_checks={value}, unique_checks={value}"))
+
+
+def run_task(task, spec):
+    kind, chunk, start, stop, extra = task
+    rng = random.Random(f"{spec['seed']}:{kind}:{chunk}")
+    written = 0
+    with app.app_context(), db.engine.connect() as conn:
+        _set_fast_load(conn, True)
+        try:
+            for table, rows in BUILDERS[kind](spec, rng, start, stop, extra):
+                for i in range(0, len(rows), spec["batch_size"]):
+                    batch = rows[i:i + spec["batch_size"]]
+                    conn.execute(table.insert(), batch)
+                    conn.commit()
+                    if table is not User.__table__:
+                        written += len(batch)
+        finally:
+            _set_fast_load(conn, False)
+            conn.commit()
+    return kind, written
+
+
+def _run_task_star(args):
+    return run_task(*args)
+
+
+def _init_worker():
+    # Kết nối kế thừa từ tiến trình cha không dùng chung được
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def reset():
+    with db.engine.begin() as conn:
+        tables = [m.__table__ for m in RESET_MODELS if has_table(conn, m.__table__.name)]
+        if conn.dialect.name == "mysql":
+            conn.execute(text("SET FOREIGN_KEY_CHECKS=0"))
+            for table in tables:
+                conn.execute(text(f"TRUNCATE TABLE {conn.dialect.identifier_preparer.format_table(table)}"))
+            conn.execute(text("SET FOREIGN_KEY_CHECKS=1"))
+        else:
+            for table in tables:
+                conn.execute(table.delete())
+
+
+def seed_static(spec):
+    """Admin, danh mục và mẫu CV; trả về id các danh mục theo thứ tự CATEGORIES."""
+    with db.engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [dict(
+            id=1, username="admin", email="admin@example.com", password=spec["password"],
+            role=UserRole.ADMIN.value, image_url="admin.png", created_at=spec["end"], updated_at=spec["end"])])
+        conn.execute(Category.__table__.insert(), [
+            dict(id=i + 1, name=name, description=description)
+            for i, (name, (description, _)) in enumerate(CATEGORIES.items())])
+        conn.execute(CvTemplate.__table__.insert(), [
+            dict(id=i + 1, name=name, html_file=html_file, preview_image=f"{html_file}.png")
+            for i, (name, html_file) in enumerate(TEMPLATES)])
+    return list(range(1, len(CATEGORIES) + 1))
+
+
+def generate(candidates=20, companies=10, jobs=50, applications=100, seed=42, workers=1, batch_size=5000,
+             days=365, job_skew=1.0, company_skew=1.1, pending_companies=0.05, password="123456", echo=print):
+    """
+    Xóa dữ liệu cũ rồi sinh admin, `candidates` ứng viên (user1..), `companies` công ty (company1..),
+    `jobs` tin tuyển dụng và khoảng `applications` đơn ứng tuyển. Mọi tài khoản dùng mật khẩu `password`.
+    """
+    if workers > 1 and db.engine.dialect.name == "sqlite":
+        echo("SQLite không ghi song song được, chạy với 1 tiến trình.")
+        workers = 1
+    companies = max(companies, 1) if jobs else companies
+
+    spec = dict(
+        candidates=candidates, companies=companies, jobs=jobs, applications=applications, seed=seed,
+        batch_size=batch_size, days=days, job_skew=job_skew, company_skew=company_skew,
+        pending_companies=pending_companies,
+        end=datetime.now().replace(hour=0, minute=0, second=0, microsecond=0),
+        # Một lần băm cho mọi tài khoản: băm riêng từng người với hàng triệu user mất hàng giờ
+        password=passwords.hash_password(password),
+        candidate_user_base=2, company_user_base=2 + candidates,
+        job_step=coprime_step(max(jobs, 1)), job_offset=seed % max(jobs, 1),
+        company_step=coprime_step(max(companies, 1)), company_offset=(seed * 7) % max(companies, 1),
+        statuses=[s.value for s in ApplicationStatus],
+    )
+
+    started = time.perf_counter()
+    reset()
+    spec["category_ids"] = seed_static(spec)
+
+    pool = multiprocessing.get_context("fork").Pool(workers, initializer=_init_worker) if workers > 1 else None
+    try:
+        for tasks in plan(spec):
+            if not tasks:
+                continue
+            kind = tasks[0][0]
+            phase_started = time.perf_counter()
+            if pool is not None:
+                results = pool.imap_unordered(_run_task_star, [(task, spec) for task in tasks])
+            else:
+                results = (run_task(task, spec) for task in tasks)
+            written = sum(n for _, n in results)
+            elapsed = time.perf_counter() - phase_started
+            echo(f"✅ {kind}: {written} dòng trong {elapsed:.1f}s ({written / max(elapsed, 1e-9):.0f} dòng/s)")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    phase_started = time.perf_counter()
+    stats.rebuild_application_stats()
+    search.invalidate()
+    similar.invalidate()
+    # Ghi bằng Core không qua ORM: báo các worker web dựng lại index
+    changes.record_rebuild()
+    echo(f"✅ Bảng thống kê dựng lại trong {time.perf_counter() - phase_started:.1f}s")
+
+    phase_started = time.perf_counter()
+    candidates = recommend.rebuild()
+    echo(f"✅ Gợi ý việc làm cho {candidates} ứng viên trong {time.perf_counter() - phase_started:.1f}s")
+    echo(f"🎉 Sinh dữ liệu xong trong {time.perf_counter() - started:.1f}s")
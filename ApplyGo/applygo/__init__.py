@@ -4,6 +4,7 @@ from flask_cors import CORS
 from flask_login import LoginManager
 from flask_mail import Mail
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.engine import make_url
 from urllib.parse import quote
 from werkzeug.middleware.proxy_fix import ProxyFix
 import cloudinary
@@ -20,9 +21,120 @@ db_pass = quote(os.getenv("DB_PASSWORD", "Admin@123"))
 db_host = os.getenv("DB_HOST", "localhost")
 db_name = os.getenv("DB_NAME", "applygo")
 
-app.config["SQLALCHEMY_DATABASE_URI"] = f"mysql+pymysql://{db_user}:{db_pass}@{db_host}/{db_name}?charset=utf8mb4"
+# DATABASE_URL (URI đầy đủ, vd. sqlite cho test) thay cho các biến DB_* ở trên
+app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL",
+                                                  f"mysql+pymysql://{db_user}:{db_pass}@{db_host}/{db_name}?charset=utf8mb4")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+
+
+def engine_options(uri, pool_size, pool_recycle):
+    """
+    Tùy chọn engine cho một URI: pool_size/pool_recycle chỉ dùng được với QueuePool, còn SQLite
+    (StaticPool cho sqlite://, pool riêng của pysqlite) sẽ báo TypeError nếu nhận chúng.
+    """
+    options = {"pool_pre_ping": True}
+    if make_url(uri).get_backend_name() != "sqlite":
+        options.update(pool_size=pool_size, pool_recycle=pool_recycle)
+    return options
+
+
+db_pool_size = int(os.getenv("DB_POOL_SIZE", 5))
+db_pool_recycle = int(os.getenv("DB_POOL_RECYCLE", 3600))
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config["SQLALCHEMY_DATABASE_URI"],
+                                                         db_pool_size, db_pool_recycle)
+# Replica chỉ đọc: DB_REPLICA_HOSTS (cùng user/db với primary) hoặc DB_REPLICA_URIS (URI đầy đủ), phân tách bằng dấu phẩy
+replica_uris = [f"mysql+pymysql://{db_user}:{db_pass}@{host.strip()}/{db_name}?charset=utf8mb4"
+                for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host.strip()]
+replica_uris += [uri.strip() for uri in os.getenv("DB_REPLICA_URIS", "").split(",") if uri.strip()]
+app.config["SQLALCHEMY_BINDS"] = {
+    f"replica_{i}": {
+        "url": uri,
+        **engine_options(uri, int(os.getenv("DB_REPLICA_POOL_SIZE", db_pool_size)),
+                         int(os.getenv("DB_REPLICA_POOL_RECYCLE", db_pool_recycle))),
+    }
+    for i, uri in enumerate(replica_uris)
+}
+app.config["DB_REPLICAS"] = list(app.config["SQLALCHEMY_BINDS"])
+app.config["REPLICA_STICKY_SECONDS"] = int(os.getenv("REPLICA_STICKY_SECONDS", 10))
 app.config["PAGE_SIZE"] = int(os.getenv("PAGE_SIZE", 2))
+app.config["PAGE_CACHE_SIZE"] = int(os.getenv("PAGE_CACHE_SIZE", 1000))
+app.config["PAGE_CACHE_TTL"] = int(os.getenv("PAGE_CACHE_TTL", 60))
+# Thread nền đọc job_change để xóa trang/đếm của các tin do worker khác sửa
+app.config["PAGE_CACHE_SYNC"] = os.getenv("PAGE_CACHE_SYNC", "1") == "1"
+app.config["PAGINATION_EXACT_TOTALS"] = os.getenv("PAGINATION_EXACT_TOTALS", "1") == "1"
+app.config["IDENTITY_CACHE_SIZE"] = int(os.getenv("IDENTITY_CACHE_SIZE", 10000))
+app.config["IDENTITY_CACHE_TTL"] = int(os.getenv("IDENTITY_CACHE_TTL", 30))
+app.config["CV_CACHE_SIZE"] = int(os.getenv("CV_CACHE_SIZE", 5000))
+app.config["CV_CACHE_TTL"] = int(os.getenv("CV_CACHE_TTL", 24 * 3600))
+app.config["CV_CACHE_MAX_BYTES"] = int(os.getenv("CV_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+app.config["MATCH_CACHE_SIZE"] = int(os.getenv("MATCH_CACHE_SIZE", 500))  # số tin giữ điểm ứng viên
+app.config["MATCH_CACHE_TTL"] = int(os.getenv("MATCH_CACHE_TTL", 24 * 3600))
+app.config["COUNT_CACHE_TTL"] = int(os.getenv("COUNT_CACHE_TTL", 300))
+app.config["QUERY_DEBUG"] = os.getenv("QUERY_DEBUG", "0") == "1"
+app.config["N_PLUS_ONE_THRESHOLD"] = int(os.getenv("N_PLUS_ONE_THRESHOLD", 5))
+app.config["REQUEST_TIMING"] = os.getenv("REQUEST_TIMING", "0") == "1"
+app.config["SLOW_QUERY_MS"] = float(os.getenv("SLOW_QUERY_MS", 200))
+app.config["SLOW_QUERY_LOG"] = os.getenv("SLOW_QUERY_LOG")
+app.config["PASSWORD_HASHER"] = os.getenv("PASSWORD_HASHER", "pbkdf2_sha256")
+app.config["PASSWORD_HASH_TARGET_MS"] = float(os.getenv("PASSWORD_HASH_TARGET_MS", 50))
+app.config["PASSWORD_HASH_COST"] = int(os.getenv("PASSWORD_HASH_COST", 0)) or None  # bỏ trống: tự hiệu chỉnh
+app.config["PASSWORD_HASH_WORKERS"] = int(os.getenv("PASSWORD_HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+app.config["PASSWORD_HASH_QUEUE"] = int(os.getenv("PASSWORD_HASH_QUEUE", 32))
+app.config["PASSWORD_HASH_TIMEOUT"] = float(os.getenv("PASSWORD_HASH_TIMEOUT", 5))
+app.config["UPLOAD_BACKEND"] = os.getenv("UPLOAD_BACKEND", "cloudinary")  # "cloudinary" | "local" | "fake"
+app.config["LOCAL_STORAGE_DIR"] = os.getenv("LOCAL_STORAGE_DIR", os.path.join(app.static_folder, "uploads"))
+app.config["UPLOAD_STAGING_DIR"] = os.getenv("UPLOAD_STAGING_DIR", os.path.join(app.instance_path, "upload_staging"))
+app.config["UPLOAD_WORKERS"] = int(os.getenv("UPLOAD_WORKERS", 4))
+app.config["UPLOAD_MAX_ATTEMPTS"] = int(os.getenv("UPLOAD_MAX_ATTEMPTS", 5))
+app.config["UPLOAD_BACKOFF_BASE"] = float(os.getenv("UPLOAD_BACKOFF_BASE", 2))
+app.config["UPLOAD_BACKOFF_MAX"] = float(os.getenv("UPLOAD_BACKOFF_MAX", 300))
+# Job "Uploading" không cập nhật quá số giây này coi như worker đã chết giữa chừng
+app.config["UPLOAD_CLAIM_TIMEOUT"] = float(os.getenv("UPLOAD_CLAIM_TIMEOUT", 600))
+# Nhận lại các job dang dở/chờ thử lại khi pool của tiến trình khởi động
+app.config["UPLOAD_RESUME"] = os.getenv("UPLOAD_RESUME", "1") == "1"
+app.config["FAKE_STORAGE_DIR"] = os.getenv("FAKE_STORAGE_DIR", os.path.join(app.static_folder, "fake_storage"))
+app.config["FAKE_STORAGE_LATENCY_MS"] = float(os.getenv("FAKE_STORAGE_LATENCY_MS", 0))
+app.config["FAKE_STORAGE_FAIL_RATE"] = float(os.getenv("FAKE_STORAGE_FAIL_RATE", 0))
+app.config["IMAGE_VARIANT_WIDTHS"] = [int(w) for w in os.getenv("IMAGE_VARIANT_WIDTHS", "64,160,480").split(",")]
+app.config["IMAGE_VARIANT_FORMAT"] = os.getenv("IMAGE_VARIANT_FORMAT", "WEBP")
+app.config["IMAGE_VARIANT_QUALITY"] = int(os.getenv("IMAGE_VARIANT_QUALITY", 80))
+app.config["MAIL_SERVER"] = os.getenv("MAIL_SERVER", "localhost")
+app.config["MAIL_PORT"] = int(os.getenv("MAIL_PORT", 25))
+app.config["MAIL_USE_TLS"] = os.getenv("MAIL_USE_TLS", "0") == "1"
+app.config["MAIL_USE_SSL"] = os.getenv("MAIL_USE_SSL", "0") == "1"
+app.config["MAIL_USERNAME"] = os.getenv("MAIL_USERNAME")
+app.config["MAIL_PASSWORD"] = os.getenv("MAIL_PASSWORD")
+app.config["MAIL_DEFAULT_SENDER"] = os.getenv("MAIL_DEFAULT_SENDER", "ApplyGO <no-reply@applygo.local>")
+app.config["MAIL_MAX_EMAILS"] = int(os.getenv("MAIL_MAX_EMAILS", 0)) or None  # số mail trước khi mở lại kết nối
+app.config["MAIL_WORKER"] = os.getenv("MAIL_WORKER", "1") == "1"  # chạy worker gửi mail trong tiến trình web
+app.config["MAIL_BATCH_SIZE"] = int(os.getenv("MAIL_BATCH_SIZE", 200))  # số người nhận mỗi lượt gửi
+app.config["MAIL_COALESCE_SECONDS"] = float(os.getenv("MAIL_COALESCE_SECONDS", 60))
+app.config["MAIL_POLL_SECONDS"] = float(os.getenv("MAIL_POLL_SECONDS", 5))
+app.config["MAIL_MAX_ATTEMPTS"] = int(os.getenv("MAIL_MAX_ATTEMPTS", 5))
+app.config["MAIL_BACKOFF_BASE"] = float(os.getenv("MAIL_BACKOFF_BASE", 30))
+app.config["MAIL_BACKOFF_MAX"] = float(os.getenv("MAIL_BACKOFF_MAX", 3600))
+app.config["MAIL_CLAIM_TIMEOUT"] = float(os.getenv("MAIL_CLAIM_TIMEOUT", 600))
+app.config["ACTIVITY_BUFFER_SIZE"] = int(os.getenv("ACTIVITY_BUFFER_SIZE", 10000))
+app.config["ACTIVITY_FLUSH_SIZE"] = int(os.getenv("ACTIVITY_FLUSH_SIZE", 500))
+app.config["ACTIVITY_FLUSH_SECONDS"] = float(os.getenv("ACTIVITY_FLUSH_SECONDS", 1))
+app.config["ACTIVITY_BLOCK_MS"] = float(os.getenv("ACTIVITY_BLOCK_MS", 50))  # chờ tối đa khi hàng đợi đầy
+app.config["ACTIVITY_RETENTION_DAYS"] = int(os.getenv("ACTIVITY_RETENTION_DAYS", 180))
+app.config["BENCH_BASELINE"] = os.getenv("BENCH_BASELINE", os.path.join(app.root_path, "..", "bench_baseline.json"))
+app.config["BENCH_TOLERANCE"] = float(os.getenv("BENCH_TOLERANCE", 0.25))  # chậm hơn baseline 25% là hồi quy
+app.config["SIMILAR_FEATURES"] = int(os.getenv("SIMILAR_FEATURES", 512))  # số chiều hash; bộ nhớ = số tin mở x chiều x 4 byte
+app.config["SIMILAR_TOP_K"] = int(os.getenv("SIMILAR_TOP_K", 10))
+app.config["RECOMMEND_FEATURES"] = int(os.getenv("RECOMMEND_FEATURES", 2 ** 18))  # số chiều hash (ma trận thưa)
+app.config["RECOMMEND_TOP_K"] = int(os.getenv("RECOMMEND_TOP_K", 20))  # số tin lưu cho mỗi ứng viên
+app.config["RECOMMEND_HISTORY"] = int(os.getenv("RECOMMEND_HISTORY", 20))  # số đơn gần nhất dùng làm lịch sử
+app.config["RECOMMEND_BATCH_SIZE"] = int(os.getenv("RECOMMEND_BATCH_SIZE", 1000))  # số ứng viên mỗi khối
+app.config["RECOMMEND_JOB_FANOUT"] = int(os.getenv("RECOMMEND_JOB_FANOUT", 500))  # số ứng viên tính lại khi có tin mới
+# Gộp ma trận (bỏ dòng của tin/hồ sơ đã sửa hoặc đóng) khi số dòng chết vượt tỉ lệ này
+app.config["RECOMMEND_COMPACT_RATIO"] = float(os.getenv("RECOMMEND_COMPACT_RATIO", 0.25))
+app.config["RECOMMEND_MATRIX_TTL"] = float(os.getenv("RECOMMEND_MATRIX_TTL", 3600))  # dựng lại ma trận tin sau (giây)
+app.config["RECOMMEND_WORKER"] = os.getenv("RECOMMEND_WORKER", "1") == "1"  # cập nhật gợi ý trong tiến trình web
+app.config["JOB_CHANGE_POLL_SECONDS"] = float(os.getenv("JOB_CHANGE_POLL_SECONDS", 2))  # giây giữa hai lần đọc job_change
+app.config["JOB_CHANGE_BATCH"] = int(os.getenv("JOB_CHANGE_BATCH", 1000))  # nhiều thay đổi hơn thì dựng lại index
+app.config["JOB_CHANGE_RETENTION_HOURS"] = float(os.getenv("JOB_CHANGE_RETENTION_HOURS", 24))
 
 cloudinary.config(
     cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
@@ -31,9 +143,14 @@ cloudinary.config(
     secure=True,
 )
 
-db = SQLAlchemy(app)
+from applygo.routing import RoutingSession
+
+db = SQLAlchemy(app, session_options={"class_": RoutingSession})
 login = LoginManager(app)
 CORS(app)
 mail = Mail(app)
 
-from applygo import models, admin
+from applygo import models, admin, commands, instrumentation, routing, images
+
+instrumentation.init_app(app)
+routing.init_app(app, db)
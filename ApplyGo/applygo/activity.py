@@ -0,0 +1,139 @@
+"""
+Ghi ActivityLog không chặn request: log() chỉ đưa sự kiện vào hàng đợi trong bộ nhớ có giới hạn,
+một thread nền gom lại và INSERT nhiều dòng một lần khi đủ ACTIVITY_FLUSH_SIZE sự kiện hoặc
+sau ACTIVITY_FLUSH_SECONDS. Hàng đợi đầy thì request chờ tối đa ACTIVITY_BLOCK_MS rồi bỏ sự kiện.
+"""
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+from applygo import app, db
+from applygo.models import ActivityLog
+
+
+class ActivityBuffer:
+
+    def __init__(self, max_size=10000, flush_size=500, flush_seconds=1.0, block_ms=50):
+        self.queue = queue.Queue(maxsize=max_size)
+        self.flush_size = flush_size
+        self.flush_seconds = flush_seconds
+        self.block_ms = block_ms
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.lock = threading.Lock()
+        self.thread = None
+        self.last_warning = 0.0
+
+    def log(self, user_id, action):
+        """Thêm một sự kiện; trả về False nếu bị bỏ vì hàng đợi đầy."""
+        self.start()
+        try:
+            self.queue.put((user_id, action[:255], datetime.now()), timeout=self.block_ms / 1000)
+            return True
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+                warn = time.monotonic() - self.last_warning > 10
+                if warn:
+                    self.last_warning = time.monotonic()
+            if warn:
+                app.logger.warning("Hàng đợi ActivityLog đầy, đã bỏ %d sự kiện", self.dropped)
+            return False
+
+    def take(self, timeout):
+        """Lấy một lô: chờ sự kiện đầu tiên tối đa timeout giây, rồi gom thêm đến khi đủ flush_size hoặc hết flush_seconds."""
+        try:
+            batch = [self.queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.flush_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def write(self, batch):
+        rows = [dict(user_id=user_id, action=action, created_at=created_at) for user_id, action, created_at in batch]
+        try:
+            with app.app_context(), db.engine.begin() as conn:
+                conn.execute(ActivityLog.__table__.insert().values(rows))
+        except Exception:
+            app.logger.exception("Không ghi được %d dòng ActivityLog", len(rows))
+            with self.lock:
+                self.dropped += len(rows)
+            return
+        with self.lock:
+            self.written += len(rows)
+            self.batches += 1
+
+    def run(self):
+        while True:
+            batch = self.take(timeout=self.flush_seconds)
+            if batch:
+                self.write(batch)
+
+    def start(self):
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self.run, name="activity-log", daemon=True)
+                    self.thread.start()
+
+    def flush(self):
+        """Ghi ngay mọi sự kiện còn trong hàng đợi (dùng khi tắt tiến trình, CLI)."""
+        while True:
+            batch = []
+            while len(batch) < self.flush_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self.write(batch)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "queued": self.queue.qsize(),
+                "max_size": self.queue.maxsize,
+                "written": self.written,
+                "batches": self.batches,
+                "dropped": self.dropped,
+            }
+
+
+buffer = ActivityBuffer(max_size=app.config["ACTIVITY_BUFFER_SIZE"], flush_size=app.config["ACTIVITY_FLUSH_SIZE"],
+                        flush_seconds=app.config["ACTIVITY_FLUSH_SECONDS"], block_ms=app.config["ACTIVITY_BLOCK_MS"])
+atexit.register(buffer.flush)
+
+
+def log(user_id, action):
+    if user_id is None:
+        return False
+    return buffer.log(user_id, action)
+
+
+def prune(days=None, batch_size=1000, pause=0.0):
+    """Xóa ActivityLog cũ hơn days ngày theo từng lô nhỏ để không khóa bảng lâu, trả về số dòng đã xóa."""
+    days = app.config["ACTIVITY_RETENTION_DAYS"] if days is None else days
+    cutoff = datetime.now() - timedelta(days=days)
+    deleted = 0
+    while True:
+        ids = [log_id for (log_id,) in db.session.query(ActivityLog.id)
+               .filter(ActivityLog.created_at < cutoff).order_by(ActivityLog.id).limit(batch_size)]
+        if not ids:
+            return deleted
+        db.session.query(ActivityLog).filter(ActivityLog.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        deleted += len(ids)
+        if pause:
+            time.sleep(pause)
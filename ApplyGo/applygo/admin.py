@@ -1,22 +1,25 @@
-import cloudinary
-import cloudinary.uploader
 from datetime import datetime, timedelta
 from flask import redirect, url_for, flash, request
 from flask_admin import Admin, AdminIndexView, expose, BaseView
 from flask_admin.contrib.sqla import ModelView
 from flask_login import current_user, logout_user
 from markupsafe import Markup
-from wtforms import FileField, SelectField
+from sqlalchemy.orm import configure_mappers
+from wtforms import DateTimeField, FileField, IntegerField, SelectField
 from wtforms.fields.simple import StringField
 from wtforms.form import Form
 from wtforms.validators import DataRequired
-from sqlalchemy import extract, func
-from applygo import app, db
+from applygo import app, db, indexing, search, stats, uploads, recommend
+from applygo.images import image_src
+from applygo.instrumentation import query_budgets
 from applygo.models import (
     User, Company, Job, Application, CandidateProfile,
     UserRole, ApplicationStatus, JobStatus, CompanyStatus
 )
 
+# Tạo các backref (Company.user, CandidateProfile.user...) để dùng trong column_select_related_list
+configure_mappers()
+
 
 class MyAdminIndexView(AdminIndexView):
     @expose('/')
@@ -46,15 +49,12 @@ class AuthenticatedView(ModelView):
             form.populate_obj(model)
             db.session.add(model)
             db.session.flush()
+            self.on_model_change(form, model, True)
 
-            if hasattr(form, "image") and form.image.data:
-                upload_result = cloudinary.uploader.upload(form.image.data)
-                model.image_url = upload_result["secure_url"]
-            if hasattr(form, "logo") and form.logo.data:
-                upload_result = cloudinary.uploader.upload(form.logo.data)
-                model.logo_url = upload_result["secure_url"]
+            self.stage_uploads(form, model)
 
             db.session.commit()
+            self.after_model_change(form, model, True)
             flash(f"Tạo {self.model.__name__} thành công!", "success")
             return model
         except Exception as e:
@@ -65,14 +65,11 @@ class AuthenticatedView(ModelView):
     def update_model(self, form, model):
         try:
             form.populate_obj(model)
-            if hasattr(form, "image") and form.image.data:
-                upload_result = cloudinary.uploader.upload(form.image.data)
-                model.image_url = upload_result["secure_url"]
-            if hasattr(form, "logo") and form.logo.data:
-                upload_result = cloudinary.uploader.upload(form.logo.data)
-                model.logo_url = upload_result["secure_url"]
+            self.on_model_change(form, model, False)
+            self.stage_uploads(form, model)
 
             db.session.commit()
+            self.after_model_change(form, model, False)
             flash(f"Cập nhật {self.model.__name__} thành công!", "success")
             return True
         except Exception as e:
@@ -80,10 +77,19 @@ class AuthenticatedView(ModelView):
             flash(f"Lỗi khi cập nhật {self.model.__name__}: {e}", "error")
             return False
 
+    def stage_uploads(self, form, model):
+        # Ảnh được tải lên Cloudinary chạy nền sau khi commit, worker tự ghi URL vào model
+        if hasattr(form, "image") and form.image.data:
+            uploads.stage(form.image.data, model, "image_url", folder="applygo/avatars", user_id=current_user.id)
+        if hasattr(form, "logo") and form.logo.data:
+            uploads.stage(form.logo.data, model, "logo_url", folder="applygo/company_logos", user_id=current_user.id)
+
     def delete_model(self, model):
         try:
+            self.on_model_delete(model)
             db.session.delete(model)
             db.session.commit()
+            self.after_model_delete(model)
             flash(f"Xóa {self.model.__name__} thành công!", "success")
             return True
         except Exception as e:
@@ -106,17 +112,19 @@ def popup_image_formatter(view, context, model, name, folder="Image"):
     if not url:
         return ""
 
-    if not url.startswith("http"):
-        url = url_for('static', filename=f'{folder}/{url}')
+    # Ô danh sách chỉ cao 50px: dùng bản thu nhỏ, ảnh lớn chỉ tải khi mở modal
+    variants = getattr(model, name.replace("_url", "_variants"), None)
+    thumb = image_src(url, variants, 50, folder)
+    url = image_src(url, variants, 480, folder)
 
     return Markup(f"""
-    <img src="{url}" style="max-height:50px; cursor:pointer;" 
+    <img src="{thumb}" style="max-height:50px; cursor:pointer;" loading="lazy"
          data-bs-toggle="modal" data-bs-target="#imageModal{model.id}" />
     <div class="modal fade" id="imageModal{model.id}" tabindex="-1" aria-hidden="true">
       <div class="modal-dialog modal-dialog-centered">
         <div class="modal-content">
           <div class="modal-body text-center">
-            <img src="{url}" style="width:100%;"/>
+            <img src="{url}" style="width:100%;" loading="lazy"/>
           </div>
         </div>
       </div>
@@ -158,6 +166,9 @@ class JobForm(Form):
     )
 
 class ApplicationForm(Form):
+    job_id = IntegerField("Mã tin tuyển dụng", validators=[DataRequired()])
+    candidate_profile_id = IntegerField("Mã hồ sơ ứng viên", validators=[DataRequired()])
+    applied_at = DateTimeField("Ngày nộp", default=datetime.now, validators=[DataRequired()])
     status = SelectField(
         "Trạng thái",
         choices=[(s.value, s.value) for s in ApplicationStatus],
@@ -169,6 +180,7 @@ class ApplicationForm(Form):
 
 class CompanyApprovalView(AuthenticatedView):
     form = CompanyApprovalForm
+    column_select_related_list = [Company.user]
     column_list = ["id", "name", "address", "website", "mst", "status", "user.username", "logo_url"]
     column_labels = {
         "name": "Tên công ty",
@@ -197,15 +209,20 @@ class CompanyApprovalView(AuthenticatedView):
                     db.session.commit()
                     flash(f"Người dùng {model.user.username} đã trở thành Nhà tuyển dụng!", "info")
 
+            self.after_model_change(form, model, False)
             return True
         except Exception as e:
             db.session.rollback()
             flash(f"Lỗi khi duyệt công ty: {e}", "error")
             return False
 
+    def after_model_change(self, form, model, is_created):
+        search.index_company_jobs(model)
+
 
 class UserView(AuthenticatedView):
     form = UserForm
+    column_select_related_list = [User.company, User.candidate_profile]
     column_list = ["id", "username", "email", "role", "company.name",
                    "candidate_profile.full_name", "image_url"]
     column_searchable_list = ["username", "email"]
@@ -225,6 +242,7 @@ class UserView(AuthenticatedView):
 
 class ApplicationView(AuthenticatedView):
     form = ApplicationForm
+    column_select_related_list = [Application.candidate_profile, Application.job]
     column_list = ["id", "candidate_profile.full_name", "job.title", "status", "applied_at"]
     column_searchable_list = ["candidate_profile.full_name", "job.title"]
     column_filters = ["status"]
@@ -235,9 +253,16 @@ class ApplicationView(AuthenticatedView):
         "applied_at": "Ngày nộp"
     }
 
+    def on_model_change(self, form, model, is_created):
+        stats.record_application_change(model, is_created)
+
+    def on_model_delete(self, model):
+        stats.forget_applications([model])
+
 
 class JobView(AuthenticatedView):
     form = JobForm
+    column_select_related_list = [Job.company]
     column_list = ["id", "title", "company.name", "location", "salary", "status", "created_at"]
     column_searchable_list = ["title", "company.name"]
     column_filters = ["company.name", "location", "status", "created_at"]
@@ -250,9 +275,19 @@ class JobView(AuthenticatedView):
         "created_at": "Ngày tạo"
     }
 
+    def after_model_change(self, form, model, is_created):
+        indexing.reindex_job(model)
+
+    def on_model_delete(self, model):
+        stats.forget_applications(model.applications)
+
+    def after_model_delete(self, model):
+        indexing.unindex_job(model.id)
+
 
 class CompanyView(AuthenticatedView):
     form = CompanyForm
+    column_select_related_list = [Company.user]
     column_list = ["id", "name", "address", "user.username", "logo_url"]
     column_searchable_list = ["name", "address"]
     column_labels = {
@@ -265,8 +300,16 @@ class CompanyView(AuthenticatedView):
         "logo_url": lambda v, c, m, n: popup_image_formatter(v, c, m, n, folder="Image/logos")
     }
 
+    def after_model_change(self, form, model, is_created):
+        search.index_company_jobs(model)
+
+    def after_model_delete(self, model):
+        # Các job bị xóa theo cascade: dựng lại các index trong thread nền
+        indexing.invalidate()
+
 
 class CandidateProfileView(AuthenticatedView):
+    column_select_related_list = [CandidateProfile.user]
     column_list = ["id", "full_name", "user.username", "phone", "skills", "experience", "education"]
     column_searchable_list = ["full_name", "user.username"]
     column_labels = {
@@ -278,6 +321,9 @@ class CandidateProfileView(AuthenticatedView):
         "education": "Học vấn"
     }
 
+    def after_model_change(self, form, model, is_created):
+        recommend.refresh_profile(model.id)
+
 
 class ReportView(BaseView):
     @expose('/')
@@ -290,69 +336,19 @@ class ReportView(BaseView):
         start_date = datetime.min if months == 0 else now - timedelta(days=30 * months)
 
         location_filter = request.args.get('location', 'all')
-        all_locations = [loc[0] for loc in Job.query.with_entities(Job.location).distinct()]
-
-        total_users = User.query.count()
-        total_candidates = User.query.filter_by(role="candidate").count()
-        total_companies = User.query.filter_by(role="company").count()
-        total_jobs = Job.query.count()
-        total_applications = Application.query.count()
-        total_approved_companies = Company.query.filter_by(status="Approved").count()
-
-        month_labels = db.session.query(
-            extract('year', Application.applied_at).label('year'),
-            extract('month', Application.applied_at).label('month')
-        ).filter(Application.applied_at >= start_date) \
-            .group_by('year', 'month') \
-            .order_by('year', 'month').all()
-
-        labels = [f"{int(y)}-{int(m):02d}" for y, m in month_labels]
-
-        statuses = ['Pending', 'Accepted', 'Rejected']
-        status_data = {status: [] for status in statuses}
-        for y, m in month_labels:
-            for status in statuses:
-                count = Application.query.filter(
-                    extract('year', Application.applied_at) == y,
-                    extract('month', Application.applied_at) == m,
-                    Application.status == status
-                ).count()
-                status_data[status].append(count)
-
-        companies = Company.query.all()
-        company_status_data = {}
-        for company in companies:
-            company_status_data[company.name] = {status: [] for status in statuses}
-            for y, m in month_labels:
-                for status in statuses:
-                    count = db.session.query(Application).join(Job).filter(
-                        Job.company_id == company.id,
-                        extract('year', Application.applied_at) == y,
-                        extract('month', Application.applied_at) == m,
-                        Application.status == status
-                    ).count()
-                    company_status_data[company.name][status].append(count)
-
-        location_query = db.session.query(
-            Job.location,
-            func.count(Job.id)
-        ).group_by(Job.location)
 
-        if location_filter != 'all':
-            location_query = location_query.filter(Job.location == location_filter)
+        totals = stats.get_totals()
+        labels, status_data, company_status_data = stats.get_application_report(start_date)
 
-        location_data = location_query.all()
+        location_data = stats.count_jobs_by_location()
+        all_locations = [loc for loc, count in location_data]
+        if location_filter != 'all':
+            location_data = [(loc, count) for loc, count in location_data if loc == location_filter]
         location_labels = [loc for loc, count in location_data]
         location_values = [count for loc, count in location_data]
 
         return self.render(
             'admin/report.html',
-            total_users=total_users,
-            total_candidates=total_candidates,
-            total_companies=total_companies,
-            total_jobs=total_jobs,
-            total_applications=total_applications,
-            total_approved_companies=total_approved_companies,
             labels=labels,
             status_data=status_data,
             company_status_data=company_status_data,
@@ -360,7 +356,8 @@ class ReportView(BaseView):
             all_locations=all_locations,
             location_filter=location_filter,
             location_labels=location_labels,
-            location_values=location_values
+            location_values=location_values,
+            **totals
         )
 
     def is_accessible(self):
@@ -377,4 +374,14 @@ admin.add_view(JobView(Job, db.session, name="Tin tuyển dụng"))
 admin.add_view(ApplicationView(Application, db.session, name="Ứng tuyển"))
 admin.add_view(CandidateProfileView(CandidateProfile, db.session, name="Hồ sơ ứng viên"))
 admin.add_view(ReportView(name="Báo cáo thống kê", endpoint="report"))
-admin.add_view(LogoutView(name="Đăng xuất", endpoint="logout"))
\ No newline at end of file
+admin.add_view(LogoutView(name="Đăng xuất", endpoint="logout"))
+
+query_budgets.update({
+    "user.index_view": 5,
+    "company_admin.index_view": 5,
+    "company_approval.index_view": 5,
+    "job.index_view": 5,
+    "application.index_view": 5,
+    "candidateprofile.index_view": 5,
+    "report.index": 6,
+})
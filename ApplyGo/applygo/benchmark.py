@@ -0,0 +1,312 @@
+"""
+Benchmark các route nóng trên database cục bộ, so với baseline JSON để bắt hồi quy hiệu năng:
+
+    flask bench-routes --generate --scale 10 --save   # sinh dữ liệu, đo và ghi baseline
+    flask bench-routes                                # đo lại, lỗi nếu chậm/tốn hơn baseline quá ngưỡng
+
+Mỗi kịch bản chạy qua test client (đủ decorator, cache, template) và ghi p50/p95 độ trễ,
+số câu SQL mỗi lần chạy và bộ nhớ Python cấp phát đỉnh (tracemalloc, đo ở một lượt riêng).
+"""
+import json
+import os
+import queue
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import event, func
+from sqlalchemy.engine import Engine
+
+from applygo import app, db, dao, stats
+from applygo.cache import page_cache, count_cache
+from applygo.models import User, UserRole, Company, Job, JobStatus, Application, Category, CandidateProfile, \
+    OutboxEmail
+
+# Số bản ghi ở scale=1; --scale 1000 xấp xỉ 1M tin, 200k công ty, 20M đơn
+SCALE_COUNTS = dict(candidates=2000, companies=200, jobs=1000, applications=20000)
+
+# Chậm hơn baseline dưới mức này (ms) coi là nhiễu đo
+MIN_DELTA_MS = 2.0
+
+
+class Fixtures:
+    """Các đối tượng dùng trong kịch bản: tin có nhiều đơn nhất (trường hợp xấu nhất) và chủ của nó."""
+
+    def __init__(self):
+        hot = db.session.query(Application.job_id, func.count().label("n")) \
+            .group_by(Application.job_id).order_by(func.count().desc()).first()
+        job = db.session.get(Job, hot.job_id) if hot else Job.query.order_by(Job.id).first()
+        if job is None:
+            raise ValueError("Database chưa có tin tuyển dụng, chạy với --generate.")
+        self.job_id = job.id
+        self.company_user_id = db.session.get(Company, job.company_id).user_id
+        self.candidate_user_id = db.session.query(CandidateProfile.user_id) \
+            .order_by(CandidateProfile.id).limit(1).scalar()
+        self.admin_user_id = db.session.query(User.id).filter(User.role == UserRole.ADMIN.value) \
+            .order_by(User.id).limit(1).scalar()
+        self.category_id = db.session.query(Category.id).order_by(Category.id).limit(1).scalar()
+        self.location = job.location or "Hanoi"
+
+
+def get(path, role=None):
+    def run(client, fixtures):
+        response = client.get(path.format(f=fixtures))
+        if response.status_code != 200:
+            raise AssertionError(f"GET {path} trả về {response.status_code}")
+    run.role = role
+    return run
+
+
+def apply_job(client, fixtures):
+    job_id = fixtures.apply_job_ids.pop()
+    dao.apply_job(user_id=fixtures.candidate_user_id, job_id=job_id)
+    fixtures.applied.append(job_id)
+
+
+apply_job.role = None
+
+# tên -> kịch bản; role là user đăng nhập trước khi chạy (None: khách)
+SCENARIOS = {
+    "index": get("/"),
+    "index_candidate": get("/", "candidate"),
+    "jobs": get("/jobs/"),
+    "jobs_keyword": get("/jobs/?kw=python developer"),
+    "jobs_location_salary": get("/jobs/?location={f.location}&salary_range=15-25"),
+    "jobs_category_salary_sort": get("/jobs/?category_id={f.category_id}&sort=salary"),
+    "jobs_recent_open": get("/jobs/?posted=30&status=Open"),
+    "job_detail": get("/jobs/{f.job_id}/"),
+    "recruitment_post_detail": get("/recruitment-post-detail/{f.job_id}/", "company"),
+    "recruitment_post_detail_by_score": get("/recruitment-post-detail/{f.job_id}/?sort=score", "company"),
+    "candidate_profile": get("/candidate/profile/", "candidate"),
+    "company_profile": get("/company/profile/", "company"),
+    "admin_report": get("/admin/report/", "admin"),
+    "apply_job": apply_job,
+}
+
+
+def login(client, user_id):
+    with client.session_transaction() as session:
+        if user_id is None:
+            session.clear()
+        else:
+            session["_user_id"] = str(user_id)
+            session["_fresh"] = True
+
+
+def percentile(times, p):
+    ordered = sorted(times)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def prepare_apply(fixtures, n):
+    applied = db.session.query(Application.job_id).join(CandidateProfile) \
+        .filter(CandidateProfile.user_id == fixtures.candidate_user_id)
+    fixtures.apply_job_ids = [job_id for (job_id,) in db.session.query(Job.id)
+                              .filter(Job.status == JobStatus.OPEN.value, Job.id.notin_(applied))
+                              .order_by(Job.id.desc()).limit(n)]
+    fixtures.applied = []
+    fixtures.last_outbox_id = db.session.query(func.max(OutboxEmail.id)).scalar() or 0
+    if len(fixtures.apply_job_ids) < n:
+        raise ValueError(f"Cần {n} tin đang mở mà ứng viên chưa ứng tuyển để đo apply_job.")
+
+
+def cleanup_apply(fixtures):
+    """Xóa các đơn (và thông báo) do benchmark tạo ra, trả rollup về như cũ."""
+    profile_id = db.session.query(CandidateProfile.id).filter_by(user_id=fixtures.candidate_user_id).scalar()
+    created = Application.query.filter(Application.candidate_profile_id == profile_id,
+                                       Application.job_id.in_(fixtures.applied)).all()
+    stats.forget_applications(created)
+    for application in created:
+        db.session.delete(application)
+    OutboxEmail.query.filter(OutboxEmail.id > fixtures.last_outbox_id).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def run_scenario(scenario, client, fixtures, iterations, warmup, cold):
+    users = {"candidate": fixtures.candidate_user_id, "company": fixtures.company_user_id,
+             "admin": fixtures.admin_user_id}
+    login(client, users.get(scenario.role))
+    queries = [0]
+
+    def count(*args):
+        queries[0] += 1
+
+    def once():
+        if cold:
+            # Đo đường đi tới DB, không đo cache trang/đếm của lần chạy trước
+            page_cache.clear()
+            count_cache.clear()
+        start = time.perf_counter()
+        # App context riêng như mỗi request thật: g (user đăng nhập, ...) và session DB không dùng chung giữa các lượt
+        with app.app_context():
+            scenario(client, fixtures)
+        return time.perf_counter() - start
+
+    for _ in range(warmup):
+        once()
+    times = []
+    event.listen(Engine, "after_cursor_execute", count)
+    try:
+        for _ in range(iterations):
+            times.append(once())
+    finally:
+        event.remove(Engine, "after_cursor_execute", count)
+
+    tracemalloc.start()
+    try:
+        once()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "p50_ms": round(percentile(times, 0.5) * 1000, 3),
+        "p95_ms": round(percentile(times, 0.95) * 1000, 3),
+        "queries": round(queries[0] / iterations, 1),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def table_counts():
+    return {model.__tablename__: db.session.query(func.count(model.id)).scalar()
+            for model in (User, Company, Job, Application)}
+
+
+def run(names=None, iterations=30, warmup=3, cold=True, echo=print):
+    names = names or list(SCENARIOS)
+    fixtures = Fixtures()
+    mail_worker = app.config["MAIL_WORKER"]
+    app.config["MAIL_WORKER"] = False  # thông báo của apply_job sẽ bị xóa, không gửi
+    results = {}
+    try:
+        client = app.test_client()
+        for name in names:
+            if name == "apply_job":
+                prepare_apply(fixtures, iterations + warmup + 1)
+            try:
+                results[name] = run_scenario(SCENARIOS[name], client, fixtures, iterations, warmup, cold)
+            finally:
+                if name == "apply_job":
+                    cleanup_apply(fixtures)
+            r = results[name]
+            echo(f"{name:<34} p50={r['p50_ms']:>9.2f} ms  p95={r['p95_ms']:>9.2f} ms  "
+                 f"queries={r['queries']:>5}  peak={r['peak_kb']:>9.1f} KB")
+    finally:
+        app.config["MAIL_WORKER"] = mail_worker
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "dialect": db.engine.dialect.name,
+        "iterations": iterations,
+        "cold": cold,
+        "counts": table_counts(),
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Danh sách hồi quy so với baseline: p95 chậm hơn, thêm câu SQL hoặc bộ nhớ đỉnh tăng quá tolerance."""
+    regressions = []
+    for name, current in report["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance) and \
+                current["p95_ms"] - base["p95_ms"] > MIN_DELTA_MS:
+            regressions.append(f"{name}: p95 {base['p95_ms']} -> {current['p95_ms']} ms")
+        if current["queries"] > base["queries"]:
+            regressions.append(f"{name}: {base['queries']} -> {current['queries']} câu SQL")
+        if current["peak_kb"] > base["peak_kb"] * (1 + tolerance):
+            regressions.append(f"{name}: bộ nhớ đỉnh {base['peak_kb']} -> {current['peak_kb']} KB")
+    return regressions
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path, report):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def stress_apply(candidates=200, threads=16, clicks=2):
+    """
+    Nhiều thread cùng ứng tuyển vào tin đang mở có nhiều đơn nhất, mỗi ứng viên bấm `clicks` lần cùng lúc.
+    Trả về thống kê (số đơn trùng, lượt/giây, ...); các đơn tạo ra được xóa sau khi đếm.
+    """
+    hot = db.session.query(Job.id).outerjoin(Application).filter(Job.status == JobStatus.OPEN.value) \
+        .group_by(Job.id).order_by(func.count(Application.id).desc()).limit(1).scalar()
+    if hot is None:
+        raise ValueError("Không có tin tuyển dụng đang mở.")
+    applied = db.session.query(Application.candidate_profile_id).filter(Application.job_id == hot)
+    profiles = db.session.query(CandidateProfile.id, CandidateProfile.user_id) \
+        .filter(CandidateProfile.id.notin_(applied)).order_by(CandidateProfile.id).limit(candidates).all()
+    last_outbox_id = db.session.query(func.max(OutboxEmail.id)).scalar() or 0
+
+    # Các lần bấm của cùng một ứng viên đứng cạnh nhau để các thread chạy chúng đồng thời
+    tasks = queue.Queue()
+    for _, user_id in profiles:
+        for _ in range(clicks):
+            tasks.put(user_id)
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            try:
+                user_id = tasks.get_nowait()
+            except queue.Empty:
+                return
+            with app.app_context():
+                try:
+                    dao.apply_job(user_id=user_id, job_id=hot)
+                    outcome = "accepted"
+                except ValueError:
+                    outcome = "rejected"
+                except Exception:
+                    db.session.rollback()
+                    outcome = "errors"
+            with lock:
+                outcomes[outcome] += 1
+
+    mail_worker = app.config["MAIL_WORKER"]
+    app.config["MAIL_WORKER"] = False
+    started = time.perf_counter()
+    try:
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+    finally:
+        app.config["MAIL_WORKER"] = mail_worker
+    elapsed = time.perf_counter() - started
+
+    profile_ids = [profile_id for profile_id, _ in profiles]
+    created = Application.query.filter(Application.job_id == hot,
+                                       Application.candidate_profile_id.in_(profile_ids)).all()
+    duplicates = len(created) - len({a.candidate_profile_id for a in created})
+    stats.forget_applications(created)
+    for application in created:
+        db.session.delete(application)
+    OutboxEmail.query.filter(OutboxEmail.id > last_outbox_id).delete(synchronize_session=False)
+    db.session.commit()
+
+    return {
+        "job_id": hot,
+        "candidates": len(profiles),
+        "attempts": sum(outcomes.values()),
+        "accepted": outcomes["accepted"],
+        "rejected": outcomes["rejected"],
+        "errors": outcomes["errors"],
+        "rows": len(created),
+        "duplicates": duplicates,
+        "seconds": elapsed,
+        "applies_per_second": outcomes["accepted"] / elapsed if elapsed else 0.0,
+    }
@@ -0,0 +1,235 @@
+"""
+Cache trong bộ nhớ của từng worker. Commit trong worker này xóa ngay các phần tử theo tag; thay đổi tin ở worker
+khác được xóa qua bảng job_change (sync_shared, chậm tối đa JOB_CHANGE_POLL_SECONDS). Các tag còn lại (danh mục,
+user, đơn ứng tuyển, tổng số tin của công ty có tin vừa bị xóa) ở worker khác chỉ hết hạn theo TTL của từng cache.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g
+from sqlalchemy import event, inspect
+
+from applygo import app, db, changes
+from applygo.models import User, CandidateProfile, Job, Company, Category, Application, CvTemplate
+
+
+class LRUCache:
+    """
+    Cache LRU giới hạn số phần tử (và tổng dung lượng nếu có max_bytes), mỗi phần tử có TTL
+    và các tag để xóa theo nhóm.
+    """
+
+    def __init__(self, max_entries=1000, ttl=60, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (expires_at, value, tags, size)
+        self.tags = {}  # tag -> set(key)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._delete(key)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, tags=(), ttl=None, size=None):
+        expires_at = time.monotonic() + (ttl or self.ttl)
+        if not self.max_bytes:
+            size = 0
+        elif size is None:
+            size = sys.getsizeof(value)
+        if self.max_bytes and size > self.max_bytes:
+            return
+        with self.lock:
+            self._delete(key)
+            self.entries[key] = (expires_at, value, frozenset(tags), size)
+            self.bytes += size
+            for tag in tags:
+                self.tags.setdefault(tag, set()).add(key)
+            while len(self.entries) > self.max_entries or (self.max_bytes and self.bytes > self.max_bytes):
+                self._delete(next(iter(self.entries)))
+                self.evictions += 1
+
+    def delete(self, key):
+        with self.lock:
+            self._delete(key)
+
+    def _delete(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry[3]
+        for tag in entry[2]:
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
+
+    def invalidate_tags(self, tags):
+        with self.lock:
+            for tag in tags:
+                for key in list(self.tags.get(tag, ())):
+                    self._delete(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.tags.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+page_cache = LRUCache(max_entries=app.config["PAGE_CACHE_SIZE"], ttl=app.config["PAGE_CACHE_TTL"])
+count_cache = LRUCache(max_entries=5000, ttl=app.config["COUNT_CACHE_TTL"])
+# user_id -> ảnh chụp cột của User kèm Company/CandidateProfile, dùng cho load_user
+identity_cache = LRUCache(max_entries=app.config["IDENTITY_CACHE_SIZE"], ttl=app.config["IDENTITY_CACHE_TTL"])
+# HTML phần thân CV đã render, giới hạn theo tổng dung lượng (xem applygo/cv.py)
+cv_cache = LRUCache(max_entries=app.config["CV_CACHE_SIZE"], ttl=app.config["CV_CACHE_TTL"],
+                    max_bytes=app.config["CV_CACHE_MAX_BYTES"])
+# (job_id, job.updated_at) -> {candidate_profile_id: (profile.updated_at, điểm phù hợp)} (xem applygo/matching.py)
+match_cache = LRUCache(max_entries=app.config["MATCH_CACHE_SIZE"], ttl=app.config["MATCH_CACHE_TTL"])
+
+
+def tag_page(*tags):
+    """Gắn thêm tag cho trang đang render, để xóa cache đúng lúc dữ liệu đó thay đổi."""
+    if "page_cache_tags" in g:
+        g.page_cache_tags.update(tags)
+
+
+def tag_session(*tags):
+    """Tag cần xóa khi commit cho các thay đổi không qua ORM flush (UPDATE/DELETE hàng loạt)."""
+    db.session.info.setdefault("page_cache_tags", set()).update(tags)
+
+
+def job_tags(job_id=None, company_id=None, category_id=None):
+    tags = set()
+    if job_id is not None:
+        tags.add(f"job:{job_id}")
+    if company_id is not None:
+        tags.add(f"company:{company_id}")
+    if category_id is not None:
+        tags.add(f"category:{category_id}")
+    return tags
+
+
+def _old_value(obj, attr):
+    history = inspect(obj).attrs[attr].history
+    return history.deleted[0] if history.deleted else None
+
+
+def _changed_tags(obj):
+    if isinstance(obj, Job):
+        tags = {"job-list", f"company-jobs:{obj.company_id}"} | job_tags(job_id=obj.id, category_id=obj.category_id)
+        # Job đổi danh mục: các trang của danh mục cũ cũng phải xóa
+        tags |= job_tags(category_id=_old_value(obj, "category_id"))
+        return tags
+    if isinstance(obj, User):
+        return {f"user:{obj.id}"}
+    if isinstance(obj, CandidateProfile):
+        return {f"user:{obj.user_id}"}
+    if isinstance(obj, Company):
+        return {"job-list", "company-list", f"company:{obj.id}", f"user:{obj.user_id}"}
+    if isinstance(obj, Category):
+        return {"job-list", "category-list", f"category:{obj.id}"}
+    if isinstance(obj, Application):
+        return {f"applications:{obj.job_id}"}
+    if isinstance(obj, CvTemplate):
+        return {"cv-templates"}
+    return set()
+
+
+@event.listens_for(db.session, "after_flush")
+def collect_changed_tags(session, flush_context):
+    tags = session.info.setdefault("page_cache_tags", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        tags |= _changed_tags(obj)
+
+
+@event.listens_for(db.session, "after_commit")
+def invalidate_changed_pages(session):
+    tags = session.info.pop("page_cache_tags", None)
+    if tags:
+        page_cache.invalidate_tags(tags)
+        count_cache.invalidate_tags(tags)
+        identity_cache.invalidate_tags(tags)
+        cv_cache.invalidate_tags(tags)
+        match_cache.invalidate_tags(tags)
+
+
+@event.listens_for(db.session, "after_rollback")
+def discard_changed_tags(session):
+    session.info.pop("page_cache_tags", None)
+
+
+_feed = changes.ChangeFeed()
+_sync_thread = None
+_sync_lock = threading.Lock()
+
+
+def sync_shared():
+    """Xóa trang và số đếm của các tin mà worker khác đã ghi vào job_change kể từ lần đọc trước."""
+    if _feed.checked_at is None:
+        # Lần đầu: chỉ ghi nhận vị trí, cache của tiến trình mới chưa có gì cũ
+        _feed.mark()
+        return
+    job_ids = _feed.poll()
+    if not job_ids:
+        return
+    if changes.REBUILD in job_ids:
+        page_cache.clear()
+        count_cache.clear()
+        return
+    tags = {"job-list"} | {f"job:{job_id}" for job_id in job_ids}
+    tags |= {f"company-jobs:{company_id}" for (company_id,) in
+             db.session.query(Job.company_id).filter(Job.id.in_(job_ids)).distinct()}
+    page_cache.invalidate_tags(tags)
+    count_cache.invalidate_tags(tags)
+
+
+def _run_sync():
+    while True:
+        time.sleep(app.config["JOB_CHANGE_POLL_SECONDS"])
+        with app.app_context():
+            try:
+                sync_shared()
+            except Exception:
+                app.logger.exception("Không đọc được job_change cho page cache")
+                db.session.rollback()
+
+
+def start_sync():
+    """Chạy thread đọc job_change của tiến trình này (một lần), gọi khi cache trang được dùng lần đầu."""
+    global _sync_thread
+    if _sync_thread is not None or not app.config["PAGE_CACHE_SYNC"]:
+        return
+    with _sync_lock:
+        if _sync_thread is None:
+            _sync_thread = threading.Thread(target=_run_sync, name="page-cache-sync", daemon=True)
+            _sync_thread.start()
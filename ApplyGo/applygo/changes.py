@@ -0,0 +1,91 @@
+"""
+Nhật ký thay đổi tin tuyển dụng (bảng job_change). Mỗi lần flush có Job được tạo/sửa/xóa (hoặc công ty đổi tên)
+thì ghi id tin trong cùng transaction; index trong bộ nhớ của từng worker (search, similar) đọc nhật ký theo id
+tăng dần để cập nhật các tin do worker khác sửa, thay vì chỉ thấy thay đổi của chính mình.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, inspect, select
+
+from applygo import app, db
+from applygo.models import Job, Company, JobChange
+
+# Phần tử trả về từ poll() khi cần dựng lại toàn bộ index
+REBUILD = None
+
+
+def _changed_job_ids(session):
+    job_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Job) and obj.id is not None:
+            job_ids.add(obj.id)
+        elif isinstance(obj, Company) and obj in session.dirty and inspect(obj).attrs.name.history.has_changes():
+            # Tên công ty nằm trong search index của mọi tin của công ty
+            job_ids.update(session.connection().execute(select(Job.id).where(Job.company_id == obj.id)).scalars())
+    return job_ids
+
+
+@event.listens_for(db.session, "after_flush")
+def record_job_changes(session, flush_context):
+    job_ids = _changed_job_ids(session)
+    if job_ids:
+        now = datetime.now()
+        session.connection().execute(JobChange.__table__.insert(),
+                                     [dict(job_id=job_id, changed_at=now) for job_id in sorted(job_ids)])
+
+
+def record_rebuild():
+    """Ghi dấu "dựng lại toàn bộ" (vd. sau khi ghi hàng loạt bằng Core, không qua ORM) và commit."""
+    db.session.execute(JobChange.__table__.insert().values(job_id=REBUILD, changed_at=datetime.now()))
+    db.session.commit()
+
+
+def prune(hours=None):
+    """Xóa nhật ký cũ hơn JOB_CHANGE_RETENTION_HOURS; worker lâu không đọc sẽ tự dựng lại index."""
+    hours = app.config["JOB_CHANGE_RETENTION_HOURS"] if hours is None else hours
+    cutoff = datetime.now() - timedelta(hours=hours)
+    deleted = db.session.query(JobChange).filter(JobChange.changed_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+class ChangeFeed:
+    """Vị trí đã đọc trong job_change của một index trong tiến trình này."""
+
+    def __init__(self):
+        self.last_id = 0
+        self.checked_at = None
+        self.lock = threading.Lock()
+
+    def mark(self):
+        """Gọi trước khi dựng index từ DB: poll() sau đó chỉ trả về các thay đổi đến sau thời điểm này."""
+        last_id = db.session.query(func.max(JobChange.id)).scalar() or 0
+        with self.lock:
+            self.last_id = max(self.last_id, last_id)
+            self.checked_at = time.monotonic()
+
+    def poll(self):
+        """
+        id các tin đã đổi kể từ lần đọc trước, có REBUILD nếu phải dựng lại toàn bộ. Đọc DB nhiều nhất một lần
+        mỗi JOB_CHANGE_POLL_SECONDS; chưa mark() thì không có gì để theo kịp.
+        """
+        now = time.monotonic()
+        with self.lock:
+            if self.checked_at is None or now - self.checked_at < app.config["JOB_CHANGE_POLL_SECONDS"]:
+                return []
+            # Lâu không đọc: nhật ký có thể đã bị prune() mất một phần
+            expired = now - self.checked_at > app.config["JOB_CHANGE_RETENTION_HOURS"] * 3600
+            self.checked_at = now
+            last_id = self.last_id
+
+        limit = app.config["JOB_CHANGE_BATCH"]
+        rows = db.session.query(JobChange.id, JobChange.job_id).filter(JobChange.id > last_id) \
+            .order_by(JobChange.id).limit(limit).all()
+        if rows:
+            with self.lock:
+                self.last_id = max(self.last_id, rows[-1].id)
+        if expired or len(rows) == limit:
+            return [REBUILD]
+        return list(dict.fromkeys(row.job_id for row in rows))
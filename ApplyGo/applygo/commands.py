@@ -0,0 +1,501 @@
+import io
+import os
+import random
+import tempfile
+import threading
+import time
+
+import click
+from flask_mail import Message
+from werkzeug.datastructures import FileStorage
+
+from applygo import app, db, mail, stats, migrations, passwords, uploads, images, outbox, activity, benchmark, \
+    changes, recommend
+from applygo.models import User, Company, CandidateProfile, UploadJob, UploadStatus, StoredBlob, OutboxEmail, MailStatus, \
+    ActivityLog
+from applygo.migrations import checks, v002_job_salary_columns
+from applygo.smtp_sink import SMTPSink
+from applygo.Data.generate_data import generate as generate_synthetic
+
+
+@app.cli.command("db-upgrade")
+def db_upgrade():
+    """Áp dụng các migration schema chưa chạy (không xóa dữ liệu)."""
+    applied = migrations.upgrade()
+    for version in applied:
+        click.echo(f"Đã áp dụng {version}")
+    if not applied:
+        click.echo("Schema đã ở phiên bản mới nhất.")
+    click.echo("Chạy `flask db-backfill` để điền dữ liệu cho các cột mới.")
+
+
+@app.cli.command("db-backfill")
+@click.option("--batch-size", default=1000, show_default=True, help="Số dòng cập nhật mỗi lần commit.")
+def db_backfill(batch_size):
+    """Chạy các backfill dữ liệu còn thiếu, theo từng lô nhỏ."""
+    migrations.backfill(batch_size=batch_size, log=click.echo)
+    click.echo("Hoàn tất backfill.")
+
+
+@app.cli.command("db-status")
+def db_status():
+    """Liệt kê các migration và trạng thái áp dụng/backfill."""
+    for version, doc, applied_at, backfilled_at in migrations.status():
+        state = "chưa áp dụng" if applied_at is None else \
+            "đã áp dụng" + (", chờ backfill" if backfilled_at is None else "")
+        click.echo(f"{version:<36} {state:<28} {doc}")
+
+
+@app.cli.command("db-explain")
+def db_explain():
+    """EXPLAIN các truy vấn nóng, báo lỗi nếu có truy vấn quét toàn bảng."""
+    failed = []
+    for name, uses_index, plan in checks.check_hot_queries():
+        click.echo(f"{'OK ' if uses_index else 'FAIL'} {name}")
+        for line in plan:
+            click.echo(f"     {line}")
+        if not uses_index:
+            failed.append(name)
+    if failed:
+        raise click.ClickException(f"Truy vấn không dùng index: {', '.join(failed)}")
+
+
+@app.cli.command("backfill-salary")
+@click.option("--batch-size", default=1000, show_default=True, help="Số job cập nhật mỗi lần commit.")
+def backfill_salary(batch_size):
+    """Tính lại salary_min/salary_max cho mọi job từ cột salary (vd. sau khi sửa parse_salary)."""
+    for progress in v002_job_salary_columns.backfill(batch_size):
+        click.echo(progress)
+    click.echo("Hoàn tất backfill mức lương.")
+
+
+@app.cli.command("rebuild-application-stats")
+@click.option("--batch-size", default=1000, show_default=True, help="Số dòng rollup ghi mỗi lần insert.")
+def rebuild_application_stats(batch_size):
+    """Tính lại bảng application_monthly_stat từ bảng Application."""
+    rows = stats.rebuild_application_stats(batch_size=batch_size)
+    click.echo(f"Đã dựng lại {rows} dòng thống kê hồ sơ theo tháng.")
+
+
+@app.cli.command("recommend-jobs")
+@click.option("--batch-size", default=None, type=int, help="Số ứng viên mỗi khối (mặc định RECOMMEND_BATCH_SIZE).")
+def recommend_jobs(batch_size):
+    """Tính lại việc làm gợi ý cho mọi ứng viên (chạy định kỳ, vd. mỗi đêm)."""
+    started = time.perf_counter()
+    total = recommend.rebuild(batch_size=batch_size, log=click.echo)
+    click.echo(f"Đã tính gợi ý cho {total} ứng viên trong {time.perf_counter() - started:.1f}s.")
+
+
+@app.cli.command("bench-password-hash")
+@click.option("--seconds", default=5.0, show_default=True, help="Thời gian chạy benchmark.")
+@click.option("--clients", default=None, type=int, help="Số luồng đăng nhập đồng thời (mặc định 2 x số worker).")
+def bench_password_hash(seconds, clients):
+    """Đo thông lượng kiểm tra mật khẩu (đăng nhập/giây, tính trên mỗi core) với cấu hình hiện tại."""
+    hasher = passwords.current_hasher()
+    cost = passwords.current_cost()
+    workers = app.config["PASSWORD_HASH_WORKERS"]
+    clients = clients or workers * 2
+    encoded = passwords.hash_password("bench-password")
+    click.echo(f"{hasher.scheme} cost={cost}, 1 lần băm ~{passwords.measure(hasher, cost) * 1000:.1f} ms, "
+               f"{workers} worker, {clients} luồng, {os.cpu_count()} CPU")
+
+    latencies, busy = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                passwords.verify_password("bench-password", encoded)
+            except passwords.PasswordHasherBusy:
+                with lock:
+                    busy[0] += 1
+                time.sleep(0.01)
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    rate = len(latencies) / elapsed
+    click.echo(f"{len(latencies)} lần đăng nhập trong {elapsed:.1f}s: {rate:.1f}/s, "
+               f"{rate / min(workers, os.cpu_count() or 1):.1f}/s mỗi core")
+    if latencies:
+        click.echo(f"p50={latencies[len(latencies) // 2] * 1000:.1f} ms, "
+                   f"p95={latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms, bị từ chối (bận)={busy[0]}")
+
+
+def wait_for_uploads(ids, timeout):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        db.session.rollback()  # bắt đầu transaction mới để thấy trạng thái worker vừa ghi
+        left = db.session.query(UploadJob).filter(
+            UploadJob.id.in_(ids),
+            UploadJob.status.in_([UploadStatus.PENDING.value, UploadStatus.UPLOADING.value])).count()
+        if not left:
+            return True
+        time.sleep(0.1)
+    return False
+
+
+@app.cli.command("process-uploads")
+@click.option("--timeout", default=600.0, show_default=True, help="Số giây tối đa chờ các job hoàn tất.")
+def process_uploads(timeout):
+    """Chạy lại các job tải file còn dang dở (vd. sau khi khởi động lại server)."""
+    ids = [upload_id for (upload_id,) in db.session.query(UploadJob.id).filter(
+        UploadJob.status.in_([UploadStatus.PENDING.value, UploadStatus.UPLOADING.value]))]
+    click.echo(f"Đưa lại {uploads.resume_pending()} job vào hàng đợi.")
+    if not wait_for_uploads(ids, timeout):
+        click.echo("Hết thời gian chờ, một số job vẫn chưa xong.")
+    for status, n in db.session.query(UploadJob.status, db.func.count(UploadJob.id)) \
+            .filter(UploadJob.id.in_(ids)).group_by(UploadJob.status):
+        click.echo(f"{status}: {n}")
+
+
+@app.cli.command("bench-uploads")
+@click.option("--files", default=50, show_default=True)
+@click.option("--size-kb", default=200, show_default=True)
+@click.option("--latency-ms", default=300.0, show_default=True, help="Độ trễ giả lập của kho lưu trữ.")
+@click.option("--fail-rate", default=0.0, show_default=True, help="Tỉ lệ lỗi giả lập (được thử lại).")
+@click.option("--duplicates", default=0.0, show_default=True, help="Tỉ lệ file trùng nội dung với file trước đó.")
+def bench_uploads(files, size_kb, latency_ms, fail_rate, duplicates):
+    """Benchmark pipeline tải file với kho giả lập: thời gian request phải chờ và thông lượng nền."""
+    root = tempfile.mkdtemp(prefix="applygo-fake-storage-")
+    uploads.storage = uploads.LocalFakeStorage(root, latency_ms, fail_rate)
+    app.config["UPLOAD_BACKOFF_BASE"] = 0.05
+    target = CandidateProfile(id=0)  # không tồn tại: worker chỉ tải lên, không ghi vào bản ghi nào
+    payloads = []
+
+    request_times, ids = [], []
+    started = time.perf_counter()
+    for i in range(files):
+        if payloads and random.random() < duplicates:
+            payload = random.choice(payloads)
+        else:
+            payload = os.urandom(size_kb * 1024)
+            payloads.append(payload)
+        start = time.perf_counter()
+        job = uploads.stage(FileStorage(io.BytesIO(payload), filename=f"bench_{i}.pdf"), target, "uploaded_cv_path",
+                            folder="bench")
+        ids.append(job.id)
+        db.session.commit()
+        request_times.append(time.perf_counter() - start)
+    finished = wait_for_uploads(ids, timeout=files * latency_ms / 1000 * 10 + 30)
+    elapsed = time.perf_counter() - started
+
+    done = db.session.query(UploadJob).filter(UploadJob.id.in_(ids), UploadJob.status == UploadStatus.DONE.value).count()
+    deduplicated = db.session.query(UploadJob).filter(UploadJob.id.in_(ids), UploadJob.deduplicated.is_(True)).count()
+    retries = db.session.query(db.func.sum(UploadJob.attempts)).filter(UploadJob.id.in_(ids)).scalar() - len(ids)
+    request_times.sort()
+    click.echo(f"{files} file x {size_kb} KB, kho giả lập {latency_ms:.0f} ms, {app.config['UPLOAD_WORKERS']} worker")
+    click.echo(f"Request chờ: p50={request_times[len(request_times) // 2] * 1000:.1f} ms, "
+               f"p95={request_times[int(len(request_times) * 0.95)] * 1000:.1f} ms "
+               f"(tải đồng bộ: ~{latency_ms:.0f} ms mỗi request)")
+    click.echo(f"Hoàn tất {done}/{files} trong {elapsed:.2f}s ({done / elapsed:.1f} file/s), thử lại {retries} lần"
+               + ("" if finished else ", hết thời gian chờ"))
+    click.echo(f"Bỏ qua {deduplicated} file trùng nội dung ({deduplicated * size_kb} KB không phải tải lên)")
+
+    digests = [d for (d,) in db.session.query(UploadJob.digest).filter(UploadJob.id.in_(ids))]
+    db.session.query(StoredBlob).filter(StoredBlob.digest.in_(digests), StoredBlob.backend == uploads.storage.name) \
+        .delete(synchronize_session=False)
+    db.session.query(UploadJob).filter(UploadJob.id.in_(ids)).delete(synchronize_session=False)
+    db.session.commit()
+
+
+@app.cli.command("storage-stats")
+def storage_stats():
+    """Số file/dung lượng đã lưu theo từng kho và dung lượng tiết kiệm nhờ bỏ qua file trùng."""
+    for backend, n, size in db.session.query(StoredBlob.backend, db.func.count(), db.func.sum(StoredBlob.size)) \
+            .group_by(StoredBlob.backend):
+        click.echo(f"{backend}: {n} file, {(size or 0) / 1024 / 1024:.1f} MB")
+    n, saved = db.session.query(db.func.count(), db.func.sum(UploadJob.size)) \
+        .filter(UploadJob.deduplicated.is_(True)).one()
+    click.echo(f"Lượt tải trùng được bỏ qua: {n}, tiết kiệm {(saved or 0) / 1024 / 1024:.1f} MB")
+
+
+@app.cli.command("backfill-image-variants")
+@click.option("--backend", type=click.Choice(["cloudinary", "local", "fake"]), default=None,
+              help="Kho lưu các bản thu nhỏ (mặc định theo UPLOAD_BACKEND).")
+@click.option("--force", is_flag=True, help="Tạo lại cả cho ảnh đã có bản thu nhỏ.")
+@click.option("--batch-size", default=200, show_default=True, help="Số bản ghi cập nhật mỗi lần commit.")
+def backfill_image_variants(backend, force, batch_size):
+    """Tạo bản thu nhỏ cho avatar/logo đang lưu cục bộ (vd. ảnh seed trong static/Image)."""
+    if backend:
+        app.config["UPLOAD_BACKEND"] = backend
+        uploads.storage = uploads.make_storage()
+
+    rendered = {}  # đường dẫn ảnh nguồn -> variants, ảnh seed dùng chung cho nhiều bản ghi
+    for model, field, variants_field, folder, remote_folder in (
+            (User, "image_url", "image_variants", "Image/avatars", "applygo/avatars"),
+            (Company, "logo_url", "logo_variants", "Image/logos", "applygo/company_logos")):
+        query = model.query.filter(getattr(model, field).isnot(None)).order_by(model.id)
+        if not force:
+            query = query.filter(getattr(model, variants_field).is_(None))
+
+        updated, skipped = 0, 0
+        for obj in query.all():
+            path = images.local_path(getattr(obj, field), folder)
+            if path is None or not os.path.isfile(path):
+                skipped += 1
+                continue
+            if path not in rendered:
+                rendered[path] = uploads.store_variants(path, remote_folder, os.path.basename(path)) or None
+            setattr(obj, variants_field, rendered[path])
+            updated += 1
+            if updated % batch_size == 0:
+                db.session.commit()
+        db.session.commit()
+        click.echo(f"{model.__name__}.{field}: cập nhật {updated}, bỏ qua {skipped} (URL ngoài hoặc thiếu file)")
+
+
+@app.cli.command("process-outbox")
+@click.option("--now", is_flag=True, help="Gửi luôn, không chờ hết MAIL_COALESCE_SECONDS để gộp thông báo.")
+@click.option("--loop", is_flag=True, help="Chạy liên tục, drain mỗi MAIL_POLL_SECONDS (tiến trình gửi mail riêng).")
+def process_outbox(now, loop):
+    """Gửi các thông báo đang chờ trong outbox (vd. khi chạy với MAIL_WORKER=0)."""
+    messages, notices = outbox.drain(coalesce_seconds=0 if now else None)
+    click.echo(f"Đã gửi {messages} mail cho {notices} thông báo.")
+    while loop:
+        time.sleep(app.config["MAIL_POLL_SECONDS"])
+        try:
+            messages, notices = outbox.drain(coalesce_seconds=0 if now else None)
+        except Exception:
+            app.logger.exception("Drain outbox lỗi")
+            db.session.rollback()
+            continue
+        if notices:
+            click.echo(f"Đã gửi {messages} mail cho {notices} thông báo.")
+    for status, n in db.session.query(OutboxEmail.status, db.func.count(OutboxEmail.id)) \
+            .filter(OutboxEmail.status != MailStatus.SENT.value).group_by(OutboxEmail.status):
+        click.echo(f"{status}: {n}")
+
+
+@app.cli.command("smtp-sink")
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", default=1025, show_default=True)
+@click.option("--latency-ms", default=0.0, show_default=True, help="Độ trễ giả lập cho mỗi mail.")
+def smtp_sink(host, port, latency_ms):
+    """Chạy SMTP giả lập để dev/test (đặt MAIL_SERVER/MAIL_PORT trỏ tới đây)."""
+    sink = SMTPSink(host, port, latency_ms).start()
+    click.echo(f"SMTP giả lập đang nghe {host}:{sink.port}, Ctrl+C để dừng.")
+    shown = 0
+    try:
+        while True:
+            time.sleep(0.5)
+            for sender, recipients, message in sink.messages[shown:]:
+                click.echo(f"{', '.join(recipients)}: {message['Subject']}")
+            shown = len(sink.messages)
+    except KeyboardInterrupt:
+        sink.stop()
+
+
+@app.cli.command("bench-mail")
+@click.option("--recipients", default=100, show_default=True)
+@click.option("--notices", default=50, show_default=True, help="Số thông báo cho mỗi người nhận.")
+@click.option("--latency-ms", default=2.0, show_default=True, help="Độ trễ giả lập của SMTP cho mỗi mail.")
+def bench_mail(recipients, notices, latency_ms):
+    """Benchmark outbox với SMTP giả lập: thời gian ghi thông báo, thông lượng gửi, số mail sau khi gộp."""
+    sink = SMTPSink(latency_ms=latency_ms, keep=False).start()
+    state = app.extensions["mail"]
+    saved = (state.server, state.port, state.use_tls, state.use_ssl, state.username, state.suppress)
+    state.server, state.port, state.use_tls, state.use_ssl, state.username, state.suppress = \
+        "127.0.0.1", sink.port, False, False, None, False
+    app.config["MAIL_WORKER"] = False
+    domain = "bench.applygo.local"
+
+    try:
+        # Gửi trực tiếp như khi gửi ngay trong request: mỗi thông báo một mail, một kết nối
+        sample = min(20, recipients * notices)
+        start = time.perf_counter()
+        for i in range(sample):
+            with mail.connect() as conn:
+                conn.send(Message(subject="bench", recipients=[f"direct{i}@{domain}"], body="bench"))
+        direct = (time.perf_counter() - start) / sample
+        sink.received = sink.connections = 0
+
+        enqueue_times = []
+        for n in range(notices):
+            start = time.perf_counter()
+            outbox.notify_many([outbox.status_notice(f"user{i}@{domain}", f"Job {n}", "Accepted")
+                                for i in range(recipients)])
+            db.session.commit()
+            enqueue_times.append((time.perf_counter() - start) / recipients)
+
+        start = time.perf_counter()
+        messages, sent_notices = outbox.drain(coalesce_seconds=0)
+        elapsed = time.perf_counter() - start
+    finally:
+        state.server, state.port, state.use_tls, state.use_ssl, state.username, state.suppress = saved
+        sink.stop()
+        db.session.query(OutboxEmail).filter(OutboxEmail.recipient.like(f"%@{domain}")) \
+            .delete(synchronize_session=False)
+        db.session.commit()
+
+    total = recipients * notices
+    enqueue_times.sort()
+    click.echo(f"{total} thông báo cho {recipients} người nhận, SMTP giả lập {latency_ms:.0f} ms/mail")
+    click.echo(f"Ghi outbox (trong request): p50={enqueue_times[len(enqueue_times) // 2] * 1000:.2f} ms/thông báo; "
+               f"gửi trực tiếp: {direct * 1000:.1f} ms/mail")
+    click.echo(f"Đã gửi {messages} mail ({sink.received} nhận được) cho {sent_notices} thông báo "
+               f"qua {sink.connections} kết nối SMTP trong {elapsed:.2f}s ({sent_notices / elapsed:.0f} thông báo/s)")
+    click.echo(f"Gửi trực tiếp ước tính: {direct * total:.2f}s cho {total} mail")
+
+
+@app.cli.command("prune-activity")
+@click.option("--days", default=None, type=int, help="Giữ lại bao nhiêu ngày (mặc định ACTIVITY_RETENTION_DAYS).")
+@click.option("--batch-size", default=1000, show_default=True, help="Số dòng xóa mỗi transaction.")
+@click.option("--pause", default=0.0, show_default=True, help="Số giây nghỉ giữa các lô để giảm tải cho DB.")
+def prune_activity(days, batch_size, pause):
+    """Xóa ActivityLog cũ theo từng lô (chạy định kỳ bằng cron)."""
+    deleted = activity.prune(days, batch_size, pause)
+    click.echo(f"Đã xóa {deleted} dòng ActivityLog.")
+
+
+@app.cli.command("prune-job-changes")
+@click.option("--hours", default=None, type=float, help="Giữ lại bao nhiêu giờ (mặc định JOB_CHANGE_RETENTION_HOURS).")
+def prune_job_changes(hours):
+    """Xóa nhật ký job_change cũ (chạy định kỳ bằng cron)."""
+    deleted = changes.prune(hours)
+    click.echo(f"Đã xóa {deleted} dòng job_change.")
+
+
+@app.cli.command("bench-activity")
+@click.option("--events", default=20000, show_default=True)
+@click.option("--threads", default=8, show_default=True, help="Số thread giả lập request ghi log đồng thời.")
+@click.option("--sync-events", default=1000, show_default=True, help="Số sự kiện đo khi INSERT từng dòng.")
+def bench_activity(events, threads, sync_events):
+    """So sánh thời gian request phải chờ khi ghi ActivityLog đồng bộ và qua buffer."""
+    user_id = db.session.query(User.id).order_by(User.id).limit(1).scalar()
+    if user_id is None:
+        raise click.ClickException("Cần ít nhất một User.")
+    marker = f"bench-activity-{time.time_ns()}"
+
+    def measure(write, n):
+        times, lock = [], threading.Lock()
+
+        def worker(count):
+            local = []
+            with app.app_context():
+                for _ in range(count):
+                    start = time.perf_counter()
+                    write()
+                    local.append(time.perf_counter() - start)
+            with lock:
+                times.extend(local)
+
+        started = time.perf_counter()
+        pool = [threading.Thread(target=worker, args=(n // threads,)) for _ in range(threads)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        times.sort()
+        return time.perf_counter() - started, times
+
+    def write_sync():
+        db.session.add(ActivityLog(user_id=user_id, action=marker))
+        db.session.commit()
+
+    sync_elapsed, sync_times = measure(write_sync, sync_events)
+    before = activity.buffer.stats()
+    buffered_elapsed, buffered_times = measure(lambda: activity.log(user_id, marker), events)
+    activity.buffer.flush()
+    while activity.buffer.stats()["queued"]:
+        time.sleep(0.05)
+    time.sleep(activity.buffer.flush_seconds * 2)  # chờ lô đang ghi dở của thread nền
+    after = activity.buffer.stats()
+
+    written = db.session.query(ActivityLog).filter(ActivityLog.action == marker).delete(synchronize_session=False)
+    db.session.commit()
+
+    def pct(times, p):
+        return times[min(len(times) - 1, int(len(times) * p))] * 1000
+
+    click.echo(f"Đồng bộ: {len(sync_times)} sự kiện, p50={pct(sync_times, 0.5):.3f} ms, p99={pct(sync_times, 0.99):.3f} ms, "
+               f"{len(sync_times) / sync_elapsed:.0f} sự kiện/s")
+    click.echo(f"Buffer: {len(buffered_times)} sự kiện, p50={pct(buffered_times, 0.5):.3f} ms, "
+               f"p99={pct(buffered_times, 0.99):.3f} ms, {len(buffered_times) / buffered_elapsed:.0f} sự kiện/s")
+    click.echo(f"Đã ghi {after['written'] - before['written']} dòng trong {after['batches'] - before['batches']} lô, "
+               f"bỏ {after['dropped'] - before['dropped']} sự kiện (hàng đợi đầy); xóa {written} dòng benchmark.")
+
+
+@app.cli.command("generate-data")
+@click.option("--candidates", default=20000, show_default=True)
+@click.option("--companies", default=2000, show_default=True)
+@click.option("--jobs", default=10000, show_default=True)
+@click.option("--applications", default=200000, show_default=True)
+@click.option("--seed", default=42, show_default=True, help="Cùng seed và cùng tham số cho ra cùng dữ liệu.")
+@click.option("--workers", default=1, show_default=True, help="Số tiến trình ghi song song (MySQL).")
+@click.option("--batch-size", default=5000, show_default=True, help="Số dòng mỗi câu INSERT.")
+@click.option("--days", default=365, show_default=True, help="Dữ liệu trải trong bao nhiêu ngày gần nhất.")
+@click.option("--job-skew", default=1.0, show_default=True, help="Số mũ Zipf của lượt ứng tuyển theo tin.")
+@click.option("--company-skew", default=1.1, show_default=True, help="Số mũ Zipf của số tin theo công ty.")
+@click.confirmation_option(prompt="Toàn bộ dữ liệu hiện có sẽ bị xóa. Tiếp tục?")
+def generate_data(candidates, companies, jobs, applications, seed, workers, batch_size, days, job_skew, company_skew):
+    """Xóa dữ liệu cũ và sinh bộ dữ liệu giả lập cỡ lớn (vd. 1M tin, 200k công ty, 20M đơn)."""
+    generate_synthetic(candidates=candidates, companies=companies, jobs=jobs, applications=applications, seed=seed,
+                       workers=workers, batch_size=batch_size, days=days, job_skew=job_skew,
+                       company_skew=company_skew, echo=click.echo)
+
+
+@app.cli.command("bench-routes")
+@click.option("--scenario", "names", multiple=True, type=click.Choice(list(benchmark.SCENARIOS)),
+              help="Chỉ chạy các kịch bản này (mặc định: tất cả).")
+@click.option("--iterations", default=30, show_default=True)
+@click.option("--warmup", default=3, show_default=True)
+@click.option("--warm-cache", is_flag=True, help="Giữ cache trang giữa các lần chạy (mặc định đo khi cache trống).")
+@click.option("--generate", is_flag=True, help="Xóa dữ liệu và sinh dữ liệu giả lập theo --scale trước khi đo.")
+@click.option("--scale", default=1.0, show_default=True,
+              help="Hệ số dữ liệu: 1 = 2000 ứng viên, 200 công ty, 1000 tin, 20000 đơn.")
+@click.option("--seed", default=42, show_default=True)
+@click.option("--baseline", default=None, help="File baseline JSON (mặc định BENCH_BASELINE).")
+@click.option("--tolerance", default=None, type=float, help="Tỉ lệ chậm hơn cho phép (mặc định BENCH_TOLERANCE).")
+@click.option("--save", is_flag=True, help="Ghi kết quả làm baseline mới thay vì so sánh.")
+def bench_routes(names, iterations, warmup, warm_cache, generate, scale, seed, baseline, tolerance, save):
+    """Đo p50/p95, số câu SQL và bộ nhớ đỉnh của các route nóng; lỗi nếu hồi quy so với baseline."""
+    baseline = baseline or app.config["BENCH_BASELINE"]
+    tolerance = app.config["BENCH_TOLERANCE"] if tolerance is None else tolerance
+    if generate:
+        counts = {name: max(1, int(n * scale)) for name, n in benchmark.SCALE_COUNTS.items()}
+        generate_synthetic(**counts, seed=seed, echo=click.echo)
+
+    report = benchmark.run(list(names), iterations=iterations, warmup=warmup, cold=not warm_cache, echo=click.echo)
+    if save:
+        benchmark.save_baseline(baseline, report)
+        click.echo(f"Đã ghi baseline vào {baseline}")
+        return
+
+    previous = benchmark.load_baseline(baseline)
+    if previous is None:
+        raise click.ClickException(f"Chưa có baseline {baseline}, chạy lại với --save.")
+    if previous["counts"] != report["counts"] or previous["dialect"] != report["dialect"]:
+        click.echo(f"Cảnh báo: dữ liệu khác lúc ghi baseline ({previous['dialect']} {previous['counts']}), "
+                   f"kết quả có thể không so sánh được.")
+    regressions = benchmark.compare(report, previous, tolerance)
+    for line in regressions:
+        click.echo(f"FAIL {line}")
+    if regressions:
+        raise click.ClickException(f"{len(regressions)} hồi quy hiệu năng so với baseline (tolerance {tolerance:.0%}).")
+    click.echo(f"Không có hồi quy so với baseline (tolerance {tolerance:.0%}).")
+
+
+@app.cli.command("bench-apply")
+@click.option("--candidates", default=200, show_default=True, help="Số ứng viên cùng ứng tuyển một tin.")
+@click.option("--threads", default=16, show_default=True)
+@click.option("--clicks", default=2, show_default=True, help="Số lần mỗi ứng viên bấm ứng tuyển (double-click).")
+def bench_apply(candidates, threads, clicks):
+    """Stress test ứng tuyển đồng thời vào một tin hot: đếm đơn trùng và số lượt ứng tuyển/giây."""
+    result = benchmark.stress_apply(candidates=candidates, threads=threads, clicks=clicks)
+    click.echo(f"Tin #{result['job_id']}: {result['attempts']} lượt bấm của {result['candidates']} ứng viên "
+               f"qua {threads} thread trong {result['seconds']:.2f}s")
+    click.echo(f"Thành công {result['accepted']}, từ chối {result['rejected']}, lỗi {result['errors']}; "
+               f"{result['rows']} đơn được ghi, {result['duplicates']} đơn trùng; "
+               f"{result['applies_per_second']:.0f} lượt ứng tuyển/s")
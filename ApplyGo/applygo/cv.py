@@ -0,0 +1,57 @@
+import sys
+
+from markupsafe import Markup
+
+from applygo import app
+from applygo.cache import cv_cache
+from applygo.models import CandidateProfile, CvTemplate
+
+
+def _render_block(path, **context):
+    """Render riêng block "cv" của mẫu CV (không kèm layout phụ thuộc người đang xem)."""
+    template = app.jinja_env.get_template(path)
+    app.update_template_context(context)
+    return Markup("".join(template.blocks["cv"](template.new_context(context))))
+
+
+def render_cv(profile, folder, template_name):
+    """
+    HTML thân CV của profile theo mẫu template_name trong {folder}/cv_templates.
+    Khóa gồm updated_at nên lưu CV là có phiên bản mới; tag user:<id> xóa bản cũ ngay khi commit
+    (kể cả khi email của User đổi mà profile không đổi).
+    """
+    key = (folder, profile.id, template_name, profile.updated_at)
+    html = cv_cache.get(key)
+    if html is None:
+        html = _render_block(f"{folder}/cv_templates/{template_name}.html", profile=profile)
+        cv_cache.set(key, html, tags={f"user:{profile.user_id}"})
+    return html
+
+
+def preview_profile():
+    return CandidateProfile(
+        full_name="Nguyễn Văn A",
+        phone="0123456789",
+        skills="Kỹ năng 1, Kỹ năng 2, Kỹ năng 3",
+        experience="Kinh nghiệm làm việc",
+        education="Thông tin học vấn"
+    )
+
+
+def warm_previews():
+    """Render sẵn bản xem trước của mọi CvTemplate một lần; xóa khi bảng CvTemplate thay đổi."""
+    profile = preview_profile()
+    previews = {template.html_file: _render_block(f"candidate/cv_templates/{template.html_file}.html",
+                                                  profile=profile)
+                for template in CvTemplate.query.all()}
+    cv_cache.set("previews", previews, tags={"cv-templates"},
+                 size=sum(sys.getsizeof(html) for html in previews.values()))
+    return previews
+
+
+def render_preview(html_file):
+    """HTML xem trước của mẫu, None nếu mẫu không tồn tại."""
+    previews = cv_cache.get("previews")
+    if previews is None:
+        previews = warm_previews()
+    return previews.get(html_file)
@@ -1,27 +1,87 @@
-import hashlib
+import itertools
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 import shlex
-import cloudinary
 from flask_sqlalchemy.query import Query
-from applygo import app, db
-from applygo.models import User, CandidateProfile, Company, Job, Application, ApplicationStatus, Category
+from sqlalchemy import inspect, update, insert, select, literal
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from applygo import app, db, search, similar, matching, recommend, stats, passwords, outbox
+from applygo.cache import identity_cache, count_cache, tag_session
+from applygo.routing import read_only
+from applygo.models import User, CandidateProfile, Company, Job, JobStatus, Application, ApplicationStatus, Category, \
+    THOUSANDS_PER_MILLION
+from applygo.pagination import Page, keyset_paginate, paginate_positions, cursor_position, cached_count
 
 
 def hash_password(password: str) -> str:
-    return hashlib.md5(password.strip().encode("utf-8")).hexdigest()
+    return passwords.hash_password(password.strip())
 
 
 def auth_user(username: str, password: str):
-    hashed = hash_password(password)
-    return User.query.filter_by(
-        username=username.strip(),
-        password=hashed
-    ).first()
+    password = password.strip()
+    user = User.query.filter_by(username=username.strip()).first()
+    if user is None:
+        return passwords.burn_verify(password) or None
+    if not passwords.verify_password(password, user.password):
+        return None
+
+    # Mật khẩu cũ (MD5) hoặc cost thấp hơn hiện tại: băm lại ngay khi biết mật khẩu đúng
+    if passwords.needs_rehash(user.password):
+        user.password = passwords.hash_password(password)
+        db.session.commit()
+    return user
 
 
 def get_user_by_id(user_id: int):
-    return User.query.get(user_id)
+    return db.session.get(User, user_id, options=[joinedload(User.company), joinedload(User.candidate_profile)])
+
+
+def _snapshot(obj):
+    if obj is None:
+        return None
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs}
+
+
+def _restore(model, data):
+    """
+    Dựng lại đối tượng từ ảnh chụp và gắn vào session như vừa được query, không tốn câu SQL nào. Nếu session đã
+    có đối tượng cùng khóa (vd. Company vừa được query trong request) thì dùng luôn đối tượng đó.
+    """
+    mapper = inspect(model)
+    key = mapper.identity_key_from_primary_key(
+        tuple(data[mapper.get_property_by_column(column).key] for column in mapper.primary_key))
+    existing = db.session.identity_map.get(key)
+    if existing is not None:
+        return existing
+    obj = model(**data)
+    make_transient_to_detached(obj)
+    db.session.add(obj)
+    return obj
+
+
+def load_identity(user_id: int):
+    """User đang đăng nhập kèm company/candidate_profile, cache ngắn hạn trong từng worker."""
+    if db.session.identity_map.get(inspect(User).identity_key_from_primary_key((user_id,))) is not None:
+        return get_user_by_id(user_id)
+
+    cached = identity_cache.get(user_id)
+    if cached is None:
+        user = get_user_by_id(user_id)
+        if user is not None:
+            identity_cache.set(user_id, (_snapshot(user), _snapshot(user.company), _snapshot(user.candidate_profile)),
+                               tags={f"user:{user_id}"})
+        return user
+
+    user_data, company_data, profile_data = cached
+    user = _restore(User, user_data)
+    for name, model, data in (("company", Company, company_data), ("candidate_profile", CandidateProfile, profile_data)):
+        related = _restore(model, data) if data is not None else None
+        set_committed_value(user, name, related)
+        if related is not None:
+            set_committed_value(related, "user", user)
+    return user
 
 
 def get_user_role(user: User):
@@ -53,23 +113,111 @@ def create_user(name, username, password, email, role="candidate"):
     return user
 
 
+# Quan hệ mà các trang danh sách job đều hiển thị, nạp cùng câu query để tránh N+1
+JOB_LIST_OPTIONS = (joinedload(Job.company), joinedload(Job.category))
+
+# Số id mỗi lần lọc bằng IN (...) khi đi theo danh sách xếp hạng của search index
+RANKED_CHUNK = 1000
+
+
 def get_all_jobs():
     return Job.query.order_by(Job.created_at.desc()).all()
 
 
+@read_only
+def get_latest_jobs(limit=5):
+    return Job.query.options(*JOB_LIST_OPTIONS).order_by(Job.created_at.desc(), Job.id.desc()).limit(limit).all()
+
+
 def get_job_by_id(job_id: int):
-    return Job.query.get(job_id)
+    return db.session.get(Job, job_id, options=[joinedload(Job.company).joinedload(Company.user),
+                                                joinedload(Job.category)])
+
+
+@read_only
+def get_similar_jobs(job, limit=5):
+    ranked_ids = similar.similar_job_ids(job.id, limit)
+    if ranked_ids is None:
+        # Index đang dựng hoặc tin đã đóng: cùng địa điểm và danh mục
+        return Job.query.options(joinedload(Job.company)).filter(
+            Job.location == job.location,
+            Job.category_id == job.category_id,
+            Job.id != job.id
+        ).limit(limit).all()
+    if not ranked_ids:
+        return []
+    jobs = Job.query.options(joinedload(Job.company)).filter(Job.id.in_(ranked_ids)).all()
+    return sort_by_rank(jobs, ranked_ids)
 
 
+@read_only
+def get_recommended_jobs(profile_id, limit=5):
+    """Tin đang mở được gợi ý cho ứng viên theo danh sách tính sẵn; rỗng nếu chưa có danh sách."""
+    ranked_ids = recommend.recommended_job_ids(profile_id)
+    if not ranked_ids:
+        return []
+    jobs = Job.query.options(*JOB_LIST_OPTIONS).filter(Job.id.in_(ranked_ids),
+                                                       Job.status == JobStatus.OPEN.value).all()
+    return sort_by_rank(jobs, ranked_ids)[:limit]
+
+
+@read_only
 def search_jobs(keyword=None, company_id=None):
     query = Job.query
-    if keyword:
-        query = query.filter(Job.title.ilike(f"%{keyword.strip()}%"))
     if company_id:
         query = query.filter(Job.company_id == company_id)
+    if keyword and keyword.strip():
+        ranked_ids = [job_id for job_id, in filter_ranked(query, search.search_job_ids(keyword))]
+        jobs = []
+        for start in range(0, len(ranked_ids), RANKED_CHUNK):
+            jobs += Job.query.filter(Job.id.in_(ranked_ids[start:start + RANKED_CHUNK])).all()
+        return sort_by_rank(jobs, ranked_ids)
     return query.order_by(Job.created_at.desc()).all()
 
 
+def sort_by_rank(jobs, ranked_ids):
+    rank = {job_id: i for i, job_id in enumerate(ranked_ids)}
+    return sorted(jobs, key=lambda job: rank[job.id])
+
+
+def filter_ranked(query, ranked_ids, *columns):
+    """
+    Các dòng (Job.id, *columns) của query có id trong ranked_ids, giữ thứ tự xếp hạng. Lọc theo từng khối
+    RANKED_CHUNK id để không sinh IN (...) khổng lồ; là generator nên có thể dừng khi đã đủ một trang.
+    """
+    for start in range(0, len(ranked_ids), RANKED_CHUNK):
+        chunk = ranked_ids[start:start + RANKED_CHUNK]
+        rows = {row[0]: row for row in query.filter(Job.id.in_(chunk)).with_entities(Job.id, *columns)}
+        yield from (rows[job_id] for job_id in chunk if job_id in rows)
+
+
+def paginate_ranked(query, ranked_ids, cursor=None, page_size=10, count_key=None, order_by=None):
+    """
+    Phân trang kết quả tìm kiếm sau khi lọc bằng SQL. Theo thứ tự BM25 chỉ đi qua danh sách xếp hạng tới hết
+    trang hiện tại, phần còn lại chỉ đi khi cần đếm tổng (cache theo count_key). order_by (các cột) sắp xếp
+    giảm dần toàn bộ kết quả đã lọc thay cho thứ tự BM25.
+    """
+    if order_by:
+        rows = sorted(filter_ranked(query, ranked_ids, *order_by), key=lambda row: tuple(row[1:]), reverse=True)
+        ordered = [row[0] for row in rows]
+        total = len(ordered)
+    else:
+        matches = (row[0] for row in filter_ranked(query, ranked_ids))
+        # Lấy dư một id để biết còn trang sau
+        ordered = list(itertools.islice(matches, cursor_position(cursor) + page_size + 1))
+        total = None
+        if app.config["PAGINATION_EXACT_TOTALS"]:
+            total = count_cache.get(count_key) if count_key is not None else None
+            if total is None:
+                total = len(ordered) + sum(1 for _ in matches)
+                if count_key is not None:
+                    count_cache.set(count_key, total, tags=["job-list"])
+
+    page_ids, next_cursor, prev_cursor = paginate_positions(ordered, cursor=cursor, page_size=page_size)
+    jobs = Job.query.options(*JOB_LIST_OPTIONS).filter(Job.id.in_(page_ids)).all() if page_ids else []
+    return Page(sort_by_rank(jobs, page_ids), next_cursor, prev_cursor, total=total)
+
+
 def get_companies():
     return Company.query.all()
 
@@ -80,29 +228,97 @@ def get_company_by_id(company_id: int):
     return Company.query.get(company_id)
 
 
-def apply_job(user_id: int, job_id: int):
-    user = User.query.get(user_id)
-    if not user or not user.candidate_profile:
-        raise ValueError("Chỉ ứng viên mới có thể ứng tuyển!")
+def _is_duplicate_application(error):
+    """IntegrityError do unique (candidate_profile_id, job_id), không phải khóa ngoại hay ràng buộc khác."""
+    message = str(error.orig)
+    # MySQL: "Duplicate entry ... for key 'uq_application_candidate_job'"
+    # SQLite: "UNIQUE constraint failed: application.candidate_profile_id, application.job_id"
+    return "uq_application_candidate_job" in message or \
+        "application.candidate_profile_id, application.job_id" in message
 
-    candidate_profile_id = user.candidate_profile.id
 
-    existing = Application.query.filter_by(
-        candidate_profile_id=candidate_profile_id,
-        job_id=job_id
-    ).first()
-    if existing:
+def apply_job(user_id: int, job_id: int):
+    """
+    Ứng tuyển bằng một câu INSERT ... SELECT lấy hồ sơ của user và chỉ chèn khi tin còn mở; unique
+    (candidate_profile_id, job_id) chặn đơn trùng kể cả khi nhiều request chạy đồng thời. Thông tin cho
+    thông báo chỉ đọc sau khi chèn thành công. Trả về id đơn mới.
+    """
+    status = ApplicationStatus.PENDING.value
+    applied_at = datetime.utcnow()
+    open_job = select(CandidateProfile.id, Job.id, literal(status), literal(applied_at, db.DateTime),
+                      literal(applied_at, db.DateTime)) \
+        .select_from(CandidateProfile).join(Job, Job.id == job_id) \
+        .where(CandidateProfile.user_id == user_id, Job.status == JobStatus.OPEN.value)
+    try:
+        result = db.session.execute(insert(Application).from_select(
+            ["candidate_profile_id", "job_id", "status", "applied_at", "updated_at"], open_job))
+    except IntegrityError as e:
+        db.session.rollback()
+        if not _is_duplicate_application(e):
+            raise
         raise ValueError("Bạn đã ứng tuyển công việc này rồi!")
-
-    application = Application(
-        candidate_profile_id=candidate_profile_id,
-        job_id=job_id,
-        status=ApplicationStatus.PENDING.value,
-        applied_at=datetime.utcnow()
+    if result.rowcount == 0:
+        db.session.rollback()
+        # Không chèn được: tìm lý do (đường hiếm, không nằm trên đường tranh chấp)
+        if not db.session.query(CandidateProfile.id).filter_by(user_id=user_id).first():
+            raise ValueError("Chỉ ứng viên mới có thể ứng tuyển!")
+        if not db.session.query(Job.id).filter_by(id=job_id).first():
+            raise ValueError("Tin tuyển dụng không tồn tại!")
+        raise ValueError("Tin tuyển dụng đã đóng hoặc tạm dừng nhận hồ sơ!")
+
+    application_id = result.lastrowid
+    info = db.session.query(Application.candidate_profile_id.label("profile_id"), CandidateProfile.full_name,
+                            Job.company_id, Job.title, User.email) \
+        .join(CandidateProfile, Application.candidate_profile_id == CandidateProfile.id) \
+        .join(Job, Application.job_id == Job.id) \
+        .join(Company, Job.company_id == Company.id) \
+        .outerjoin(User, Company.user_id == User.id) \
+        .filter(Application.id == application_id).one()
+    stats.bump_application_stat(info.company_id, info.profile_id, applied_at, status)
+    outbox.notify(outbox.application_notice(info.email, info.title, info.full_name))
+    tag_session(f"applications:{job_id}")
+    db.session.commit()
+    return application_id
+
+
+def update_application_statuses(company_id: int, job_id: int, status: str, application_ids=None,
+                                current_status: str = None):
+    """
+    Đổi trạng thái nhiều hồ sơ của một tin tuyển dụng trong một transaction: một câu SELECT vừa kiểm tra
+    quyền sở hữu vừa lấy trạng thái cũ, một câu UPDATE cho cả lô, rollup và thông báo ghi một lần.
+    application_ids=None nghĩa là mọi hồ sơ của tin (lọc theo current_status nếu có).
+    Trả về số hồ sơ đã đổi.
+    """
+    query = db.session.query(Application.id, Application.candidate_profile_id, Application.applied_at,
+                             Application.status, Job.title, User.email) \
+        .join(Job, Application.job_id == Job.id) \
+        .join(CandidateProfile, Application.candidate_profile_id == CandidateProfile.id) \
+        .outerjoin(User, CandidateProfile.user_id == User.id) \
+        .filter(Job.id == job_id, Job.company_id == company_id)
+    if application_ids is not None:
+        application_ids = set(application_ids)
+        query = query.filter(Application.id.in_(application_ids))
+    elif current_status:
+        query = query.filter(Application.status == current_status)
+    rows = query.with_for_update(of=Application).all()
+
+    if application_ids is not None and len(rows) != len(application_ids):
+        raise ValueError("Có hồ sơ không thuộc tin tuyển dụng của bạn!")
+
+    changed = [row for row in rows if row.status != status]
+    if not changed:
+        return 0
+
+    db.session.execute(
+        update(Application).where(Application.id.in_([row.id for row in changed]))
+        .values(status=status, updated_at=datetime.now()),
+        execution_options={"synchronize_session": False}
     )
-    db.session.add(application)
+    stats.record_status_changes(company_id, changed, status)
+    outbox.notify_many([outbox.status_notice(row.email, row.title, status) for row in changed])
+    tag_session(f"applications:{job_id}")
     db.session.commit()
-    return application
+    return len(changed)
 
 
 def get_applications_by_user(user_id: int):
@@ -119,7 +335,8 @@ def get_applications_by_company(company_id: int):
         Application.applied_at.desc()).all()
 
 
-def get_jobs_by_company(company_id, page=1, page_size=10, kw=None, sort_by_date_incr=False, status=None):
+@read_only
+def get_jobs_by_company(company_id, cursor=None, page_size=10, kw=None, sort_by_date_incr=False, status=None):
     query: Query = Job.query.filter(Job.company_id == company_id)
 
     if status is not None:
@@ -128,39 +345,90 @@ def get_jobs_by_company(company_id, page=1, page_size=10, kw=None, sort_by_date_
     if kw:
         query = query.filter(Job.title.ilike(f"%{kw}%"))
 
-    if sort_by_date_incr:
-        query = query.order_by(Job.created_at.asc())
-    else:
-        query = query.order_by(Job.created_at.desc())
+    total = cached_count(("company-jobs", company_id, kw, status), query, tags=[f"company-jobs:{company_id}"])
+    query = query.options(joinedload(Job.category))
+    return keyset_paginate(query, [Job.created_at, Job.id], cursor=cursor, page_size=page_size,
+                           descending=not sort_by_date_incr, total=total)
+
 
-    total = query.count()
+@read_only
+def get_jobs(kw="", company_id=None, status="", salary_range="", location="", posted="", category_id=None,
+             sort="", cursor=None, page_size=10):
+    """Trang danh sách tin theo bộ lọc của /jobs/ (salary_range "min-max" triệu VNĐ, posted số ngày)."""
+    query = Job.query
 
-    jobs = query.offset((page - 1) * page_size).limit(page_size).all()
+    # Lọc theo công ty
+    if company_id:
+        query = query.filter(Job.company_id == company_id)
 
-    return jobs, total
+    # Lọc theo trạng thái
+    if status:
+        query = query.filter(Job.status == status)
 
-def get_applications(job_id: int, status: str = None, page: int = 1, page_size: int = 10):
+    # Lọc theo khoảng lương (triệu VNĐ, cột lưu nghìn VNĐ): lấy các job có khoảng lương giao với khoảng lọc
+    if salary_range:
+        try:
+            min_salary, max_salary = (int(v) * THOUSANDS_PER_MILLION for v in salary_range.split("-"))
+            query = query.filter(Job.salary_overlaps(min_salary, max_salary))
+        except ValueError:
+            pass
+
+    # Lọc theo địa điểm
+    if location:
+        query = query.filter(Job.location.ilike(f"%{location}%"))
+
+    # Lọc theo ngày đăng
+    if posted:
+        days = int(posted)
+        cutoff = datetime.now() - timedelta(days=days)
+        query = query.filter(Job.created_at >= cutoff)
+
+    if category_id:
+        query = query.filter(Job.category_id == category_id)
+
+    # Phân trang
+    filters = (kw.strip(), company_id, status, salary_range, location, posted, category_id, sort)
+    if sort == "salary":
+        # Chỉ bỏ tin "Thỏa thuận"; tin chỉ có cận trên ("Dưới/Tối đa X triệu") có salary_min = 0 nên nằm cuối
+        query = query.filter(Job.salary_min.isnot(None))
+        columns = [Job.salary_min, Job.id]
+    else:
+        columns = [Job.created_at, Job.id]
+    if kw.strip():
+        # Lọc theo từ khóa: xếp hạng bằng search index thay cho ILIKE, bộ lọc SQL chạy trên toàn bộ kết quả
+        ranked_ids = search.search_job_ids(kw)
+        return paginate_ranked(query, ranked_ids, cursor=cursor, page_size=page_size,
+                               count_key=("jobs",) + filters, order_by=columns if sort == "salary" else None)
+    total = cached_count(("jobs",) + filters, query, tags=["job-list"])
+    query = query.options(*JOB_LIST_OPTIONS)
+    return keyset_paginate(query, columns, cursor=cursor, page_size=page_size, total=total)
+
+
+@read_only
+def get_applications(job_id: int, status: str = None, cursor=None, page_size: int = 10):
     query = Application.query.filter_by(job_id=job_id)
 
     if status:
         query = query.filter(Application.status == status)
 
-    total_records = query.count()
+    total = cached_count(("applications", job_id, status), query, tags=[f"applications:{job_id}"])
+    query = query.options(joinedload(Application.candidate_profile))
+    return keyset_paginate(query, [Application.applied_at, Application.id], cursor=cursor,
+                           page_size=page_size, total=total)
 
-    total_pages = (total_records + page_size - 1) // page_size if total_records > 0 else 1
 
-    applications = (
-        query.order_by(Application.applied_at.desc())
-             .offset((page - 1) * page_size)
-             .limit(page_size)
-             .all()
-    )
+@read_only
+def get_applications_by_score(job, status: str = None, cursor=None, page_size: int = 10):
+    """Hồ sơ của tin xếp theo điểm phù hợp giảm dần; trả về (Page, {id hồ sơ ứng tuyển: điểm} của trang)."""
+    ranked_ids, scores = matching.ranked_applications(job, status)
+    page_ids, next_cursor, prev_cursor = paginate_positions(ranked_ids, cursor=cursor, page_size=page_size)
+    applications = Application.query.options(joinedload(Application.candidate_profile)) \
+        .filter(Application.id.in_(page_ids)).all() if page_ids else []
+    page = Page(sort_by_rank(applications, page_ids), next_cursor, prev_cursor, total=len(ranked_ids))
+    return page, {application_id: scores[application_id] for application_id in page_ids}
 
-    return {
-        "total_pages": total_pages,
-        "applications": applications
-    }
 
+@read_only
 def get_job_statistics():
     return db.session.query(
         Job.title,
@@ -169,18 +437,6 @@ def get_job_statistics():
         .group_by(Job.id).all()
 
 
-def upload_file_to_cloudinary(file, folder="applygo/other_files"):
-    if not file:
-        raise ValueError("No file to upload")
-    res = cloudinary.uploader.upload(
-        file,
-        folder=folder,
-        resource_type="auto",
-        use_filename=True,
-        unique_filename=False,
-    )
-    return res.get("secure_url")
-
 def get_my_applications(candidate_id):
     apps = (
         db.session.query(Application.id, Job.title, Company.name, Application.status, Application.applied_at)
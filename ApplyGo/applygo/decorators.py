@@ -1,7 +1,11 @@
 from functools import wraps
-from flask import request, redirect, url_for, abort
+from flask import request, redirect, url_for, abort, session, g, make_response
 from flask_login import current_user, login_required
 
+from applygo import app
+from applygo.cache import page_cache, start_sync
+from applygo.instrumentation import query_budgets
+
 
 def loggedin(f):
     @wraps(f)
@@ -26,3 +30,46 @@ def role_required(*roles):
         return decorated_function
 
     return decorator
+
+
+def query_budget(max_queries):
+    """Số câu SQL tối đa cho một request vào route; vượt quá sẽ bị log (và raise khi TESTING)."""
+    def decorator(f):
+        query_budgets[f.__name__] = max_queries
+        return f
+
+    return decorator
+
+
+def cached_page(*tags):
+    """
+    Cache toàn trang cho khách chưa đăng nhập, key theo path và query string đã chuẩn hóa.
+    View có thể gắn thêm tag bằng cache.tag_page() để được xóa cache đúng lúc.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method != "GET" or current_user.is_authenticated or session.get("_flashes"):
+                return f(*args, **kwargs)
+
+            start_sync()
+            params = sorted((k, v.strip()) for k, v in request.args.items(multi=True) if v.strip())
+            key = (request.path, tuple(params))
+            cached = page_cache.get(key)
+            if cached is not None:
+                body, status, content_type = cached
+                response = app.response_class(body, status=status, content_type=content_type)
+                response.headers["X-Page-Cache"] = "HIT"
+                return response
+
+            g.page_cache_tags = set(tags)
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                page_cache.set(key, (response.get_data(), response.status_code, response.content_type),
+                               tags=g.page_cache_tags)
+                response.headers["X-Page-Cache"] = "MISS"
+            return response
+
+        return decorated_function
+
+    return decorator
@@ -0,0 +1,78 @@
+import io
+import os
+
+from flask import url_for
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from applygo import app
+
+
+def variant_widths():
+    return app.config["IMAGE_VARIANT_WIDTHS"]
+
+
+def render_variants(path):
+    """
+    Tạo các bản thu nhỏ của ảnh theo chiều rộng, giữ tỉ lệ (mọi bản đều nằm chung srcset nên không được cắt).
+    Trả về {width: bytes}, {} nếu không phải ảnh.
+    """
+    try:
+        with Image.open(path) as img:
+            img = ImageOps.exif_transpose(img)
+            img.load()
+    except (UnidentifiedImageError, OSError):
+        return {}
+
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+
+    variants = {}
+    for width in sorted(variant_widths()):
+        if img.width <= width:
+            continue  # ảnh gốc đã nhỏ hơn, dùng luôn ảnh gốc
+        resized = img.copy()
+        resized.thumbnail((width, width * 10), Image.LANCZOS)
+        out = io.BytesIO()
+        resized.save(out, format=app.config["IMAGE_VARIANT_FORMAT"], quality=app.config["IMAGE_VARIANT_QUALITY"])
+        variants[width] = out.getvalue()
+    return variants
+
+
+def original_url(url, folder="Image"):
+    if url.startswith(("http", "/", "file:")):
+        return url
+    return url_for("static", filename=f"{folder}/{url}")
+
+
+def local_path(url, folder="Image"):
+    """Đường dẫn file trên đĩa của ảnh lưu cục bộ (ảnh seed trong static/Image...), None nếu là URL ngoài."""
+    if url.startswith("http"):
+        return None
+    if url.startswith("file://"):
+        return url[len("file://"):]
+    if url.startswith("/static/"):
+        return os.path.join(app.static_folder, url[len("/static/"):])
+    return os.path.join(app.static_folder, folder, url)
+
+
+def image_src(url, variants=None, width=None, folder="Image", default=None):
+    """URL ảnh nhỏ nhất có chiều rộng >= width; không có bản phù hợp thì dùng ảnh gốc."""
+    if not url:
+        return url_for("static", filename=default) if default else ""
+    if variants and width:
+        fitting = sorted(int(w) for w in variants if int(w) >= width)
+        if fitting:
+            return variants[str(fitting[0])]
+    return original_url(url, folder)
+
+
+def image_srcset(variants):
+    """Giá trị srcset để trình duyệt tự chọn bản vừa với kích thước hiển thị."""
+    if not variants:
+        return ""
+    return ", ".join(f"{variants[w]} {w}w" for w in sorted(variants, key=int))
+
+
+@app.context_processor
+def inject_image_helpers():
+    return dict(image_src=image_src, image_srcset=image_srcset)
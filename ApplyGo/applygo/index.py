@@ -3,20 +3,18 @@ from os import abort
 from bs4 import BeautifulSoup
 from flask import render_template, request, redirect, url_for, flash, send_from_directory, jsonify
 from flask_login import login_user, logout_user, current_user, login_required
-from sqlalchemy import extract
 from unicodedata import category
 from werkzeug.security import generate_password_hash
 
-from applygo import app, db, dao, login
-from applygo.dao import get_jobs_by_company, upload_file_to_cloudinary, get_applications, get_my_applications, \
-    get_all_cate
-from applygo.decorators import loggedin, role_required
+from applygo import app, db, dao, login, indexing, recommend, stats, cache, uploads, cv, outbox, activity
+from applygo.dao import get_jobs_by_company, get_applications, get_my_applications, get_all_cate
+from applygo.decorators import loggedin, role_required, cached_page, query_budget
 from applygo.forms import EmployerRegisterForm
+from applygo.passwords import PasswordHasherBusy
 from applygo.models import User, Job, Application, CandidateProfile, CvTemplate, UserRole, JobStatus, Company, Category, \
-    ApplicationStatus, CompanyStatus
+    ApplicationStatus, CompanyStatus, UploadJob
 
 import os
-import math
 
 
 @app.context_processor
@@ -25,11 +23,20 @@ def inject_user_roles():
 
 
 @app.route('/')
+@cached_page("job-list", "company-list", "category-list")
+@query_budget(6)
 def index():
-    jobs = dao.get_all_jobs()[:5]
+    jobs = []
+    # Trang của khách được cache; ứng viên đăng nhập thấy việc làm gợi ý đã tính sẵn
+    if current_user.is_authenticated and current_user.is_candidate() and current_user.candidate_profile:
+        jobs = dao.get_recommended_jobs(current_user.candidate_profile.id, 5)
+    recommended = bool(jobs)
+    if not recommended:
+        jobs = dao.get_latest_jobs(5)
     companies = dao.get_companies()
     categories = dao.get_categories()
-    return render_template('page/index.html', jobs=jobs, companies=companies, categories=categories)
+    return render_template('page/index.html', jobs=jobs, recommended=recommended, companies=companies,
+                           categories=categories)
 
 
 @app.route("/login-admin/", methods=["GET", "POST"])
@@ -38,9 +45,13 @@ def login_admin():
     if request.method == "POST":
         username = request.form.get("username")
         password = request.form.get("password")
-        user = dao.auth_user(username=username, password=password)
+        try:
+            user = dao.auth_user(username=username, password=password)
+        except PasswordHasherBusy:
+            return render_template("auth/login_admin.html", err_msg="Hệ thống đang bận, vui lòng thử lại sau.")
         if user and user.is_admin():
             login_user(user)
+            activity.log(user.id, "Đăng nhập trang quản trị")
             return redirect('/admin/')
         else:
             err_msg = "Sai tên đăng nhập hoặc không có quyền truy cập Admin."
@@ -55,15 +66,20 @@ def login_my_user():
         username = request.form.get('username')
         password = request.form.get('password')
 
-        user = dao.auth_user(username=username, password=password)
+        try:
+            user = dao.auth_user(username=username, password=password)
+        except PasswordHasherBusy:
+            return render_template('auth/login.html', err_msg='Hệ thống đang bận, vui lòng thử lại sau.')
         if not user:
             err_msg = 'Tên đăng nhập hoặc mật khẩu không đúng!'
             return render_template('auth/login.html', err_msg=err_msg)
 
         if user.is_candidate() or user.is_company():
             login_user(user)
+            activity.log(user.id, "Đăng nhập")
         elif user.is_admin():
             login_user(user)
+            activity.log(user.id, "Đăng nhập")
             return redirect('/admin/')
         else:
             err_msg = 'Người dùng không có vai trò hợp lệ!'
@@ -98,6 +114,9 @@ def register():
         try:
             dao.create_user(name=name, username=username, password=password, email=email, role="candidate")
             return redirect('/login/')
+        except PasswordHasherBusy:
+            db.session.rollback()
+            err_msg = "Hệ thống đang bận, vui lòng thử lại sau."
         except Exception as ex:
             db.session.rollback()
             err_msg = f"Lỗi đăng ký: {str(ex)}"
@@ -142,13 +161,14 @@ def upgrade_employer():
 @app.route('/logout/')
 @login_required
 def logout_user_route():
+    activity.log(current_user.id, "Đăng xuất")
     logout_user()
     return redirect('/')
 
 
 @login.user_loader
 def load_user(user_id):
-    return dao.get_user_by_id(int(user_id))
+    return dao.load_identity(int(user_id))
 
 
 @app.route('/edit-recruitment-post/<int:id>/', methods=['POST'])
@@ -231,6 +251,8 @@ def edit_recruitment_post(id):
     job.requirements = requirement
     job.category_id = cate_id
     db.session.commit()
+    indexing.reindex_job(job)
+    activity.log(current_user.id, f"Cập nhật tin tuyển dụng #{id}")
 
     flash("Cập nhật tin tuyển dụng thành công!", "success")
     return redirect(url_for('recruitment_post_detail', id=id))
@@ -239,29 +261,31 @@ def edit_recruitment_post(id):
 @app.route('/recruitment-post-detail/<int:id>/', methods=['GET'])
 @login_required
 @role_required(UserRole.COMPANY.value)
+@query_budget(8)
 def recruitment_post_detail(id):
     job = Job.query.get_or_404(id)
     cates = get_all_cate()
 
     status = request.args.get("status")
-    try:
-        page = int(request.args.get("page", 1))
-        page_size = int(request.args.get("page_size", 10))
-    except ValueError:
-        page, page_size = 1, 10
-
-
-    result = get_applications(job_id=id, status=status, page=page, page_size=page_size)
-    applications = result["applications"]
-    total_pages = result["total_pages"]
+    if status in ApplicationStatus.__members__:
+        status = ApplicationStatus[status].value
+    cursor = request.args.get("cursor")
+    page_size = request.args.get("page_size", 10, type=int)
+    sort = request.args.get("sort", "")
+
+    if sort == "score":
+        result, scores = dao.get_applications_by_score(job, status=status, cursor=cursor, page_size=page_size)
+    else:
+        result, scores = get_applications(job_id=id, status=status, cursor=cursor, page_size=page_size), {}
 
     return render_template(
         'company/edit_recruitment_post.html',
         job=job,
-        applications=applications,
-        total_pages=total_pages,
-        current_page=page,
+        applications=result.items,
+        pagination=result,
         current_status=status,
+        sort=sort,
+        scores=scores,
         categorys = cates
     )
 
@@ -276,24 +300,24 @@ def delete_recruitment_post(id):
         flash("Bạn không có quyền xóa tin tuyển dụng này", "danger")
         return redirect(url_for('recruitment_post_manager'))
 
+    stats.forget_applications(job.applications)
     db.session.delete(job)
     db.session.commit()
+    indexing.unindex_job(id)
+    activity.log(current_user.id, f"Xóa tin tuyển dụng #{id}")
     flash("Xóa tin tuyển dụng thành công!", "success")
     return redirect(url_for('recruitment_post_manager'))
 
 
 @app.route('/recruitment-post-manager/')
 @role_required(UserRole.COMPANY.value)
+@query_budget(6)
 def recruitment_post_manager():
     sort = request.args.get('sort')
     kw = request.args.get('kw')
-    page = int(request.args.get('page', 1))
+    cursor = request.args.get('cursor')
     status = request.args.get('status')
-    page_size = 12
     company = current_user.company
-    total_jobs = Job.query.filter(Job.company_id == company.id).count()
-    if page >= math.ceil(total_jobs / page_size):
-        page = 1
     sort_by = False
     if sort == 'desc':
         sort_by = False
@@ -307,10 +331,10 @@ def recruitment_post_manager():
     if status == "PAUSED":
         Jstatus = JobStatus.PAUSED.value
 
-    jobs, total = get_jobs_by_company(company_id=company.id, sort_by_date_incr=sort_by, page_size=12, page=page, kw=kw,
-                                      status=Jstatus)
-    # print(jobs[6].category.name)
-    return render_template('company/recruitment_post_manager.html', company_jobs=jobs, page=page)
+    result = get_jobs_by_company(company_id=company.id, sort_by_date_incr=sort_by, page_size=12, cursor=cursor, kw=kw,
+                                 status=Jstatus)
+    return render_template('company/recruitment_post_manager.html', company_jobs=result.items, pagination=result,
+                           kw=kw, sort=sort, status=status)
 
 
 @app.route('/recruitment-post/create/', methods=['POST', 'GET'])
@@ -388,9 +412,12 @@ def create_recruitment_post():
             db.session.add(job)
             db.session.commit()
         except:
+            db.session.rollback()
             flash("Lỗi khi tạo đơn đăng tuyển", "warning")
             return render_template('company/create_recruitment_post.html',title=title,salary=salary,description=description,location=location,requirement=requirement)
 
+        indexing.reindex_job(job)
+        activity.log(current_user.id, f"Tạo tin tuyển dụng #{job.id}")
         flash("Tạo tin tuyển dụng thành công!", "success")
         return redirect(url_for('recruitment_post_manager'))
 
@@ -408,8 +435,9 @@ def application_detail(id):
 
     template_name = profile.cv_template or 'simple'
     template_path = f'company/cv_templates/{template_name}.html'
+    cv_html = cv.render_cv(profile, 'company', template_name)
 
-    return render_template(template_path, profile=profile, application=application)
+    return render_template(template_path, profile=profile, application=application, cv_html=cv_html)
 
 
 @app.route('/application/<int:id>/update-status', methods=['POST'])
@@ -423,26 +451,67 @@ def update_application_status(id):
         flash("Trạng thái không hợp lệ!", "danger")
         return redirect(request.referrer or url_for('index'))
 
+    old_status = application.status
     application.status = new_status
     application.updated_at = datetime.now()
+    stats.record_status_change(application, application.job.company_id, old_status)
+    if old_status != new_status:
+        outbox.notify(outbox.status_notice(application.candidate_profile.user.email, application.job.title,
+                                           new_status))
     db.session.commit()
+    activity.log(current_user.id, f"Cập nhật hồ sơ #{id} thành {new_status}")
 
     flash(f"Đã cập nhật trạng thái thành {new_status}", "success")
     return redirect(request.referrer or url_for('recruitment_post_detail', id=application.job_id))
 
 
+@app.route('/recruitment-post-detail/<int:id>/applications/status/', methods=['POST'])
+@login_required
+@role_required(UserRole.COMPANY.value)
+def bulk_update_application_status(id):
+    back = request.referrer or url_for('recruitment_post_detail', id=id)
+
+    new_status = request.form.get('status')
+    if new_status not in ['Accepted', 'Rejected']:
+        flash("Trạng thái không hợp lệ!", "danger")
+        return redirect(back)
+
+    if request.form.get('all_matching'):
+        # Mọi hồ sơ khớp bộ lọc đang xem, không chỉ trang hiện tại
+        application_ids = None
+    else:
+        application_ids = request.form.getlist('application_ids', type=int)
+        if not application_ids:
+            flash("Vui lòng chọn ít nhất một hồ sơ.", "warning")
+            return redirect(back)
+
+    try:
+        changed = dao.update_application_statuses(company_id=current_user.company.id, job_id=id,
+                                                  status=new_status, application_ids=application_ids,
+                                                  current_status=request.form.get('current_status') or None)
+    except ValueError as ex:
+        db.session.rollback()
+        flash(str(ex), "danger")
+        return redirect(back)
+
+    activity.log(current_user.id, f"Cập nhật {changed} hồ sơ của tin tuyển dụng #{id} thành {new_status}")
+    flash(f"Đã cập nhật {changed} hồ sơ thành {new_status}", "success")
+    return redirect(back)
+
+
 
 @app.route('/jobs/<int:job_id>/')
+@cached_page()
+@query_budget(6)
 def job_detail(job_id):
     job = dao.get_job_by_id(job_id)
     if not job:
         flash("Tin tuyển dụng không tồn tại!", "warning")
         return redirect(url_for('jobs'))
-    similar_jobs = Job.query.filter(
-        Job.location == job.location,
-        Job.category==job.category,
-        Job.id != job.id
-    ).limit(5).all()
+    # Trang chi tiết phụ thuộc vào job, công ty và các job cùng danh mục (job tương tự)
+    cache.tag_page(*cache.job_tags(job.id, job.company_id, job.category_id))
+    similar_jobs = dao.get_similar_jobs(job)
+    cache.tag_page(*(f"job:{j.id}" for j in similar_jobs))
 
     return render_template('candidate/job_detail.html', job=job, similar_jobs=similar_jobs)
 
@@ -453,6 +522,8 @@ def job_detail(job_id):
 def apply_job(job_id):
     try:
         dao.apply_job(user_id=current_user.id, job_id=job_id)
+        recommend.refresh_profile(current_user.candidate_profile.id)
+        activity.log(current_user.id, f"Ứng tuyển tin tuyển dụng #{job_id}")
         flash("Ứng tuyển thành công!", "success")
     except Exception as e:
         flash(f"Lỗi ứng tuyển: {str(e)}", "danger")
@@ -501,6 +572,8 @@ def create_cv():
 
         try:
             db.session.commit()
+            recommend.refresh_profile(profile.id)
+            activity.log(current_user.id, "Cập nhật CV")
             flash("CV của bạn đã được lưu!", "success")
             return redirect(url_for("view_cv"))
         except Exception as e:
@@ -524,7 +597,8 @@ def view_cv():
         return redirect(url_for("create_cv"))
 
     template_file = f"candidate/cv_templates/{profile.cv_template}.html"
-    return render_template(template_file, profile=profile)
+    cv_html = cv.render_cv(profile, "candidate", profile.cv_template)
+    return render_template(template_file, profile=profile, cv_html=cv_html)
 
 
 @app.route('/candidate/cv/select_template/', methods=['GET', 'POST'])
@@ -545,6 +619,7 @@ def select_cv_template():
         if selected_template:
             profile.cv_template = selected_template.html_file
             db.session.commit()
+            activity.log(current_user.id, f"Chọn mẫu CV {selected_template.html_file}")
             flash(f"Mẫu CV '{selected_template.name}' đã được chọn. Bây giờ bạn có thể chỉnh sửa thông tin CV.",
                   "success")
             return redirect(url_for('view_cv'))
@@ -558,19 +633,12 @@ def select_cv_template():
 @app.route("/candidate/cv/preview/<template_name>/")
 @login_required
 def preview_cv(template_name):
-    fake_profile = CandidateProfile(
-        full_name="Nguyễn Văn A",
-        phone="0123456789",
-        skills="Kỹ năng 1, Kỹ năng 2, Kỹ năng 3",
-        experience="Kinh nghiệm làm việc",
-        education="Thông tin học vấn"
-    )
-
-    template = CvTemplate.query.filter_by(html_file=template_name).first()
-    if not template:
+    cv_html = cv.render_preview(template_name)
+    if cv_html is None:
         return "Mẫu CV không tồn tại", 404
 
-    return render_template(f"candidate/cv_templates/{template.html_file}.html", profile=fake_profile)
+    return render_template(f"candidate/cv_templates/{template_name}.html", profile=cv.preview_profile(),
+                           cv_html=cv_html)
 
 
 @app.route("/candidate/cv/manage/")
@@ -581,7 +649,8 @@ def manage_cv():
         return redirect(url_for("index"))
 
     profile = CandidateProfile.query.filter_by(user_id=current_user.id).first()
-    return render_template("candidate/manage_cv.html", profile=profile)
+    upload = uploads.latest_upload(profile, "uploaded_cv_path") if profile else None
+    return render_template("candidate/manage_cv.html", profile=profile, upload=upload)
 
 
 # Allowed extensions: include images for logos
@@ -618,22 +687,12 @@ def upload_cv():
 
         if file and allowed_file(file.filename):
             try:
-                # upload to Cloudinary (resource_type='auto' supports pdf/docx)
-                cv_url = upload_file_to_cloudinary(file, folder='applygo/cvs')
-
-                # If previously had a local file path, try to remove it
-                if profile.uploaded_cv_path and profile.uploaded_cv_path.startswith('/static/uploads'):
-                    try:
-                        old_path = os.path.join(app.static_folder, profile.uploaded_cv_path.replace('/static/', ''))
-                        if os.path.exists(old_path):
-                            os.remove(old_path)
-                    except Exception:
-                        pass
-
-                profile.uploaded_cv_path = cv_url
+                # Lưu tạm rồi tải lên Cloudinary chạy nền; uploaded_cv_path được cập nhật khi xong
+                uploads.stage(file, profile, "uploaded_cv_path", folder='applygo/cvs', user_id=current_user.id)
                 db.session.commit()
+                activity.log(current_user.id, "Tải lên CV")
 
-                flash("CV của bạn đã được tải lên Cloudinary!", "success")
+                flash("CV của bạn đang được tải lên, trang sẽ tự cập nhật khi hoàn tất.", "info")
                 return redirect(url_for("manage_cv"))
 
             except Exception as e:
@@ -647,13 +706,28 @@ def upload_cv():
     return render_template("candidate/upload_cv.html", profile=profile)
 
 
+@app.route("/uploads/<int:upload_id>/status/")
+@login_required
+def upload_status(upload_id):
+    upload = db.session.get(UploadJob, upload_id)
+    if not upload or (upload.user_id != current_user.id and not current_user.is_admin()):
+        return jsonify({"error": "Không tìm thấy"}), 404
+    return jsonify({
+        "id": upload.id,
+        "status": upload.status,
+        "attempts": upload.attempts,
+        "url": upload.url,
+        "error": upload.error,
+    })
+
+
 @app.route("/candidate/cv/download/<filename>/")
 @login_required
 def serve_uploaded_cv(filename):
     profile = CandidateProfile.query.filter_by(user_id=current_user.id).first()
     if profile and profile.uploaded_cv_path == filename:
         # if stored as URL, redirect
-        if profile.uploaded_cv_path.startswith('http'):
+        if profile.uploaded_cv_path.startswith(('http', '/static/')):
             return redirect(profile.uploaded_cv_path)
         return send_from_directory(os.path.join(app.static_folder, 'uploads'), filename, as_attachment=True)
     return "File không tồn tại hoặc bạn không có quyền truy cập.", 404
@@ -666,7 +740,7 @@ def download_cv_latest():
     if not profile or not profile.uploaded_cv_path:
         return "Bạn chưa có CV.", 404
 
-    if profile.uploaded_cv_path.startswith("http"):
+    if profile.uploaded_cv_path.startswith(("http", "/static/")):
         return redirect(profile.uploaded_cv_path)
     return send_from_directory(os.path.join(app.static_folder, 'uploads'), profile.uploaded_cv_path, as_attachment=True)
 
@@ -690,37 +764,11 @@ def candidate_profile():
 
     status_filter = request.args.get('status_filter', 'all')
 
-    total_applications = Application.query.filter_by(candidate_profile_id=profile.id).count()
-
-    statuses = ["Pending", "Accepted", "Rejected"]
-    applications_status_count = {
-        status: Application.query.filter_by(candidate_profile_id=profile.id, status=status).count()
-        for status in statuses
-    }
-
     now = datetime.now()
     start_date = datetime.min if months == 0 else now - timedelta(days=30 * months)
 
-    month_labels_query = db.session.query(
-        extract('year', Application.applied_at).label('year'),
-        extract('month', Application.applied_at).label('month')
-    ).filter(
-        Application.candidate_profile_id == profile.id,
-        Application.applied_at >= start_date
-    ).group_by('year', 'month').order_by('year', 'month').all()
-
-    labels = [f"{int(y)}-{int(m):02d}" for y, m in month_labels_query]
-
-    chart_data = {status: [] for status in statuses}
-    for y, m in month_labels_query:
-        for status in statuses:
-            count = Application.query.filter(
-                Application.candidate_profile_id == profile.id,
-                extract('year', Application.applied_at) == y,
-                extract('month', Application.applied_at) == m,
-                Application.status == status
-            ).count()
-            chart_data[status].append(count)
+    total_applications, applications_status_count, labels, chart_data = \
+        stats.get_candidate_dashboard(profile.id, start_date)
 
     return render_template(
         'profile/candidate_profile.html',
@@ -751,12 +799,12 @@ def company_profile():
         logo_file = request.files.get("logo")
         if logo_file and allowed_file(logo_file.filename):
             try:
-                # upload logo to Cloudinary
-                logo_url = upload_file_to_cloudinary(logo_file, folder='applygo/company_logos')
-                company.logo_url = logo_url
+                uploads.stage(logo_file, company, "logo_url", folder='applygo/company_logos', user_id=current_user.id)
             except Exception as e:
                 flash(f"Lỗi khi lưu logo: {str(e)}", "warning")
         db.session.commit()
+        indexing.reindex_company_jobs(company)
+        activity.log(current_user.id, "Cập nhật thông tin công ty")
         flash("Cập nhật thông tin công ty thành công!", "success")
         return redirect(url_for('company_profile'))
 
@@ -772,39 +820,12 @@ def company_profile():
     else:
         start_date = datetime(2000, 1, 1)
 
-    # Application does not have company_id: join via Job
-    month_labels_query = db.session.query(
-        extract('year', Application.applied_at).label('year'),
-        extract('month', Application.applied_at).label('month')
-    ).join(Job, Application.job_id == Job.id).filter(
-        Job.company_id == company.id,
-        Application.applied_at >= start_date
-    )
-    if status != "all":
-        month_labels_query = month_labels_query.filter(Application.status == status)
-
-    month_labels = month_labels_query.group_by('year', 'month').order_by('year', 'month').all()
-    labels = [f"{int(y)}-{int(m):02d}" for y, m in month_labels]
-
-    statuses = ["Pending", "Accepted", "Rejected"]
-    chart_data = {s: [] for s in statuses}
-
-    for y, m in month_labels:
-        for s in statuses:
-            if status != "all" and s != status:
-                chart_data[s].append(0)
-            else:
-                count = db.session.query(Application).join(Job, Application.job_id == Job.id).filter(
-                    Job.company_id == company.id,
-                    extract('year', Application.applied_at) == y,
-                    extract('month', Application.applied_at) == m,
-                    Application.status == s
-                ).count()
-                chart_data[s].append(count)
+    labels, chart_data = stats.get_company_dashboard(company.id, start_date, status)
 
     return render_template(
         'profile/company_profile.html',
         company=company,
+        upload=uploads.latest_upload(company, "logo_url"),
         labels=labels,
         chart_data=chart_data,
         months=months,
@@ -813,8 +834,10 @@ def company_profile():
 
 
 @app.route("/jobs/")
+@cached_page("job-list", "company-list", "category-list")
+@query_budget(8)
 def jobs():
-    page = request.args.get("page", 1, type=int)
+    cursor = request.args.get("cursor")
     kw = request.args.get("kw", "")
     company_id = request.args.get("company_id", type=int)
     status = request.args.get("status", "")
@@ -822,55 +845,19 @@ def jobs():
     location = request.args.get("location", "")
     posted = request.args.get("posted", "")
     category_id = request.args.get("category_id", type=int)
+    sort = request.args.get("sort", "")
 
-    query = Job.query
-
-    # Lọc theo từ khóa
-    if kw:
-        query = query.filter(Job.title.ilike(f"%{kw}%"))
-
-    # Lọc theo công ty
-    if company_id:
-        query = query.filter(Job.company_id == company_id)
-
-    # Lọc theo trạng thái
-    if status:
-        query = query.filter(Job.status == status)
-
-    # Lọc theo khoảng lương
-    if salary_range:
-        try:
-            min_salary, max_salary = map(int, salary_range.split("-"))
-            query = query.filter(Job.salary >= min_salary, Job.salary <= max_salary)
-        except:
-            pass
-
-    # Lọc theo địa điểm
-    if location:
-        query = query.filter(Job.location.ilike(f"%{location}%"))
-
-    # Lọc theo ngày đăng
-    if posted:
-        days = int(posted)
-        cutoff = datetime.now() - timedelta(days=days)
-        query = query.filter(Job.created_at >= cutoff)
-
-    if category_id:
-        query = query.filter(Job.category_id == category_id)
-
-    # Phân trang
-    page_size = app.config["PAGE_SIZE"]
-    jobs = query.order_by(Job.created_at.desc()).paginate(page=page, per_page=page_size, error_out=False)
+    result = dao.get_jobs(kw=kw, company_id=company_id, status=status, salary_range=salary_range,
+                          location=location, posted=posted, category_id=category_id, sort=sort,
+                          cursor=cursor, page_size=app.config["PAGE_SIZE"])
 
     companies = Company.query.all()
     categories = Category.query.all()
 
     return render_template(
         "candidate/jobs.html",
-        jobs=jobs.items,
-        total=jobs.total,
-        page=page,
-        page_size=page_size,
+        jobs=result.items,
+        pagination=result,
         companies=companies,
         kw=kw,
         company_id=company_id,
@@ -879,10 +866,23 @@ def jobs():
         location=location,
         posted=posted,
         categories=categories,
-        category_id=category_id
+        category_id=category_id,
+        sort=sort
     )
 
 
+@app.route("/admin/page-cache/")
+@role_required(UserRole.ADMIN.value)
+def page_cache_stats():
+    return jsonify(cache.page_cache.stats())
+
+
+@app.route("/admin/activity-buffer/")
+@role_required(UserRole.ADMIN.value)
+def activity_buffer_stats():
+    return jsonify(activity.buffer.stats())
+
+
 @app.route("/applications/my", methods=["GET"])
 @login_required
 def my_applications():
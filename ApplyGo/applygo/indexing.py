@@ -0,0 +1,38 @@
+"""
+Cập nhật các index trong bộ nhớ (search, similar, recommend) sau khi tin đã commit. Lỗi ở đây chỉ ghi log:
+tin đã được lưu, và các worker sẽ theo kịp qua job_change.
+"""
+from applygo import app, search, similar, recommend
+
+
+def reindex_job(job):
+    try:
+        search.index_job(job)
+        similar.update_job(job.id)
+        recommend.update_job(job.id)
+    except Exception:
+        app.logger.exception("Không cập nhật được index cho tin #%s", job.id)
+
+
+def unindex_job(job_id):
+    try:
+        search.remove_job(job_id)
+        similar.remove_job(job_id)
+        recommend.remove_job(job_id)
+    except Exception:
+        app.logger.exception("Không gỡ được tin #%s khỏi index", job_id)
+
+
+def reindex_company_jobs(company):
+    """Sau khi công ty đổi tên: tên công ty nằm trong search index của mọi tin của công ty."""
+    try:
+        search.index_company_jobs(company)
+    except Exception:
+        app.logger.exception("Không cập nhật được index cho các tin của công ty #%s", company.id)
+
+
+def invalidate():
+    """Sau thay đổi hàng loạt (vd. xóa công ty kéo theo nhiều tin): dựng lại các index trong thread nền."""
+    search.invalidate()
+    similar.invalidate()
+    recommend.invalidate()
@@ -0,0 +1,194 @@
+import json
+import logging
+import re
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from flask import g, request, has_request_context, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from applygo import app
+
+# endpoint -> số câu SQL tối đa cho một request
+query_budgets = {}
+
+slow_query_logger = logging.getLogger("applygo.slow_query")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestMetrics:
+    def __init__(self, keep_statements=False):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.statements = [] if keep_statements else None
+        self.durations = defaultdict(float)  # "db" | "tpl" | "upload" -> giây
+
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_RE = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_sql(statement):
+    """Đưa câu SQL về "hình dạng": bỏ literal, tham số và độ dài danh sách IN."""
+    sql = _STRING_RE.sub("?", statement)
+    sql = _PARAM_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("(?)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+def current_metrics():
+    if has_request_context():
+        return g.get("request_metrics")
+    return None
+
+
+def current_statements():
+    metrics = current_metrics()
+    return metrics.statements if metrics is not None else None
+
+
+@contextmanager
+def timed(name):
+    """Cộng thời gian của khối lệnh vào metric `name` của request hiện tại (vd. "upload")."""
+    metrics = current_metrics()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.durations[name] += time.perf_counter() - start
+
+
+@contextmanager
+def captured_statements():
+    """
+    Ghi lại (câu SQL, tham số) của mọi câu lệnh chạy trong khối lệnh, kể cả ngoài request
+    (vd. migrations.checks EXPLAIN đúng các câu do hàm DAO sinh ra).
+    """
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            captured.append((statement, parameters))
+
+    event.listen(Engine, "after_cursor_execute", capture)
+    try:
+        yield captured
+    finally:
+        event.remove(Engine, "after_cursor_execute", capture)
+
+
+def before_execute(conn, cursor, statement, parameters, context, executemany):
+    # Gắn vào context của chính câu lệnh: câu lỗi (không có after_cursor_execute) không để lại gì trên connection
+    context._applygo_query_start = time.perf_counter()
+
+
+def after_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._applygo_query_start
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.query_count += 1
+        metrics.durations["db"] += elapsed
+        if metrics.statements is not None:
+            metrics.statements.append(statement)
+
+    if elapsed * 1000 >= app.config["SLOW_QUERY_MS"]:
+        slow_query_logger.warning(json.dumps({
+            "endpoint": request.endpoint if has_request_context() else None,
+            "duration_ms": round(elapsed * 1000, 2),
+            "sql": normalize_sql(statement),
+        }, ensure_ascii=False))
+
+
+def before_template(sender, template, context, **extra):
+    metrics = current_metrics()
+    if metrics is not None:
+        g.setdefault("template_started", []).append(time.perf_counter())
+
+
+def after_template(sender, template, context, **extra):
+    metrics = current_metrics()
+    started = g.get("template_started")
+    if metrics is None or not started:
+        return
+    start = started.pop()
+    # Template render lồng trong template khác: thời gian đã nằm trong lần render ngoài cùng
+    if not started:
+        metrics.durations["tpl"] += time.perf_counter() - start
+
+
+def find_repeated(statements, threshold):
+    """Các câu SQL cùng hình dạng chạy >= threshold lần: dấu hiệu N+1."""
+    shapes = Counter(normalize_sql(s) for s in statements)
+    return [(shape, n) for shape, n in shapes.most_common() if n >= threshold]
+
+
+def start_request():
+    g.request_metrics = RequestMetrics(keep_statements=app.config["QUERY_DEBUG"])
+
+
+def check_query_budget(metrics):
+    endpoint = request.endpoint or request.path
+    for shape, n in find_repeated(metrics.statements, app.config["N_PLUS_ONE_THRESHOLD"]):
+        app.logger.warning("Nghi N+1 tại %s: %d lần `%s`", endpoint, n, shape[:300])
+
+    budget = query_budgets.get(endpoint)
+    if budget is not None and metrics.query_count > budget:
+        message = f"{endpoint} chạy {metrics.query_count} câu SQL, vượt ngân sách {budget}"
+        app.logger.error(message)
+        if app.config.get("TESTING"):
+            raise QueryBudgetExceeded(message)
+
+
+def server_timing(metrics):
+    total = time.perf_counter() - metrics.started
+    parts = [f'db;dur={metrics.durations["db"] * 1000:.1f};desc="{metrics.query_count} queries"']
+    for name, desc in (("tpl", "template"), ("upload", "upload")):
+        if name in metrics.durations:
+            parts.append(f'{name};dur={metrics.durations[name] * 1000:.1f};desc="{desc}"')
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def finish_request(response):
+    metrics = current_metrics()
+    if metrics is None:
+        return response
+
+    if metrics.statements is not None:
+        check_query_budget(metrics)
+    response.headers["X-Query-Count"] = str(metrics.query_count)
+    if app.config["REQUEST_TIMING"]:
+        response.headers["Server-Timing"] = server_timing(metrics)
+    return response
+
+
+def init_app(app):
+    if app.config["SLOW_QUERY_LOG"]:
+        handler = logging.FileHandler(app.config["SLOW_QUERY_LOG"], encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        slow_query_logger.addHandler(handler)
+
+    metrics = app.config["QUERY_DEBUG"] or app.config["REQUEST_TIMING"]
+    # Khi tắt cả ba chế độ thì không gắn hook nào: không tốn chi phí cho mỗi câu SQL/request
+    if metrics or app.config["SLOW_QUERY_LOG"]:
+        event.listen(Engine, "before_cursor_execute", before_execute)
+        event.listen(Engine, "after_cursor_execute", after_execute)
+    # Chỉ bật SLOW_QUERY_LOG: đo từng câu SQL nhưng không gắn metric cho request
+    if not metrics:
+        return
+    before_render_template.connect(before_template, app)
+    template_rendered.connect(after_template, app)
+    app.before_request(start_request)
+    app.after_request(finish_request)
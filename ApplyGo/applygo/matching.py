@@ -0,0 +1,94 @@
+"""
+Chấm điểm mức phù hợp của ứng viên với tin tuyển dụng: kỹ năng, kinh nghiệm và học vấn của hồ sơ
+so với yêu cầu của tin (cosine trên vector hash như similar.py) cộng điểm số năm kinh nghiệm.
+Mọi hồ sơ của một tin được chấm trong một lượt NumPy; điểm cache theo (tin, updated_at) và
+updated_at của từng hồ sơ nên chỉ hồ sơ mới hoặc vừa sửa phải chấm lại.
+"""
+import re
+
+import numpy as np
+
+from applygo import app, db
+from applygo.cache import match_cache
+from applygo.models import Application, CandidateProfile
+from applygo.similar import term_frequencies, normalize
+
+PROFILE_FIELDS = {
+    "skills": 3,
+    "experience": 1,
+    "education": 1,
+}
+JOB_FIELDS = {
+    "requirements": 2,
+    "title": 1,
+}
+
+# Điểm = SKILL_WEIGHT * cosine + (1 - SKILL_WEIGHT) * min(số năm, EXPERIENCE_YEARS) / EXPERIENCE_YEARS
+SKILL_WEIGHT = 0.85
+EXPERIENCE_YEARS = 10
+
+YEARS_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*(?:\+\s*)?(?:years?|yrs?|năm)", re.IGNORECASE)
+
+# Số hồ sơ cần chấm lại tối đa để lọc bằng IN (...); nhiều hơn thì lấy theo job_id
+MAX_IN_IDS = 500
+
+
+def experience_years(text):
+    match = YEARS_RE.search(text or "")
+    return float(match.group(1).replace(",", ".")) if match else 0.0
+
+
+def score_profiles(job, profiles):
+    """Điểm trong [0, 1] của các hồ sơ (dict skills/experience/education) với một tin, tính theo lô."""
+    if not profiles:
+        return np.zeros(0, dtype=np.float32)
+    features = app.config["SIMILAR_FEATURES"]
+    job_vector = normalize(term_frequencies([job], features, JOB_FIELDS))[0]
+    matrix = normalize(term_frequencies(profiles, features, PROFILE_FIELDS))
+    years = np.array([experience_years(p.get("experience")) for p in profiles], dtype=np.float32)
+    experience = np.minimum(years, EXPERIENCE_YEARS) / EXPERIENCE_YEARS
+    return SKILL_WEIGHT * (matrix @ job_vector) + (1 - SKILL_WEIGHT) * experience
+
+
+def _profile_texts(job_id, profile_ids):
+    query = db.session.query(CandidateProfile.id, CandidateProfile.skills, CandidateProfile.experience,
+                             CandidateProfile.education)
+    if len(profile_ids) <= MAX_IN_IDS:
+        query = query.filter(CandidateProfile.id.in_(profile_ids))
+    else:
+        query = query.join(Application, Application.candidate_profile_id == CandidateProfile.id) \
+            .filter(Application.job_id == job_id)
+    return {row.id: dict(skills=row.skills, experience=row.experience, education=row.education) for row in query}
+
+
+def ranked_applications(job, status=None):
+    """
+    (id hồ sơ ứng tuyển theo điểm giảm dần, {id hồ sơ ứng tuyển: điểm}) cho mọi hồ sơ của tin (lọc theo status).
+    """
+    query = db.session.query(Application.id, Application.candidate_profile_id, CandidateProfile.updated_at) \
+        .join(CandidateProfile, Application.candidate_profile_id == CandidateProfile.id) \
+        .filter(Application.job_id == job.id)
+    if status:
+        query = query.filter(Application.status == status)
+    rows = query.all()
+
+    key = (job.id, job.updated_at)
+    cached = match_cache.get(key)
+    if cached is None:
+        cached = {}
+        match_cache.set(key, cached, tags=[f"job:{job.id}"])
+    versions = {profile_id: updated_at for _, profile_id, updated_at in rows}
+    stale = [profile_id for profile_id, updated_at in versions.items()
+             if profile_id not in cached or cached[profile_id][0] != updated_at]
+    if stale:
+        texts = _profile_texts(job.id, stale)
+        stale = [profile_id for profile_id in stale if profile_id in texts]
+        scores = score_profiles(dict(requirements=job.requirements, title=job.title),
+                                [texts[profile_id] for profile_id in stale])
+        for profile_id, score in zip(stale, scores.tolist()):
+            cached[profile_id] = (versions[profile_id], score)
+
+    scores = {application_id: cached[profile_id][1] for application_id, profile_id, _ in rows
+              if profile_id in cached}
+    ordered = sorted(scores, key=lambda application_id: (-scores[application_id], application_id))
+    return ordered, scores
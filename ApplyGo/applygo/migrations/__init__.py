@@ -0,0 +1,108 @@
+"""
+Migration schema đơn giản thay cho db.drop_all()/create_all().
+
+Mỗi file vNNN_*.py trong package này có:
+- upgrade(conn): thay đổi DDL, viết idempotent (kiểm tra trước khi tạo);
+- backfill(batch_size) (tùy chọn): cập nhật dữ liệu theo từng lô nhỏ, mỗi lô một
+  transaction ngắn, có thể chạy khi ứng dụng vẫn đang phục vụ request.
+"""
+import importlib
+import pkgutil
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+
+from applygo import db
+
+schema_migration = db.Table(
+    "schema_migration",
+    db.metadata,
+    db.Column("version", db.String(50), primary_key=True),
+    db.Column("applied_at", db.DateTime, nullable=False),
+    db.Column("backfilled_at", db.DateTime, nullable=True),
+)
+
+
+def load_migrations():
+    modules = []
+    for info in pkgutil.iter_modules(__path__):
+        if info.name.startswith("v") and info.name[1:4].isdigit():
+            modules.append(importlib.import_module(f"{__name__}.{info.name}"))
+    return sorted(modules, key=lambda m: m.__name__)
+
+
+def version_of(module):
+    return module.__name__.rsplit(".", 1)[-1]
+
+
+def has_column(conn, table, column):
+    return column in {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def has_table(conn, table):
+    return inspect(conn).has_table(table)
+
+
+def create_indexes(conn, table, names=None):
+    """Tạo các index khai báo trong models (hoặc chỉ những index có tên trong `names`) nếu chưa có."""
+    existing = {i["name"] for i in inspect(conn).get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name in existing or (names is not None and index.name not in names):
+            continue
+        ddl = str(CreateIndex(index).compile(dialect=conn.dialect))
+        if conn.dialect.name == "mysql":
+            # InnoDB online DDL: vẫn cho phép đọc/ghi bảng trong lúc tạo index
+            ddl += " ALGORITHM=INPLACE LOCK=NONE"
+        conn.execute(text(ddl))
+
+
+def applied_versions(conn):
+    schema_migration.create(conn, checkfirst=True)
+    return {row.version: row for row in conn.execute(schema_migration.select())}
+
+
+def upgrade():
+    """Chạy phần DDL của các migration chưa áp dụng, trả về các version vừa chạy."""
+    done = []
+    with db.engine.begin() as conn:
+        applied = applied_versions(conn)
+    for module in load_migrations():
+        version = version_of(module)
+        if version in applied:
+            continue
+        with db.engine.begin() as conn:
+            module.upgrade(conn)
+            conn.execute(schema_migration.insert().values(
+                version=version, applied_at=datetime.now(),
+                backfilled_at=None if hasattr(module, "backfill") else datetime.now()))
+        done.append(version)
+    return done
+
+
+def backfill(batch_size=1000, log=print):
+    """Chạy các backfill còn thiếu của những migration đã áp dụng."""
+    with db.engine.begin() as conn:
+        applied = applied_versions(conn)
+    for module in load_migrations():
+        version = version_of(module)
+        row = applied.get(version)
+        if row is None or row.backfilled_at is not None or not hasattr(module, "backfill"):
+            continue
+        for progress in module.backfill(batch_size):
+            log(f"{version}: {progress}")
+        with db.engine.begin() as conn:
+            conn.execute(schema_migration.update()
+                         .where(schema_migration.c.version == version)
+                         .values(backfilled_at=datetime.now()))
+
+
+def status():
+    with db.engine.begin() as conn:
+        applied = applied_versions(conn)
+    result = []
+    for module in load_migrations():
+        row = applied.get(version_of(module))
+        result.append((version_of(module), (module.__doc__ or "").strip(),
+                       row.applied_at if row else None, row.backfilled_at if row else None))
+    return result
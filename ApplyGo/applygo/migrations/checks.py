@@ -0,0 +1,85 @@
+"""
+Kiểm tra bằng EXPLAIN rằng các truy vấn nóng dùng index thay vì quét toàn bảng. Câu SQL được lấy từ chính
+các hàm DAO (instrumentation.captured_statements) chạy trên dữ liệu hiện có, nên sửa DAO là check đổi theo.
+"""
+from applygo import db, dao
+from applygo.cache import count_cache, identity_cache
+from applygo.instrumentation import captured_statements, normalize_sql
+from applygo.models import Job, Application, CandidateProfile, Company, JobStatus, ApplicationStatus
+
+
+def _pages(fetch):
+    """Trang đầu và trang kế (theo cursor) của một hàm phân trang, như người dùng lật trang."""
+    def run():
+        page = fetch(None)
+        if page.next_cursor:
+            fetch(page.next_cursor)
+
+    return run
+
+
+def hot_queries():
+    """
+    (tên, hàm gọi DAO) của các truy vấn nóng, với id mẫu lấy từ dữ liệu hiện có. Danh sách tin không lọc
+    (đếm toàn bảng, trang đầu theo created_at) không có trong đây: đó là quét index có LIMIT/đếm đã cache.
+    """
+    job_id = db.session.query(Application.job_id).group_by(Application.job_id) \
+        .order_by(db.func.count().desc()).limit(1).scalar()
+    if job_id is None:
+        return []
+    job = db.session.get(Job, job_id)
+    candidate_user_id = db.session.query(CandidateProfile.user_id).join(Application).limit(1).scalar()
+    company_user_id = db.session.get(Company, job.company_id).user_id
+    return [
+        ("jobs_by_company_status", _pages(lambda cursor: dao.get_jobs_by_company(
+            job.company_id, status=JobStatus.OPEN.value, cursor=cursor, page_size=5))),
+        ("jobs_by_category", _pages(lambda cursor: dao.get_jobs(
+            category_id=job.category_id, cursor=cursor, page_size=5))),
+        ("jobs_posted_recently", _pages(lambda cursor: dao.get_jobs(posted="30", cursor=cursor, page_size=5))),
+        ("jobs_by_salary", _pages(lambda cursor: dao.get_jobs(
+            salary_range="10-30", sort="salary", cursor=cursor, page_size=5))),
+        ("applications_by_job_status", _pages(lambda cursor: dao.get_applications(
+            job_id, status=ApplicationStatus.PENDING.value, cursor=cursor, page_size=3))),
+        ("applications_by_candidate", lambda: dao.get_applications_by_user(candidate_user_id)),
+        ("identity_candidate", lambda: dao.get_user_by_id(candidate_user_id)),
+        ("identity_company", lambda: dao.get_user_by_id(company_user_id)),
+    ]
+
+
+def capture(call):
+    """Các câu SELECT (câu SQL, tham số) mà call() chạy, bỏ qua cache để câu SQL nào cũng thực sự chạy."""
+    count_cache.clear()
+    identity_cache.clear()
+    db.session.expire_all()
+    with captured_statements() as statements:
+        call()
+    return [(sql, parameters) for sql, parameters in statements if sql.lstrip().upper().startswith("SELECT")]
+
+
+def explain(statement, parameters):
+    """Trả về (dùng index?, các dòng kế hoạch dạng chuỗi)."""
+    conn = db.session.connection()
+
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        plan = [row[-1] for row in rows]
+        # Mọi "SCAN" đều tính là lỗi, kể cả "SCAN ... USING INDEX" (quét hết index cũng tăng theo số dòng)
+        return not any(line.startswith("SCAN") for line in plan), plan
+
+    rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).mappings().all()
+    plan = [f"{row['table']}: type={row['type']} key={row['key']} rows={row['rows']}" for row in rows]
+    return all(row["key"] and row["type"] not in ("ALL", "index") for row in rows), plan
+
+
+def check_hot_queries():
+    """(tên, mọi câu đều dùng index?, kế hoạch của từng câu SQL) cho mỗi truy vấn nóng."""
+    results = []
+    for name, call in hot_queries():
+        uses_index, lines = True, []
+        for statement, parameters in capture(call):
+            ok, plan = explain(statement, parameters)
+            uses_index = uses_index and ok
+            lines.append(normalize_sql(statement)[:160])
+            lines += [f"  {line}" for line in plan]
+        results.append((name, uses_index, lines))
+    return results
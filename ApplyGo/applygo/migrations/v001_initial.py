@@ -0,0 +1,6 @@
+"""Tạo các bảng còn thiếu theo models hiện tại."""
+from applygo import db
+
+
+def upgrade(conn):
+    db.metadata.create_all(conn, checkfirst=True)
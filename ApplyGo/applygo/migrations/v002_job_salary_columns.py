@@ -0,0 +1,35 @@
+"""Thêm Job.salary_min/salary_max (triệu VNĐ) và index khoảng lương."""
+from sqlalchemy import text
+
+from applygo import db
+from applygo.migrations import has_column, create_indexes
+from applygo.models import Job, parse_salary
+
+
+def upgrade(conn):
+    for name in ("salary_min", "salary_max"):
+        if not has_column(conn, "job", name):
+            conn.execute(text(f"ALTER TABLE job ADD COLUMN {name} INTEGER NULL"))
+    create_indexes(conn, Job.__table__, names={"ix_job_salary_range"})
+
+
+def backfill(batch_size):
+    last_id, updated = 0, 0
+    while True:
+        rows = db.session.query(Job.id, Job.salary) \
+            .filter(Job.id > last_id) \
+            .order_by(Job.id) \
+            .limit(batch_size).all()
+        if not rows:
+            break
+
+        mappings = []
+        for job_id, salary in rows:
+            salary_min, salary_max = parse_salary(salary)
+            mappings.append({"id": job_id, "salary_min": salary_min, "salary_max": salary_max})
+        db.session.bulk_update_mappings(Job, mappings)
+        db.session.commit()
+
+        last_id = rows[-1].id
+        updated += len(rows)
+        yield f"đã cập nhật {updated} job (id <= {last_id})"
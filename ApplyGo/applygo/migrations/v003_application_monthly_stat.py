@@ -0,0 +1,12 @@
+"""Bảng rollup application_monthly_stat cho các dashboard."""
+from applygo import stats
+from applygo.models import ApplicationMonthlyStat
+
+
+def upgrade(conn):
+    ApplicationMonthlyStat.__table__.create(conn, checkfirst=True)
+
+
+def backfill(batch_size):
+    rows = stats.rebuild_application_stats(batch_size=batch_size)
+    yield f"đã dựng lại {rows} dòng thống kê"
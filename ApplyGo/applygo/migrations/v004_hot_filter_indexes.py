@@ -0,0 +1,12 @@
+"""Index ghép cho các bộ lọc/sắp xếp dùng nhiều trên Job và Application."""
+from applygo.migrations import create_indexes
+from applygo.models import Job, Application
+
+
+def upgrade(conn):
+    create_indexes(conn, Job.__table__, names={
+        "ix_job_company_status_created", "ix_job_category_location", "ix_job_created",
+    })
+    create_indexes(conn, Application.__table__, names={
+        "ix_application_job_status_applied", "ix_application_candidate_applied",
+    })
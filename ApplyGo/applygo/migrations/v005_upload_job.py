@@ -0,0 +1,6 @@
+"""Bảng upload_job cho hàng đợi tải file lên chạy nền."""
+from applygo.models import UploadJob
+
+
+def upgrade(conn):
+    UploadJob.__table__.create(conn, checkfirst=True)
@@ -0,0 +1,13 @@
+"""Chỉ mục nội dung stored_blob và digest/size trên upload_job để bỏ qua file trùng."""
+from sqlalchemy import text
+
+from applygo.migrations import has_column
+from applygo.models import StoredBlob
+
+
+def upgrade(conn):
+    StoredBlob.__table__.create(conn, checkfirst=True)
+    for name, ddl in (("digest", "VARCHAR(64) NULL"), ("size", "INTEGER NULL"),
+                      ("deduplicated", "BOOLEAN NOT NULL DEFAULT 0")):
+        if not has_column(conn, "upload_job", name):
+            conn.execute(text(f"ALTER TABLE upload_job ADD COLUMN {name} {ddl}"))
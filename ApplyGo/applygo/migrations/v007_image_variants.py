@@ -0,0 +1,13 @@
+"""Cột JSON lưu URL các bản thu nhỏ của avatar, logo và của từng blob ảnh."""
+from sqlalchemy import text
+
+from applygo import db
+from applygo.migrations import has_column
+
+
+def upgrade(conn):
+    json_type = db.JSON().compile(dialect=conn.dialect)
+    for table, column in (("user", "image_variants"), ("company", "logo_variants"), ("stored_blob", "variants")):
+        if not has_column(conn, table, column):
+            quoted = conn.dialect.identifier_preparer.quote(table)
+            conn.execute(text(f"ALTER TABLE {quoted} ADD COLUMN {column} {json_type} NULL"))
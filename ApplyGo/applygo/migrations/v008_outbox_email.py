@@ -0,0 +1,6 @@
+"""Bảng outbox_email: hàng đợi thông báo gửi mail chạy nền."""
+from applygo.models import OutboxEmail
+
+
+def upgrade(conn):
+    OutboxEmail.__table__.create(conn, checkfirst=True)
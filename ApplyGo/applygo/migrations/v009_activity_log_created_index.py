@@ -0,0 +1,8 @@
+"""Index created_at trên activity_log cho job xóa log cũ theo lô."""
+from applygo.migrations import create_indexes
+from applygo.models import ActivityLog
+
+
+def upgrade(conn):
+    ActivityLog.__table__.create(conn, checkfirst=True)
+    create_indexes(conn, ActivityLog.__table__, names={"ix_activity_log_created_at"})
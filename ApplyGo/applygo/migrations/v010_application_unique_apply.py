@@ -0,0 +1,22 @@
+"""Unique (candidate_profile_id, job_id) trên application: mỗi ứng viên chỉ một đơn cho mỗi tin."""
+from sqlalchemy import text
+
+from applygo import stats
+from applygo.migrations import create_indexes
+from applygo.models import Application
+
+
+def upgrade(conn):
+    # Đơn trùng do bấm ứng tuyển đồng thời trước đây: giữ đơn đầu tiên
+    conn.execute(text(
+        "DELETE FROM application WHERE id IN (SELECT id FROM ("
+        "SELECT DISTINCT a.id FROM application a JOIN application b "
+        "ON a.candidate_profile_id = b.candidate_profile_id AND a.job_id = b.job_id AND a.id > b.id"
+        ") AS duplicate)"))
+    create_indexes(conn, Application.__table__, names={"uq_application_candidate_job"})
+
+
+def backfill(batch_size):
+    # Rollup vẫn còn đếm các đơn trùng vừa xóa
+    rows = stats.rebuild_application_stats(batch_size=batch_size)
+    yield f"đã dựng lại {rows} dòng thống kê hồ sơ"
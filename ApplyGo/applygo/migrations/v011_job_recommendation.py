@@ -0,0 +1,12 @@
+"""Bảng job_recommendation: việc làm gợi ý tính sẵn cho từng ứng viên."""
+from applygo import recommend
+from applygo.models import JobRecommendation
+
+
+def upgrade(conn):
+    JobRecommendation.__table__.create(conn, checkfirst=True)
+
+
+def backfill(batch_size):
+    candidates = recommend.rebuild(batch_size=batch_size)
+    yield f"đã tính gợi ý việc làm cho {candidates} ứng viên"
@@ -0,0 +1,6 @@
+"""Bảng job_change: nhật ký thay đổi tin để index trong bộ nhớ của các worker đồng bộ với nhau."""
+from applygo.models import JobChange
+
+
+def upgrade(conn):
+    JobChange.__table__.create(conn, checkfirst=True)
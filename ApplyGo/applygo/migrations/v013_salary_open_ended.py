@@ -0,0 +1,23 @@
+"""Mức lương "Dưới X triệu": salary_min = 0 thay cho NULL để lọc và sắp xếp theo lương tìm thấy tin."""
+from applygo import db
+from applygo.models import Job
+
+
+def upgrade(conn):
+    # Không đổi schema, chỉ cập nhật dữ liệu trong backfill
+    pass
+
+
+def backfill(batch_size):
+    last_id, updated = 0, 0
+    while True:
+        ids = [job_id for job_id, in db.session.query(Job.id)
+               .filter(Job.id > last_id, Job.salary_min.is_(None), Job.salary_max.isnot(None))
+               .order_by(Job.id).limit(batch_size)]
+        if not ids:
+            break
+        db.session.query(Job).filter(Job.id.in_(ids)).update({Job.salary_min: 0}, synchronize_session=False)
+        db.session.commit()
+        last_id = ids[-1]
+        updated += len(ids)
+        yield f"đã cập nhật {updated} job (id <= {last_id})"
@@ -0,0 +1,11 @@
+"""salary_min/salary_max đổi đơn vị từ triệu sang nghìn VNĐ (giữ mức lẻ như 12,5 triệu): tính lại từ cột salary."""
+from applygo.migrations import v002_job_salary_columns
+
+
+def upgrade(conn):
+    # Không đổi schema (vẫn INTEGER), chỉ tính lại dữ liệu trong backfill
+    pass
+
+
+def backfill(batch_size):
+    yield from v002_job_salary_columns.backfill(batch_size)
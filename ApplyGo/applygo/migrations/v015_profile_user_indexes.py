@@ -0,0 +1,9 @@
+"""Index user_id trên candidate_profile và company: nạp hồ sơ/công ty của user đang đăng nhập không quét bảng."""
+from applygo.migrations import create_indexes
+from applygo.models import CandidateProfile, Company
+
+
+def upgrade(conn):
+    # MySQL đã có index ngầm cho khóa ngoại; InnoDB tự bỏ index đó khi có index tường minh trên cùng cột
+    create_indexes(conn, CandidateProfile.__table__, names={"ix_candidate_profile_user"})
+    create_indexes(conn, Company.__table__, names={"ix_company_user"})
@@ -1,7 +1,8 @@
+import re
 from datetime import datetime
 from enum import Enum
 from flask_login import UserMixin
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 
 from applygo import db, app
 
@@ -30,6 +31,20 @@ class CompanyStatus(Enum):
     DECLINED = "Declined"
 
 
+class UploadStatus(Enum):
+    PENDING = "Pending"
+    UPLOADING = "Uploading"
+    DONE = "Done"
+    FAILED = "Failed"
+
+
+class MailStatus(Enum):
+    PENDING = "Pending"
+    SENDING = "Sending"
+    SENT = "Sent"
+    FAILED = "Failed"
+
+
 class User(db.Model, UserMixin):
     __table_args__ = {'extend_existing': True}
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -40,6 +55,7 @@ class User(db.Model, UserMixin):
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
     image_url = db.Column(db.String(500), nullable=True)
+    image_variants = db.Column(db.JSON, nullable=True)  # {"<width>": url}
     candidate_profile = relationship("CandidateProfile", backref="user", uselist=False, lazy=True)
     company = relationship("Company", backref="user", uselist=False)
     activities = relationship("ActivityLog", backref="user", cascade="all, delete-orphan")
@@ -58,7 +74,10 @@ class User(db.Model, UserMixin):
 
 
 class CandidateProfile(db.Model):
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index("ix_candidate_profile_user", "user_id"),
+        {'extend_existing': True},
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     full_name = db.Column(db.String(100), nullable=False)
@@ -78,7 +97,10 @@ class CandidateProfile(db.Model):
 
 
 class Company(db.Model):
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index("ix_company_user", "user_id"),
+        {'extend_existing': True},
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     name = db.Column(db.String(100), nullable=False)
@@ -87,6 +109,7 @@ class Company(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
     logo_url = db.Column(db.String(500), nullable=True)
+    logo_variants = db.Column(db.JSON, nullable=True)  # {"<width>": url}
     mst = db.Column(db.String(10), nullable=False)
     status = db.Column(db.String(20), nullable=False, default=CompanyStatus.PENDING.value)
     jobs = relationship("Job", backref="company", cascade="all, delete-orphan", lazy=True)
@@ -95,8 +118,58 @@ class Company(db.Model):
         return self.name
 
 
+SALARY_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+USD_TO_MILLION_VND = 0.025
+# salary_min/salary_max lưu theo nghìn VNĐ để giữ được mức lẻ như 12,5 triệu
+THOUSANDS_PER_MILLION = 1000
+# Một con số kèm các từ này là cận dưới / cận trên của mức lương
+SALARY_LOWER_WORDS = ("trên", "từ", "tối thiểu", "ít nhất", "from", "min", ">")
+SALARY_UPPER_WORDS = ("dưới", "tối đa", "tới", "đến", "up to", "max", "<")
+
+
+def parse_salary(text):
+    """
+    Tách mức lương dạng chữ thành (salary_min, salary_max), đơn vị nghìn VNĐ:
+    "20-25 triệu" -> (20000, 25000), "12,5 triệu" -> (12500, 12500), "Trên 30 triệu" -> (30000, None),
+    "Dưới 20 triệu" / "Tối đa 20 triệu" -> (0, 20000), "Thỏa thuận" -> (None, None).
+    salary_min NULL nghĩa là không có thông tin lương.
+    """
+    if not text:
+        return None, None
+
+    lowered = text.lower()
+    values = []
+    for raw in SALARY_NUMBER_RE.findall(lowered):
+        parts = re.split(r"[.,]", raw)
+        if len(parts) > 1 and all(len(p) == 3 for p in parts[1:]):
+            number = float("".join(parts))  # 15.000.000
+        else:
+            number = float(raw.replace(",", "."))  # 12,5
+        if "$" in lowered or "usd" in lowered:
+            number *= USD_TO_MILLION_VND
+        elif number >= 100000:
+            number /= 1000000
+        values.append(int(round(number * THOUSANDS_PER_MILLION)))
+
+    if not values:
+        return None, None
+    if len(values) == 1:
+        if any(w in lowered for w in SALARY_UPPER_WORDS):
+            return 0, values[0]
+        if any(w in lowered for w in SALARY_LOWER_WORDS):
+            return values[0], None
+        return values[0], values[0]
+    return min(values[:2]), max(values[:2])
+
+
 class Job(db.Model):
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index("ix_job_salary_range", "salary_min", "salary_max"),
+        db.Index("ix_job_company_status_created", "company_id", "status", "created_at"),
+        db.Index("ix_job_category_location", "category_id", "location"),
+        db.Index("ix_job_created", "created_at", "id"),
+        {'extend_existing': True},
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     company_id = db.Column(db.Integer, db.ForeignKey("company.id"), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey("category.id"), nullable=True)
@@ -105,6 +178,8 @@ class Job(db.Model):
     requirements=db.Column(db.Text, nullable=True)
     location = db.Column(db.String(100), nullable=True)
     salary = db.Column(db.String(50), nullable=True)
+    salary_min = db.Column(db.Integer, nullable=True)  # nghìn VNĐ, tính từ salary (parse_salary)
+    salary_max = db.Column(db.Integer, nullable=True)
     status = db.Column(db.String(20), nullable=False, default=JobStatus.OPEN.value)
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
@@ -113,6 +188,20 @@ class Job(db.Model):
     def __str__(self):
         return f"{self.title} ({self.status})"
 
+    @validates("salary")
+    def validate_salary(self, key, value):
+        self.salary_min, self.salary_max = parse_salary(value)
+        return value
+
+    @classmethod
+    def salary_overlaps(cls, min_salary, max_salary):
+        """
+        Khoảng lương của tin giao với [min_salary, max_salary] (nghìn VNĐ); salary_max NULL là không giới hạn trên.
+        """
+        return db.and_(cls.salary_min <= max_salary,
+                       db.or_(cls.salary_max.is_(None), cls.salary_max >= min_salary))
+
+
 class Category(db.Model):
     __table_args__ = {'extend_existing': True}
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -125,7 +214,13 @@ class Category(db.Model):
         return self.name
 
 class Application(db.Model):
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index("ix_application_job_status_applied", "job_id", "status", "applied_at"),
+        db.Index("ix_application_candidate_applied", "candidate_profile_id", "applied_at"),
+        # Mỗi ứng viên chỉ một đơn cho mỗi tin, kể cả khi bấm ứng tuyển nhiều lần đồng thời
+        db.Index("uq_application_candidate_job", "candidate_profile_id", "job_id", unique=True),
+        {'extend_existing': True},
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     candidate_profile_id = db.Column(db.Integer, db.ForeignKey("candidate_profile.id"), nullable=False)
     job_id = db.Column(db.Integer, db.ForeignKey("job.id"), nullable=False)
@@ -137,8 +232,51 @@ class Application(db.Model):
         return f"{self.candidate_profile.full_name} -> {self.job.title}"
 
 
-class ActivityLog(db.Model):
+class ApplicationMonthlyStat(db.Model):
+    """Số hồ sơ theo (công ty, ứng viên, tháng, trạng thái), cập nhật cùng transaction với Application."""
+    __tablename__ = "application_monthly_stat"
+    __table_args__ = (
+        db.Index("ix_app_stat_candidate_month", "candidate_profile_id", "month"),
+        {'extend_existing': True},
+    )
+    company_id = db.Column(db.Integer, db.ForeignKey("company.id", ondelete="CASCADE"), primary_key=True)
+    candidate_profile_id = db.Column(db.Integer, db.ForeignKey("candidate_profile.id", ondelete="CASCADE"),
+                                     primary_key=True)
+    month = db.Column(db.String(7), primary_key=True)  # "YYYY-MM"
+    status = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __str__(self):
+        return f"{self.month} {self.status}: {self.count}"
+
+
+class JobRecommendation(db.Model):
+    """Việc làm gợi ý đã tính sẵn cho từng ứng viên (applygo/recommend.py), trang chủ chỉ tra theo khóa."""
+    __tablename__ = "job_recommendation"
     __table_args__ = {'extend_existing': True}
+    candidate_profile_id = db.Column(db.Integer, db.ForeignKey("candidate_profile.id", ondelete="CASCADE"),
+                                     primary_key=True)
+    items = db.Column(db.JSON, nullable=False)  # [[job_id, điểm], ...] điểm giảm dần
+    computed_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
+
+
+class JobChange(db.Model):
+    """Nhật ký tin tuyển dụng đã thay đổi, để index trong bộ nhớ của mọi worker theo kịp (applygo/changes.py)."""
+    __tablename__ = "job_change"
+    __table_args__ = (
+        db.Index("ix_job_change_changed_at", "changed_at"),
+        {'extend_existing': True},
+    )
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    job_id = db.Column(db.Integer, nullable=True)  # NULL: dữ liệu đổi hàng loạt, dựng lại toàn bộ index
+    changed_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
+
+
+class ActivityLog(db.Model):
+    __table_args__ = (
+        db.Index("ix_activity_log_created_at", "created_at"),
+        {'extend_existing': True},
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     action = db.Column(db.String(255), nullable=False)
@@ -157,8 +295,79 @@ class CvTemplate(db.Model):
     preview_image = db.Column(db.String(255), nullable=True)
 
 
+class UploadJob(db.Model):
+    """File đã lưu tạm trên đĩa, chờ worker tải lên kho lưu trữ rồi ghi URL vào target_model.target_field."""
+    __table_args__ = (
+        db.Index("ix_upload_job_status", "status", "next_attempt_at"),
+        {'extend_existing': True},
+    )
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="SET NULL"), nullable=True)
+    target_model = db.Column(db.String(50), nullable=False)
+    target_id = db.Column(db.Integer, nullable=False)
+    target_field = db.Column(db.String(50), nullable=False)
+    folder = db.Column(db.String(100), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    local_path = db.Column(db.String(500), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=UploadStatus.PENDING.value)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=True)
+    url = db.Column(db.String(500), nullable=True)
+    error = db.Column(db.String(500), nullable=True)
+    digest = db.Column(db.String(64), nullable=True)
+    size = db.Column(db.Integer, nullable=True)
+    deduplicated = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    def __str__(self):
+        return f"{self.target_model}#{self.target_id}.{self.target_field} ({self.status})"
+
+
+class OutboxEmail(db.Model):
+    """
+    Một thông báo chờ gửi mail. Worker gộp mọi thông báo đang chờ của cùng một người nhận
+    thành một mail (digest) và gửi qua một kết nối SMTP dùng chung cho cả lô.
+    """
+    __tablename__ = "outbox_email"
+    __table_args__ = (
+        db.Index("ix_outbox_email_status_recipient", "status", "recipient", "created_at"),
+        db.Index("ix_outbox_email_claim", "claim"),
+        {'extend_existing': True},
+    )
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    recipient = db.Column(db.String(255), nullable=False)
+    kind = db.Column(db.String(50), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=MailStatus.PENDING.value)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=True)
+    claim = db.Column(db.String(32), nullable=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    error = db.Column(db.String(500), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    def __str__(self):
+        return f"{self.kind} -> {self.recipient} ({self.status})"
+
+
+class StoredBlob(db.Model):
+    """Chỉ mục digest (sha256 nội dung file) -> URL đã lưu trên từng kho, để không tải lại file trùng."""
+    __table_args__ = {'extend_existing': True}
+    digest = db.Column(db.String(64), primary_key=True)
+    backend = db.Column(db.String(20), primary_key=True)
+    url = db.Column(db.String(500), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    variants = db.Column(db.JSON, nullable=True)  # ảnh: {"<width>": url} của các bản thu nhỏ
+    created_at = db.Column(db.DateTime, default=datetime.now)
+
+
 if __name__ == "__main__":
+    from applygo import migrations
+
     with app.app_context():
-        db.drop_all()
-        db.create_all()
-        print("Database created successfully!")
+        for version in migrations.upgrade():
+            print(f"Applied migration {version}")
+        print("Database is up to date!")
@@ -0,0 +1,214 @@
+"""
+Gửi mail chạy nền qua bảng outbox_email: thao tác nghiệp vụ chỉ INSERT thông báo trong transaction
+của nó, worker gửi sau khi commit nên request không bao giờ chờ SMTP.
+
+Thông báo của cùng một người nhận được gộp thành một mail (digest) khi thông báo cũ nhất đã chờ
+MAIL_COALESCE_SECONDS; mỗi lượt gửi tối đa MAIL_BATCH_SIZE người nhận qua một kết nối SMTP.
+Nhiều tiến trình có thể cùng chạy worker: dòng được "nhận" bằng UPDATE có mã claim trước khi gửi.
+"""
+import random
+import smtplib
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from flask_mail import Message, BadHeaderError
+from sqlalchemy import event, func, insert, or_, update
+
+from applygo import app, db, mail
+from applygo.models import OutboxEmail, MailStatus
+
+_lock = threading.Lock()
+_wake = threading.Event()
+_worker = None
+
+
+def application_notice(recipient, job_title, candidate_name):
+    return dict(recipient=recipient, kind="new_application",
+                subject=f"Hồ sơ mới cho tin {job_title}",
+                body=f"{candidate_name or 'Một ứng viên'} vừa ứng tuyển vào vị trí {job_title}.")
+
+
+def status_notice(recipient, job_title, status):
+    return dict(recipient=recipient, kind="application_status",
+                subject=f"Hồ sơ ứng tuyển {job_title}: {status}",
+                body=f"Nhà tuyển dụng đã cập nhật hồ sơ của bạn cho vị trí {job_title} thành {status}.")
+
+
+def notify_many(notices):
+    """Thêm các thông báo (dict recipient/kind/subject/body) vào outbox bằng một câu INSERT, không commit."""
+    now = datetime.now()
+    rows = [dict(recipient=n["recipient"], kind=n["kind"], subject=n["subject"], body=n["body"],
+                 status=MailStatus.PENDING.value, attempts=0, created_at=now)
+            for n in notices if n.get("recipient")]
+    if rows:
+        db.session.execute(insert(OutboxEmail), rows)
+        db.session.info["outbox_queued"] = True
+    return len(rows)
+
+
+def notify(notice):
+    return notify_many([notice])
+
+
+def backoff(attempts):
+    """Giây chờ trước lần gửi lại: lũy thừa 2 có jitter, tối đa MAIL_BACKOFF_MAX."""
+    delay = app.config["MAIL_BACKOFF_BASE"] * 2 ** (attempts - 1)
+    return min(delay, app.config["MAIL_BACKOFF_MAX"]) * random.uniform(0.5, 1.0)
+
+
+def _due(now):
+    return (OutboxEmail.status == MailStatus.PENDING.value,
+            or_(OutboxEmail.next_attempt_at.is_(None), OutboxEmail.next_attempt_at <= now))
+
+
+def release_stale():
+    """Trả về hàng đợi các dòng bị nhận quá MAIL_CLAIM_TIMEOUT mà chưa xong (worker chết giữa chừng)."""
+    cutoff = datetime.now() - timedelta(seconds=app.config["MAIL_CLAIM_TIMEOUT"])
+    db.session.execute(
+        update(OutboxEmail)
+        .where(OutboxEmail.status == MailStatus.SENDING.value, OutboxEmail.claimed_at < cutoff)
+        .values(status=MailStatus.PENDING.value, claim=None),
+        execution_options={"synchronize_session": False}
+    )
+    db.session.commit()
+
+
+def claim_batch(coalesce_seconds=None):
+    """Nhận các thông báo của tối đa MAIL_BATCH_SIZE người nhận đã đến hạn gửi, trả về list OutboxEmail."""
+    now = datetime.now()
+    if coalesce_seconds is None:
+        coalesce_seconds = app.config["MAIL_COALESCE_SECONDS"]
+    recipients = [recipient for (recipient,) in db.session.query(OutboxEmail.recipient)
+                  .filter(*_due(now))
+                  .group_by(OutboxEmail.recipient)
+                  .having(func.min(OutboxEmail.created_at) <= now - timedelta(seconds=coalesce_seconds))
+                  .limit(app.config["MAIL_BATCH_SIZE"])]
+    if not recipients:
+        return []
+
+    claim = uuid.uuid4().hex
+    db.session.execute(
+        update(OutboxEmail)
+        .where(OutboxEmail.recipient.in_(recipients), *_due(now))
+        .values(status=MailStatus.SENDING.value, claim=claim, claimed_at=now, attempts=OutboxEmail.attempts + 1),
+        execution_options={"synchronize_session": False}
+    )
+    db.session.commit()
+    return db.session.query(OutboxEmail).filter(OutboxEmail.claim == claim) \
+        .order_by(OutboxEmail.recipient, OutboxEmail.id).all()
+
+
+def build_message(recipient, rows):
+    if len(rows) == 1:
+        return Message(subject=rows[0].subject, recipients=[recipient], body=rows[0].body)
+    body = "\n\n".join(f"• {row.subject}\n{row.body}" for row in rows)
+    return Message(subject=f"ApplyGO: bạn có {len(rows)} thông báo mới", recipients=[recipient], body=body)
+
+
+def send_batch(rows):
+    """Gửi các dòng đã nhận, một mail cho mỗi người nhận qua cùng một kết nối SMTP. Trả về số mail đã gửi."""
+    groups = {}
+    for row in rows:
+        groups.setdefault(row.recipient, []).append(row)
+    recipients = list(groups)
+
+    sent, failed = [], {}
+    position = 0
+    try:
+        with mail.connect() as conn:
+            for position, recipient in enumerate(recipients):
+                try:
+                    conn.send(build_message(recipient, groups[recipient]))
+                    sent.append(recipient)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError,
+                        BadHeaderError) as e:
+                    # Lỗi riêng của mail này, kết nối vẫn dùng tiếp được
+                    failed[recipient] = str(e)
+            position = len(recipients)
+    except (smtplib.SMTPException, OSError) as e:
+        # Mất kết nối: mọi người nhận chưa gửi được thử lại sau
+        for recipient in recipients[position:]:
+            if recipient not in sent:
+                failed.setdefault(recipient, str(e))
+
+    now = datetime.now()
+    sent_ids = [row.id for recipient in sent for row in groups[recipient]]
+    if sent_ids:
+        db.session.execute(
+            update(OutboxEmail).where(OutboxEmail.id.in_(sent_ids))
+            .values(status=MailStatus.SENT.value, sent_at=now, claim=None, error=None),
+            execution_options={"synchronize_session": False}
+        )
+    for recipient, error in failed.items():
+        group = groups[recipient]
+        attempts = max(row.attempts for row in group)
+        if attempts >= app.config["MAIL_MAX_ATTEMPTS"]:
+            values = dict(status=MailStatus.FAILED.value, next_attempt_at=None)
+        else:
+            values = dict(status=MailStatus.PENDING.value, next_attempt_at=now + timedelta(seconds=backoff(attempts)))
+        db.session.execute(
+            update(OutboxEmail).where(OutboxEmail.id.in_([row.id for row in group]))
+            .values(claim=None, error=error[:500], **values),
+            execution_options={"synchronize_session": False}
+        )
+    db.session.commit()
+    if failed:
+        app.logger.warning("Gửi mail lỗi cho %d người nhận", len(failed))
+    return len(sent)
+
+
+def drain(coalesce_seconds=None):
+    """Gửi hết các thông báo đã đến hạn, trả về (số mail, số thông báo)."""
+    release_stale()
+    messages = notices = 0
+    while True:
+        rows = claim_batch(coalesce_seconds)
+        if not rows:
+            return messages, notices
+        messages += send_batch(rows)
+        notices += len(rows)
+
+
+def _run():
+    # Lượt drain đầu tiên chạy ngay khi worker khởi động, sau đó mỗi MAIL_POLL_SECONDS hoặc khi có thông báo mới
+    while True:
+        with app.app_context():
+            try:
+                drain()
+            except Exception:
+                app.logger.exception("Worker gửi mail lỗi ngoài dự kiến")
+                db.session.rollback()
+        _wake.wait(app.config["MAIL_POLL_SECONDS"])
+        _wake.clear()
+
+
+def start_worker():
+    global _worker
+    if _worker is None:
+        with _lock:
+            if _worker is None:
+                _worker = threading.Thread(target=_run, name="mail-outbox", daemon=True)
+                _worker.start()
+
+
+@app.before_request
+def start_on_request():
+    """
+    Worker chạy ngay khi tiến trình web nhận request đầu tiên, không chờ thông báo mới: thông báo còn Pending
+    hoặc đang được nhận dở khi tiến trình trước dừng (release_stale) được gửi ở lượt drain đầu tiên.
+    """
+    if app.config["MAIL_WORKER"]:
+        start_worker()
+
+
+@event.listens_for(db.session, "after_commit")
+def wake_worker(session):
+    if session.info.pop("outbox_queued", False) and app.config["MAIL_WORKER"]:
+        start_worker()
+        _wake.set()
+
+
+@event.listens_for(db.session, "after_rollback")
+def forget_queued(session):
+    session.info.pop("outbox_queued", None)
@@ -0,0 +1,128 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+from applygo import app
+from applygo.cache import count_cache
+
+
+class Page:
+    def __init__(self, items, next_cursor=None, prev_cursor=None, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def _dump(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _load(value):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(values, direction="next"):
+    payload = json.dumps({"v": [_dump(v) for v in values], "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """Trả về (values, direction) hoặc (None, "next") nếu token rỗng/không hợp lệ."""
+    if not token:
+        return None, "next"
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        direction = payload.get("d", "next")
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        return [_load(v) for v in payload["v"]], direction
+    except (ValueError, KeyError, TypeError):
+        return None, "next"
+
+
+def _after(columns, values, descending):
+    """
+    Điều kiện (c1, c2, ...) đứng sau values theo thứ tự sắp xếp, viết bằng OR/AND cho mọi CSDL.
+    Thêm cận c1 <= v1 (dư về logic) để planner dùng được range scan trên index thay vì quét theo chuỗi OR.
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal, step))
+    bound = columns[0] <= values[0] if descending else columns[0] >= values[0]
+    return and_(bound, or_(*clauses))
+
+
+def keyset_paginate(query, columns, cursor=None, page_size=10, descending=True, total=None):
+    """
+    Phân trang theo khóa (vd. created_at, id) thay cho OFFSET: trang nào cũng chỉ là
+    một range scan trên index, không phụ thuộc trang đó sâu bao nhiêu.
+    """
+    values, direction = decode_cursor(cursor)
+    if values is not None and len(values) != len(columns):
+        values, direction = None, "next"
+
+    forward = direction == "next"
+    scan_desc = descending if forward else not descending
+    if values is not None:
+        query = query.filter(_after(columns, values, scan_desc))
+    order = [c.desc() if scan_desc else c.asc() for c in columns]
+    rows = query.order_by(*order).limit(page_size + 1).all()
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if not forward:
+        rows.reverse()
+
+    def key(row):
+        return [getattr(row, c.key) for c in columns]
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if (forward and has_more) or (not forward and values is not None):
+            next_cursor = encode_cursor(key(rows[-1]), "next")
+        if (forward and values is not None) or (not forward and has_more):
+            prev_cursor = encode_cursor(key(rows[0]), "prev")
+    return Page(rows, next_cursor, prev_cursor, total)
+
+
+def cursor_position(cursor):
+    values, _ = decode_cursor(cursor)
+    return values[0] if values and isinstance(values[0], int) and values[0] > 0 else 0
+
+
+def paginate_positions(ids, cursor=None, page_size=10):
+    """Phân trang một danh sách id đã xếp hạng sẵn trong bộ nhớ, cursor là vị trí bắt đầu."""
+    start = cursor_position(cursor)
+    page_ids = ids[start:start + page_size]
+    next_cursor = encode_cursor([start + page_size]) if start + page_size < len(ids) else None
+    prev_cursor = encode_cursor([max(start - page_size, 0)]) if start > 0 else None
+    return page_ids, next_cursor, prev_cursor
+
+
+def cached_count(key, query, tags=()):
+    """Đếm tổng số dòng, cache theo key; trả None nếu tắt PAGINATION_EXACT_TOTALS."""
+    if not app.config["PAGINATION_EXACT_TOTALS"]:
+        return None
+    total = count_cache.get(key)
+    if total is None:
+        total = query.order_by(None).count()
+        count_cache.set(key, total, tags=tags)
+    return total
@@ -0,0 +1,198 @@
+"""
+Băm mật khẩu có thể thay thuật toán, chi phí (cost) tự hiệu chỉnh theo ngân sách độ trễ
+PASSWORD_HASH_TARGET_MS trên máy đang chạy.
+
+Chuỗi lưu trong User.password: "<scheme>$<cost>$<salt>$<hash>"; mật khẩu cũ là MD5 hex
+không salt, vẫn kiểm tra được và được băm lại khi người dùng đăng nhập thành công.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from applygo import app
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+def _b64(data):
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _unb64(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+class PBKDF2Hasher:
+    scheme = "pbkdf2_sha256"
+    min_cost = 100_000  # số vòng lặp tối thiểu, không hạ thấp hơn dù máy chậm
+
+    def encode(self, password, cost):
+        salt = os.urandom(16)
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, cost)
+        return f"{self.scheme}${cost}${_b64(salt)}${_b64(digest)}"
+
+    def verify(self, password, cost, salt, digest):
+        return hmac.compare_digest(hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), _unb64(salt), cost),
+                                   _unb64(digest))
+
+    def scale(self, cost, factor):
+        return int(cost * factor) // 1000 * 1000
+
+
+class ScryptHasher:
+    scheme = "scrypt"
+    min_cost = 2 ** 14  # tham số N, r=8, p=1
+
+    def _hash(self, password, salt, cost):
+        return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=cost, r=8, p=1,
+                              maxmem=256 * cost * 8 + 1024 * 1024, dklen=32)
+
+    def encode(self, password, cost):
+        salt = os.urandom(16)
+        return f"{self.scheme}${cost}${_b64(salt)}${_b64(self._hash(password, salt, cost))}"
+
+    def verify(self, password, cost, salt, digest):
+        return hmac.compare_digest(self._hash(password, _unb64(salt), cost), _unb64(digest))
+
+    def scale(self, cost, factor):
+        # N phải là lũy thừa của 2
+        n = 1
+        while n * 2 <= cost * factor:
+            n *= 2
+        return n
+
+
+class MD5Hasher:
+    """Chỉ để kiểm tra mật khẩu cũ; không dùng để băm mật khẩu mới."""
+    scheme = "md5"
+
+    def verify(self, password, digest):
+        return hmac.compare_digest(hashlib.md5(password.encode("utf-8")).hexdigest(), digest)
+
+
+HASHERS = {hasher.scheme: hasher for hasher in (PBKDF2Hasher(), ScryptHasher())}
+legacy_md5 = MD5Hasher()
+
+_lock = threading.Lock()
+_cost = None
+_pool = None
+_pending = None
+
+
+def current_hasher():
+    return HASHERS[app.config["PASSWORD_HASHER"]]
+
+
+def measure(hasher, cost, rounds=3):
+    """Thời gian (giây) nhỏ nhất của một lần băm với cost cho trước."""
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        hasher.encode("calibration-password", cost)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def calibrate(hasher, target_ms):
+    """Cost lớn nhất để một lần băm mất khoảng target_ms trên máy này (không thấp hơn min_cost)."""
+    elapsed = measure(hasher, hasher.min_cost)
+    return max(hasher.min_cost, hasher.scale(hasher.min_cost, target_ms / 1000 / elapsed))
+
+
+def current_cost():
+    global _cost
+    if _cost is None:
+        with _lock:
+            if _cost is None:
+                _cost = app.config["PASSWORD_HASH_COST"] or \
+                        calibrate(current_hasher(), app.config["PASSWORD_HASH_TARGET_MS"])
+                app.logger.info("Password hash %s cost=%d", current_hasher().scheme, _cost)
+    return _cost
+
+
+def _submit(fn, *args):
+    """
+    Chạy việc băm trong pool giới hạn: các thread phục vụ request khác vẫn còn CPU,
+    và khi hàng đợi đầy thì từ chối ngay thay vì để đăng nhập xếp hàng mãi.
+    """
+    global _pool, _pending
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                workers = app.config["PASSWORD_HASH_WORKERS"]
+                _pending = threading.BoundedSemaphore(workers + app.config["PASSWORD_HASH_QUEUE"])
+                _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+
+    if not _pending.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        future = _pool.submit(fn, *args)
+    except Exception:
+        _pending.release()
+        raise
+    future.add_done_callback(lambda _: _pending.release())
+    try:
+        return future.result(timeout=app.config["PASSWORD_HASH_TIMEOUT"])
+    except TimeoutError:
+        future.cancel()
+        raise PasswordHasherBusy()
+
+
+def hash_password(password):
+    return _submit(current_hasher().encode, password, current_cost())
+
+
+def _parse(encoded):
+    """(scheme, cost, salt, hash) của chuỗi đã lưu, None nếu sai định dạng (vd. dữ liệu hỏng, sửa tay)."""
+    parts = encoded.split("$")
+    if len(parts) != 4 or not parts[1].isdigit():
+        return None
+    scheme, cost, salt, digest = parts
+    return scheme, int(cost), salt, digest
+
+
+def _verify(password, encoded):
+    if "$" not in encoded:
+        return legacy_md5.verify(password, encoded)
+    parsed = _parse(encoded)
+    hasher = HASHERS.get(parsed[0]) if parsed else None
+    if hasher is None:
+        return False
+    _, cost, salt, digest = parsed
+    try:
+        return hasher.verify(password, cost, salt, digest)
+    except ValueError:
+        # base64 hỏng hoặc cost không hợp lệ với thuật toán (vd. N của scrypt không là lũy thừa của 2)
+        return False
+
+
+def verify_password(password, encoded):
+    return _submit(_verify, password, encoded or "")
+
+
+def needs_rehash(encoded):
+    parsed = _parse(encoded) if "$" in encoded else None
+    if parsed is None:
+        return True
+    scheme, cost, _, _ = parsed
+    # Chừa 25% để các worker hiệu chỉnh lệch nhau một chút không băm lại qua lại
+    return scheme != current_hasher().scheme or cost < current_cost() * 0.75
+
+
+_dummy_hash = None
+
+
+def burn_verify(password):
+    """Tốn thời gian như một lần kiểm tra thật, để không lộ username nào tồn tại qua độ trễ."""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password("dummy-password")
+    verify_password(password, _dummy_hash)
+    return False
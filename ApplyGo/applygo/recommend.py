@@ -0,0 +1,420 @@
+"""
+Gợi ý việc làm cá nhân hóa cho trang chủ. Tin đang mở và ứng viên là vector TF-IDF thưa (scipy.sparse,
+hash RECOMMEND_FEATURES chiều); vector ứng viên gộp kỹ năng trong hồ sơ với trung bình các tin đã ứng tuyển
+gần đây. Điểm của cả một khối ứng viên với mọi tin đang mở là một phép nhân ma trận thưa; RECOMMEND_TOP_K
+tin tốt nhất được lưu vào job_recommendation nên trang chủ chỉ tra một dòng theo khóa.
+Khi hồ sơ, đơn ứng tuyển hoặc tin thay đổi, thread nền chỉ tính lại các ứng viên bị ảnh hưởng.
+"""
+import queue
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import String, cast, insert
+
+from applygo import app, db
+from applygo.models import Job, JobStatus, Application, CandidateProfile, JobRecommendation
+from applygo.similar import BLOCK_ELEMENTS, FIELD_WEIGHTS, text_buckets
+
+PROFILE_FIELDS = {
+    "skills": 1,
+}
+
+# Vector ứng viên = SKILL_WEIGHT * kỹ năng + (1 - SKILL_WEIGHT) * lịch sử ứng tuyển (cả hai đã chuẩn hóa)
+SKILL_WEIGHT = 0.6
+
+
+def term_frequencies(docs, features, field_weights):
+    """Như similar.term_frequencies nhưng trả về CSR: rất nhiều chiều, mỗi dòng chỉ vài chục từ."""
+    rows, columns, weights = [], [], []
+    for i, fields in enumerate(docs):
+        for name, weight in field_weights.items():
+            buckets = text_buckets(fields.get(name) or "", features)
+            rows.extend([i] * len(buckets))
+            columns.extend(buckets)
+            weights.extend([weight] * len(buckets))
+    # Các từ trùng bucket được cộng dồn khi chuyển sang CSR
+    tf = sparse.csr_matrix((np.asarray(weights, dtype=np.float32),
+                            (np.asarray(rows, dtype=np.int64), np.asarray(columns, dtype=np.int64))),
+                           shape=(len(docs), features))
+    tf.sum_duplicates()
+    tf.data = 1 + np.log(tf.data)
+    return tf
+
+
+def normalize(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    scale = np.divide(1, norms, out=np.zeros_like(norms), where=norms > 0)
+    return sparse.csr_matrix(sparse.diags(scale.astype(np.float32)) @ matrix)
+
+
+def top_k(scores, k):
+    """(cột, điểm) giảm dần tốt nhất của từng dòng CSR; argpartition trên từng khối dòng chuyển sang mảng đặc."""
+    n, m = scores.shape
+    k = min(k, m)
+    if k == 0:
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+        return [empty] * n
+    result = []
+    # Tin cùng lĩnh vực có chung nhiều từ nên ma trận điểm thường gần như đặc
+    block = max(1, BLOCK_ELEMENTS // m)
+    for start in range(0, n, block):
+        dense = scores[start:start + block].toarray()
+        top = np.argpartition(dense, m - k, axis=1)[:, m - k:]
+        values = np.take_along_axis(dense, top, axis=1)
+        order = np.argsort(-values, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        values = np.take_along_axis(values, order, axis=1)
+        result.extend((columns[row > 0], row[row > 0]) for columns, row in zip(top, values))
+    return result
+
+
+def needs_compaction(total_rows, live_rows):
+    """Dòng chết (tin đã sửa/đóng, hồ sơ đã sửa) vượt RECOMMEND_COMPACT_RATIO tổng số dòng."""
+    return total_rows - live_rows > app.config["RECOMMEND_COMPACT_RATIO"] * max(total_rows, 1)
+
+
+def compact(matrix, ids, rows):
+    """Bỏ các dòng chết: (ma trận, ids, {id: dòng}) chỉ còn các dòng trong rows, giữ thứ tự cũ."""
+    live = np.asarray(sorted(rows.values()), dtype=np.int64)
+    ids = ids[live]
+    return matrix[live], ids, {int(item_id): row for row, item_id in enumerate(ids)}
+
+
+class JobMatrix:
+    """Các tin đang mở: CSR (số tin x số chiều) đã nhân idf và chuẩn hóa L2, cùng bản chuyển vị để nhân."""
+
+    def __init__(self, features):
+        self.features = features
+        self.idf = np.ones(features, dtype=np.float32)
+        self.matrix = sparse.csr_matrix((0, features), dtype=np.float32)
+        self.transposed = self.matrix.T.tocsr()
+        self.job_ids = np.zeros(0, dtype=np.int64)
+        self.rows = {}  # job_id -> vị trí dòng
+        # Vector kỹ năng của mọi ứng viên, dựng khi cần chọn người tính lại cho tin mới
+        self.skills = None
+        self.profile_ids = None
+        self.profile_rows = {}  # id hồ sơ -> vị trí dòng trong skills
+        self.built_at = time.monotonic()
+
+    def vectorize(self, tf):
+        return normalize(tf @ sparse.diags(self.idf))
+
+    def build(self, job_ids, docs):
+        tf = term_frequencies(docs, self.features, FIELD_WEIGHTS)
+        df = np.bincount(tf.indices, minlength=self.features)
+        self.idf = (np.log((1 + len(docs)) / (1 + df)) + 1).astype(np.float32)
+        self.matrix = self.vectorize(tf)
+        self.transposed = self.matrix.T.tocsr()
+        self.job_ids = np.asarray(job_ids, dtype=np.int64)
+        self.rows = {job_id: row for row, job_id in enumerate(job_ids)}
+
+    def _drop(self, job_id):
+        # Dòng cũ thành 0: điểm 0 không bao giờ lọt vào danh sách gợi ý
+        row = self.rows.pop(job_id, None)
+        if row is not None:
+            self.matrix.data[self.matrix.indptr[row]:self.matrix.indptr[row + 1]] = 0
+
+    def _compact(self):
+        if needs_compaction(len(self.job_ids), len(self.rows)):
+            self.matrix, self.job_ids, self.rows = compact(self.matrix, self.job_ids, self.rows)
+
+    def add(self, job_id, fields):
+        """Thêm hoặc cập nhật một tin, trả về vector của tin."""
+        vector = self.vectorize(term_frequencies([fields], self.features, FIELD_WEIGHTS))
+        self._drop(job_id)
+        self.rows[job_id] = len(self.job_ids)
+        self.job_ids = np.append(self.job_ids, job_id)
+        self.matrix = sparse.vstack([self.matrix, vector], format="csr")
+        self.matrix.eliminate_zeros()
+        self._compact()
+        self.transposed = self.matrix.T.tocsr()
+        return vector
+
+    def remove(self, job_id):
+        self._drop(job_id)
+        self.matrix.eliminate_zeros()
+        self._compact()
+        self.transposed = self.matrix.T.tocsr()
+
+    def update_skills(self, profiles):
+        """
+        Cập nhật ảnh chụp kỹ năng cho các hồ sơ (id, skills) vừa đổi: dòng cũ thành 0, thêm dòng mới ở cuối,
+        kể cả hồ sơ tạo sau khi dựng ảnh chụp. Chưa có ảnh chụp thì lần dựng sau sẽ đọc từ DB.
+        """
+        if self.skills is None or not profiles:
+            return
+        vectors = self.vectorize(term_frequencies([dict(skills=p.skills) for p in profiles], self.features,
+                                                  PROFILE_FIELDS))
+        for profile in profiles:
+            row = self.profile_rows.pop(profile.id, None)
+            if row is not None:
+                self.skills.data[self.skills.indptr[row]:self.skills.indptr[row + 1]] = 0
+        start = len(self.profile_ids)
+        self.profile_rows.update({profile.id: start + i for i, profile in enumerate(profiles)})
+        self.profile_ids = np.append(self.profile_ids, [profile.id for profile in profiles])
+        self.skills = sparse.vstack([self.skills, vectors], format="csr")
+        self.skills.eliminate_zeros()
+        if needs_compaction(len(self.profile_ids), len(self.profile_rows)):
+            self.skills, self.profile_ids, self.profile_rows = compact(self.skills, self.profile_ids,
+                                                                       self.profile_rows)
+
+    def vectors(self, job_ids, docs):
+        """Vector của các tin theo thứ tự job_ids: tin đang mở lấy từ ma trận, còn lại tính từ docs (id -> trường)."""
+        known = [i for i, job_id in enumerate(job_ids) if job_id in self.rows]
+        unknown = [i for i, job_id in enumerate(job_ids) if job_id not in self.rows]
+        stacked = sparse.vstack([
+            self.matrix[[self.rows[job_ids[i]] for i in known]],
+            self.vectorize(term_frequencies([docs.get(job_ids[i], {}) for i in unknown], self.features,
+                                            FIELD_WEIGHTS)),
+        ], format="csr")
+        return stacked[np.argsort(known + unknown)]
+
+
+def _fields(job):
+    return dict(title=job.title, requirements=job.requirements, description=job.description)
+
+
+def build_matrix():
+    rows = db.session.query(Job.id, Job.title, Job.requirements, Job.description) \
+        .filter(Job.status == JobStatus.OPEN.value).order_by(Job.id).all()
+    model = JobMatrix(app.config["RECOMMEND_FEATURES"])
+    model.build([row.id for row in rows], [_fields(row) for row in rows])
+    return model
+
+
+def _applications(profile_ids):
+    """({hồ sơ: id các tin ứng tuyển gần nhất}, {hồ sơ: mọi tin đã ứng tuyển})."""
+    history, applied = {}, {}
+    limit = app.config["RECOMMEND_HISTORY"]
+    rows = db.session.query(Application.candidate_profile_id, Application.job_id) \
+        .filter(Application.candidate_profile_id.in_(profile_ids)) \
+        .order_by(Application.applied_at.desc(), Application.id.desc())
+    for profile_id, job_id in rows:
+        applied.setdefault(profile_id, set()).add(job_id)
+        recent = history.setdefault(profile_id, [])
+        if len(recent) < limit:
+            recent.append(job_id)
+    return history, applied
+
+
+def _history_vectors(model, profile_ids, history):
+    """Trung bình (chuẩn hóa) vector các tin ứng tuyển gần đây của từng ứng viên: A (ứng viên x tin) @ tin."""
+    job_ids = sorted({job_id for jobs in history.values() for job_id in jobs})
+    missing = [job_id for job_id in job_ids if job_id not in model.rows]
+    docs = {}
+    if missing:
+        # Tin đã đóng vẫn nói lên sở thích của ứng viên
+        docs = {row.id: _fields(row) for row in db.session.query(Job.id, Job.title, Job.requirements,
+                                                                  Job.description).filter(Job.id.in_(missing))}
+    columns = {job_id: i for i, job_id in enumerate(job_ids)}
+    rows, cols, weights = [], [], []
+    for i, profile_id in enumerate(profile_ids):
+        jobs = history.get(profile_id)
+        if not jobs:
+            continue
+        rows.extend([i] * len(jobs))
+        cols.extend(columns[job_id] for job_id in jobs)
+        weights.extend([1 / len(jobs)] * len(jobs))
+    averages = sparse.csr_matrix((np.asarray(weights, dtype=np.float32), (rows, cols)),
+                                 shape=(len(profile_ids), len(job_ids)))
+    return normalize(averages @ model.vectors(job_ids, docs))
+
+
+def score(model, profiles, top=None):
+    """{id hồ sơ: [[job_id, điểm], ...]} cho các hồ sơ (id, skills), bỏ các tin đã ứng tuyển."""
+    top = top or app.config["RECOMMEND_TOP_K"]
+    profile_ids = [p.id for p in profiles]
+    history, applied = _applications(profile_ids)
+    skills = model.vectorize(term_frequencies([dict(skills=p.skills) for p in profiles], model.features,
+                                              PROFILE_FIELDS))
+    vectors = SKILL_WEIGHT * skills + (1 - SKILL_WEIGHT) * _history_vectors(model, profile_ids, history)
+    scores = sparse.csr_matrix(vectors @ model.transposed)
+
+    rows, cols = [], []
+    for i, profile_id in enumerate(profile_ids):
+        seen = [model.rows[job_id] for job_id in applied.get(profile_id, ()) if job_id in model.rows]
+        rows.extend([i] * len(seen))
+        cols.extend(seen)
+    if rows:
+        mask = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=scores.shape)
+        scores = sparse.csr_matrix(scores - scores.multiply(mask))
+    scores.eliminate_zeros()
+
+    return {profile_id: [[int(model.job_ids[c]), round(float(s), 4)] for c, s in zip(columns, values)]
+            for profile_id, (columns, values) in zip(profile_ids, top_k(scores, top))}
+
+
+def _store(results):
+    if not results:
+        return
+    now = datetime.now()
+    db.session.query(JobRecommendation) \
+        .filter(JobRecommendation.candidate_profile_id.in_(list(results))) \
+        .delete(synchronize_session=False)
+    db.session.execute(insert(JobRecommendation), [
+        dict(candidate_profile_id=profile_id, items=items, computed_at=now) for profile_id, items in results.items()
+    ])
+    db.session.commit()
+
+
+def _profiles(after_id=None, ids=None, limit=None):
+    query = db.session.query(CandidateProfile.id, CandidateProfile.skills)
+    if ids is not None:
+        query = query.filter(CandidateProfile.id.in_(ids))
+    if after_id is not None:
+        query = query.filter(CandidateProfile.id > after_id)
+    return query.order_by(CandidateProfile.id).limit(limit).all()
+
+
+def rebuild(batch_size=None, log=None):
+    """Tính lại gợi ý của mọi ứng viên theo khối id tăng dần; trả về số ứng viên đã tính."""
+    global _matrix
+    batch_size = batch_size or app.config["RECOMMEND_BATCH_SIZE"]
+    started = time.perf_counter()
+    model = build_matrix()
+    if log:
+        log(f"Ma trận {model.matrix.shape[0]} tin đang mở, {model.matrix.nnz} phần tử khác 0 "
+            f"({time.perf_counter() - started:.1f}s)")
+    total, last_id = 0, 0
+    while True:
+        profiles = _profiles(after_id=last_id, limit=batch_size)
+        if not profiles:
+            break
+        _store(score(model, profiles))
+        total += len(profiles)
+        last_id = profiles[-1].id
+        if log:
+            elapsed = time.perf_counter() - started
+            log(f"{total} ứng viên ({total / max(elapsed, 1e-9):.0f} ứng viên/s)")
+    _matrix = None
+    return total
+
+
+_matrix = None
+_updates = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _current_matrix():
+    global _matrix
+    if _matrix is None or time.monotonic() - _matrix.built_at > app.config["RECOMMEND_MATRIX_TTL"]:
+        _matrix = build_matrix()
+    return _matrix
+
+
+def _index_skills(model):
+    batch_size = app.config["RECOMMEND_BATCH_SIZE"]
+    blocks, profile_ids, last_id = [sparse.csr_matrix((0, model.features), dtype=np.float32)], [], 0
+    while True:
+        profiles = _profiles(after_id=last_id, limit=batch_size)
+        if not profiles:
+            break
+        blocks.append(model.vectorize(term_frequencies([dict(skills=p.skills) for p in profiles], model.features,
+                                                       PROFILE_FIELDS)))
+        profile_ids.extend(p.id for p in profiles)
+        last_id = profiles[-1].id
+    model.skills = sparse.vstack(blocks, format="csr")
+    model.profile_ids = np.asarray(profile_ids, dtype=np.int64)
+    model.profile_rows = {profile_id: row for row, profile_id in enumerate(profile_ids)}
+
+
+def _holders(job_id):
+    """Các ứng viên có tin job_id trong danh sách gợi ý đã lưu."""
+    # items lưu dạng [[job_id, điểm], ...]: lọc thô bằng LIKE cho mọi CSDL rồi kiểm tra lại trên JSON
+    rows = db.session.query(JobRecommendation.candidate_profile_id, JobRecommendation.items) \
+        .filter(cast(JobRecommendation.items, String).like(f"%[{job_id},%"))
+    return [profile_id for profile_id, items in rows if any(item[0] == job_id for item in items)]
+
+
+def _job_changed(model, job_id):
+    """
+    Cập nhật ma trận; trả về các ứng viên cần tính lại: với tin đang mở là những người có kỹ năng gần tin nhất,
+    với tin đã đóng/xóa là những người đang có tin trong danh sách gợi ý (nếu không sẽ thấy ít tin hơn).
+    """
+    job = db.session.query(Job.id, Job.title, Job.requirements, Job.description, Job.status) \
+        .filter(Job.id == job_id).first()
+    if job is None or job.status != JobStatus.OPEN.value:
+        model.remove(job_id)
+        return _holders(job_id)
+    vector = model.add(job_id, _fields(job))
+    if model.skills is None:
+        _index_skills(model)
+    scores = (model.skills @ vector.T).toarray().ravel()
+    candidates = np.flatnonzero(scores > 0)
+    fanout = app.config["RECOMMEND_JOB_FANOUT"]
+    if len(candidates) > fanout:
+        candidates = candidates[np.argpartition(-scores[candidates], fanout)[:fanout]]
+    return model.profile_ids[candidates].tolist()
+
+
+def _run():
+    while True:
+        # Gộp các thay đổi đang chờ: một ứng viên chỉ tính lại một lần
+        items = [_updates.get()]
+        while True:
+            try:
+                items.append(_updates.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            with app.app_context():
+                model = _current_matrix()
+                changed = {item_id for kind, item_id in items if kind == "profile"}
+                batch_size = app.config["RECOMMEND_BATCH_SIZE"]
+                # Hồ sơ vừa sửa/tạo: cập nhật ảnh chụp kỹ năng trước để tin mới sau đó chọn đúng ứng viên
+                changed_ids = sorted(changed)
+                for start in range(0, len(changed_ids), batch_size):
+                    model.update_skills(_profiles(ids=changed_ids[start:start + batch_size]))
+                profile_ids = set(changed)
+                for job_id in sorted({item_id for kind, item_id in items if kind == "job"}):
+                    profile_ids.update(_job_changed(model, job_id))
+                profile_ids = sorted(profile_ids)
+                for start in range(0, len(profile_ids), batch_size):
+                    _store(score(model, _profiles(ids=profile_ids[start:start + batch_size])))
+        except Exception:
+            app.logger.exception("Không cập nhật được gợi ý việc làm (%s)", items)
+
+
+def _submit(kind, item_id):
+    global _worker
+    if not app.config["RECOMMEND_WORKER"]:
+        return
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = threading.Thread(target=_run, name="job-recommendations", daemon=True)
+                _worker.start()
+    _updates.put((kind, item_id))
+
+
+def invalidate():
+    """Bỏ ma trận trong bộ nhớ (vd. sau khi sinh lại dữ liệu), dựng lại ở lần cập nhật tiếp theo."""
+    global _matrix
+    _matrix = None
+
+
+def refresh_profile(profile_id):
+    """Gọi sau khi commit thay đổi hồ sơ hoặc ứng tuyển."""
+    _submit("profile", profile_id)
+
+
+def update_job(job_id):
+    """Gọi sau khi commit tạo/sửa tin; tin không còn mở sẽ bị bỏ khỏi ma trận."""
+    _submit("job", job_id)
+
+
+def remove_job(job_id):
+    _submit("job", job_id)
+
+
+def recommended_job_ids(profile_id):
+    """id các tin gợi ý theo điểm giảm dần (có thể gồm tin đã đóng), None nếu chưa tính cho ứng viên này."""
+    row = db.session.get(JobRecommendation, profile_id)
+    if row is None:
+        refresh_profile(profile_id)
+        return None
+    return [job_id for job_id, _ in row.items]
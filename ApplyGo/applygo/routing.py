@@ -0,0 +1,101 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from flask import g, request, session as flask_session, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+from applygo import app
+
+# Đang trong một lời gọi DAO chỉ đọc (xem read_only / replica_reads)
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+def replica_keys():
+    return app.config["DB_REPLICAS"]
+
+
+@contextmanager
+def replica_reads():
+    """Cho phép các câu SELECT trong khối lệnh chạy trên replica."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def read_only(f):
+    """Đánh dấu hàm DAO chỉ đọc: SELECT của nó được gửi sang replica."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        with replica_reads():
+            return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def is_sticky():
+    """Người dùng vừa ghi dữ liệu: đọc từ primary một thời gian để thấy ngay thay đổi của mình."""
+    return has_request_context() and flask_session.get("db_primary_until", 0) > time.time()
+
+
+def wants_replica():
+    if not replica_keys() or is_sticky():
+        return False
+    if _replica_reads.get():
+        return True
+    return has_request_context() and g.get("db_read_only", False)
+
+
+class RoutingSession(Session):
+    """
+    Ghi (flush, INSERT/UPDATE/DELETE) luôn vào primary; SELECT trong request GET hoặc
+    hàm DAO chỉ đọc thì vào replica. Khi session đã ghi thì mọi lệnh sau đó về primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if clause is not None and not getattr(clause, "is_select", False):
+                self.info["db_wrote"] = True
+            elif not self._flushing and not self.info.get("db_wrote") and wants_replica():
+                return self._db.engines[self._pick_replica()]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _pick_replica(self):
+        # Một request chỉ đọc từ một replica để các trang không bị "nhảy" dữ liệu giữa các câu SELECT
+        if has_request_context():
+            if "db_replica" not in g:
+                g.db_replica = random.choice(replica_keys())
+            return g.db_replica
+        return random.choice(replica_keys())
+
+
+def mark_read_only_request():
+    g.db_read_only = request.method in ("GET", "HEAD")
+
+
+def mark_write(session, flush_context, instances):
+    if session.new or session.dirty or session.deleted:
+        session.info["db_wrote"] = True
+
+
+def remember_write(session):
+    if session.info.pop("db_wrote", False) and has_request_context() and replica_keys():
+        flask_session["db_primary_until"] = time.time() + app.config["REPLICA_STICKY_SECONDS"]
+
+
+def forget_write(session):
+    session.info.pop("db_wrote", None)
+
+
+def init_app(app, db):
+    if not replica_keys():
+        return
+    app.before_request(mark_read_only_request)
+    event.listen(db.session, "before_flush", mark_write)
+    event.listen(db.session, "after_commit", remember_write)
+    event.listen(db.session, "after_rollback", forget_write)
@@ -0,0 +1,221 @@
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+from applygo import app, db, changes
+from applygo.models import Job, Company
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Trọng số theo trường: tiêu đề quan trọng hơn mô tả
+FIELD_WEIGHTS = {
+    "title": 3,
+    "company": 2,
+    "requirements": 1,
+    "description": 1,
+}
+
+
+def fold(text):
+    """Bỏ dấu tiếng Việt và chuyển về chữ thường: "Hà Nội" -> "ha noi"."""
+    if not text:
+        return ""
+    text = text.replace("đ", "d").replace("Đ", "D")
+    text = unicodedata.normalize("NFD", text)
+    text = "".join(ch for ch in text if unicodedata.category(ch) != "Mn")
+    return text.lower()
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(fold(text))
+
+
+class JobSearchIndex:
+    """Inverted index trong bộ nhớ cho Job, xếp hạng theo BM25."""
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)  # term -> {job_id: tf}
+        self.doc_terms = {}  # job_id -> {term: tf}
+        self.doc_len = {}
+        self.total_len = 0
+        self.built = False
+        self.lock = threading.RLock()
+
+    def _terms(self, fields):
+        terms = defaultdict(int)
+        for name, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(fields.get(name)):
+                terms[token] += weight
+        return terms
+
+    def add(self, job_id, **fields):
+        terms = self._terms(fields)
+        with self.lock:
+            self._remove(job_id)
+            for term, tf in terms.items():
+                self.postings[term][job_id] = tf
+            self.doc_terms[job_id] = terms
+            length = sum(terms.values())
+            self.doc_len[job_id] = length
+            self.total_len += length
+
+    def remove(self, job_id):
+        with self.lock:
+            self._remove(job_id)
+
+    def _remove(self, job_id):
+        terms = self.doc_terms.pop(job_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(job_id, None)
+                if not docs:
+                    del self.postings[term]
+        self.total_len -= self.doc_len.pop(job_id, 0)
+
+    def clear(self):
+        with self.lock:
+            self.postings.clear()
+            self.doc_terms.clear()
+            self.doc_len.clear()
+            self.total_len = 0
+            self.built = False
+
+    def search(self, query, limit=None):
+        """Trả về danh sách (job_id, score) chứa tất cả từ khóa, điểm giảm dần."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        with self.lock:
+            n_docs = len(self.doc_len)
+            if n_docs == 0:
+                return []
+            postings = [self.postings.get(t) for t in terms]
+            if not all(postings):
+                return []
+
+            # Giao các posting list, bắt đầu từ list ngắn nhất
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for docs in postings[1:]:
+                candidates.intersection_update(docs)
+                if not candidates:
+                    return []
+
+            avg_len = self.total_len / n_docs
+            scores = dict.fromkeys(candidates, 0.0)
+            for docs in postings:
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                for job_id in candidates:
+                    tf = docs[job_id]
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_len[job_id] / avg_len)
+                    scores[job_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        key = lambda item: (item[1], item[0])
+        if limit:
+            return heapq.nlargest(limit, scores.items(), key=key)
+        return sorted(scores.items(), key=key, reverse=True)
+
+
+job_index = JobSearchIndex()
+_build_lock = threading.RLock()
+_rebuilding = threading.Event()
+_feed = changes.ChangeFeed()
+
+
+def _job_rows(*criteria):
+    return db.session.query(Job.id, Job.title, Job.description, Job.requirements, Company.name) \
+        .join(Company, Job.company_id == Company.id).filter(*criteria)
+
+
+def build_index():
+    """Dựng index mới rồi mới thay index cũ: các request vẫn tìm trên index cũ trong lúc dựng."""
+    global job_index
+    with _build_lock:
+        _feed.mark()
+        index = JobSearchIndex()
+        for job_id, title, description, requirements, company_name in _job_rows():
+            index.add(job_id, title=title, description=description,
+                      requirements=requirements, company=company_name)
+        index.built = True
+        job_index = index
+
+
+def ensure_index():
+    # Worker mới chưa có index nào để tìm: dựng ngay trong request đầu tiên
+    if not job_index.built:
+        with _build_lock:
+            if not job_index.built:
+                build_index()
+
+
+def _rebuild():
+    try:
+        with app.app_context():
+            build_index()
+    except Exception:
+        app.logger.exception("Không dựng lại được search index")
+    finally:
+        _rebuilding.clear()
+
+
+def rebuild_in_background():
+    if _rebuilding.is_set():
+        return
+    _rebuilding.set()
+    threading.Thread(target=_rebuild, name="search-index", daemon=True).start()
+
+
+def invalidate():
+    """Dựng lại index trong thread nền (vd. sau khi xóa công ty kéo theo nhiều tin)."""
+    if job_index.built:
+        rebuild_in_background()
+
+
+def sync():
+    """Áp dụng các thay đổi trong job_change, kể cả của worker khác, vào index của worker này."""
+    job_ids = _feed.poll()
+    if not job_ids:
+        return
+    if changes.REBUILD in job_ids:
+        rebuild_in_background()
+        return
+    index = job_index
+    found = set()
+    for job_id, title, description, requirements, company_name in _job_rows(Job.id.in_(job_ids)):
+        index.add(job_id, title=title, description=description, requirements=requirements, company=company_name)
+        found.add(job_id)
+    for job_id in set(job_ids) - found:
+        index.remove(job_id)
+
+
+def index_job(job):
+    if not job_index.built:
+        return
+    job_index.add(job.id, title=job.title, description=job.description,
+                  requirements=job.requirements, company=job.company.name if job.company else None)
+
+
+def remove_job(job_id):
+    if job_index.built:
+        job_index.remove(job_id)
+
+
+def index_company_jobs(company):
+    for job in company.jobs:
+        index_job(job)
+
+
+def search_job_ids(keyword, limit=None):
+    """Mọi job chứa đủ từ khóa, điểm giảm dần; các bộ lọc SQL áp dụng sau trên toàn bộ danh sách."""
+    ensure_index()
+    sync()
+    return [job_id for job_id, _ in job_index.search(keyword, limit=limit)]
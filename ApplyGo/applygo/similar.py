@@ -0,0 +1,292 @@
+"""
+Gợi ý "việc làm tương tự" theo nội dung: tiêu đề, yêu cầu và mô tả của các tin đang mở được
+vector hóa TF-IDF trên không gian hash SIMILAR_FEATURES chiều (NumPy, float32, chuẩn hóa L2).
+Danh sách SIMILAR_TOP_K láng giềng cosine của mọi tin được tính sẵn bằng nhân ma trận theo khối
+trong thread nền; khi một tin thay đổi (kể cả ở worker khác, đọc qua bảng job_change) chỉ cập nhật các
+dòng bị ảnh hưởng. job_detail chỉ tra danh sách.
+"""
+import queue
+import threading
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+from applygo import app, db, changes
+from applygo.models import Job, JobStatus
+from applygo.search import tokenize
+
+# Trọng số theo trường: tiêu đề và yêu cầu nói rõ công việc hơn mô tả
+FIELD_WEIGHTS = {
+    "title": 3,
+    "requirements": 2,
+    "description": 1,
+}
+
+# Số phần tử tối đa của một khối điểm (khối x số tin) khi tính láng giềng, ~64MB float32
+BLOCK_ELEMENTS = 2 ** 24
+
+
+@lru_cache(maxsize=65536)
+def word_buckets(word, features):
+    # Từ lặp lại rất nhiều giữa các hồ sơ/tin: chỉ bỏ dấu và hash mỗi từ một lần
+    return tuple(zlib.crc32(token.encode()) % features for token in tokenize(word))
+
+
+def text_buckets(text, features):
+    """
+    Bucket của các từ trong text. Cache theo từng từ (tách theo khoảng trắng, không đổi kết quả tokenize)
+    thay vì theo cả chuỗi: mô tả dài gần như không lặp lại, cache theo chuỗi chỉ giữ các chuỗi lớn trong bộ nhớ.
+    """
+    return [bucket for word in text.split() for bucket in word_buckets(word, features)]
+
+
+def term_frequencies(docs, features, field_weights=FIELD_WEIGHTS):
+    """
+    Ma trận tf (len(docs) x features) của các dict trường -> văn bản: mỗi từ vào bucket crc32(từ) % features
+    với trọng số của trường, tf tăng chậm dần: 1 + log(tf).
+    """
+    positions, weights = [], []
+    for i, fields in enumerate(docs):
+        offset = i * features
+        for name, weight in field_weights.items():
+            buckets = text_buckets(fields.get(name) or "", features)
+            positions.extend(offset + b for b in buckets)
+            weights.extend([weight] * len(buckets))
+    tf = np.bincount(np.asarray(positions, dtype=np.int64), weights=np.asarray(weights, dtype=np.float32),
+                     minlength=len(docs) * features).astype(np.float32).reshape(len(docs), features)
+    present = tf > 0
+    np.log(tf, out=tf, where=present)
+    tf[present] += 1
+    return tf
+
+
+def normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+class SimilarJobIndex:
+
+    def __init__(self, features=512, top_k=10):
+        self.features = features
+        self.top_k = top_k
+        self.lock = threading.RLock()
+        self.matrix = np.zeros((0, features), dtype=np.float32)
+        self.idf = np.ones(features, dtype=np.float32)
+        self.job_ids = np.zeros(0, dtype=np.int64)
+        self.alive = np.zeros(0, dtype=bool)
+        self.neighbors = np.zeros((0, top_k), dtype=np.int64)  # vị trí dòng, -1: trống
+        self.scores = np.zeros((0, top_k), dtype=np.float32)
+        self.rows = {}  # job_id -> vị trí dòng
+        self.size = 0
+        self.built = False
+
+    def term_frequencies(self, docs):
+        return term_frequencies(docs, self.features)
+
+    def vectorize(self, tf):
+        return normalize(tf * self.idf)
+
+    def build(self, job_ids, docs):
+        tf = self.term_frequencies(docs)
+        df = np.count_nonzero(tf, axis=0)
+        idf = (np.log((1 + len(docs)) / (1 + df)) + 1).astype(np.float32)
+        with self.lock:
+            self.idf = idf
+            self.matrix = self.vectorize(tf)
+            self.job_ids = np.asarray(job_ids, dtype=np.int64)
+            self.alive = np.ones(len(job_ids), dtype=bool)
+            self.rows = {job_id: row for row, job_id in enumerate(job_ids)}
+            self.size = len(job_ids)
+            self.neighbors = np.full((self.size, self.top_k), -1, dtype=np.int64)
+            self.scores = np.zeros((self.size, self.top_k), dtype=np.float32)
+            self.refresh(np.arange(self.size))
+            self.built = True
+
+    def refresh(self, rows):
+        """Tính lại láng giềng của các dòng `rows`: nhân với toàn bộ ma trận theo khối, giữ top_k."""
+        if self.size == 0 or len(rows) == 0:
+            return
+        matrix = self.matrix[:self.size]
+        dead = np.flatnonzero(~self.alive[:self.size])
+        block = max(1, BLOCK_ELEMENTS // self.size)
+        k = min(self.top_k, self.size)
+        for start in range(0, len(rows), block):
+            chunk = rows[start:start + block]
+            scores = self.matrix[chunk] @ matrix.T
+            if len(dead):
+                scores[:, dead] = -np.inf
+            scores[np.arange(len(chunk)), chunk] = -np.inf
+            top = np.argpartition(scores, self.size - k, axis=1)[:, self.size - k:]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            # Chỉ giữ tin thật sự có từ chung (cosine > 0)
+            valid = top_scores > 0
+            self.neighbors[chunk] = -1
+            self.scores[chunk] = 0
+            self.neighbors[chunk, :k] = np.where(valid, top, -1)
+            self.scores[chunk, :k] = np.where(valid, top_scores, 0)
+
+    def _grow(self):
+        capacity = max(16, len(self.matrix) * 2)
+        self.matrix = np.resize(self.matrix, (capacity, self.features))
+        self.job_ids = np.resize(self.job_ids, capacity)
+        self.alive = np.resize(self.alive, capacity)
+        self.neighbors = np.resize(self.neighbors, (capacity, self.top_k))
+        self.scores = np.resize(self.scores, (capacity, self.top_k))
+
+    def add(self, job_id, **fields):
+        """Thêm hoặc cập nhật một tin: tính lại danh sách của nó và của các tin từng/ nay có nó là láng giềng."""
+        vector = self.vectorize(self.term_frequencies([fields]))[0]
+        with self.lock:
+            row = self.rows.get(job_id)
+            if row is None:
+                if self.size == len(self.matrix):
+                    self._grow()
+                row = self.size
+                self.size += 1
+                self.rows[job_id] = row
+                self.job_ids[row] = job_id
+            self.matrix[row] = vector
+            self.alive[row] = True
+
+            scores = self.matrix[:self.size] @ vector
+            scores[~self.alive[:self.size]] = -np.inf
+            scores[row] = -np.inf
+            neighbors = self.neighbors[:self.size]
+            # Dòng đang có tin này, hoặc điểm mới vượt láng giềng yếu nhất (kể cả chỗ trống)
+            weakest = np.where(neighbors[:, -1] < 0, 0, self.scores[:self.size, -1])
+            affected = np.flatnonzero((neighbors == row).any(axis=1) | ((scores > weakest) & (scores > 0)))
+            self.refresh(np.append(affected, row))
+
+    def remove(self, job_id):
+        with self.lock:
+            row = self.rows.pop(job_id, None)
+            if row is None:
+                return
+            self.alive[row] = False
+            self.matrix[row] = 0
+            self.neighbors[row] = -1
+            affected = np.flatnonzero((self.neighbors[:self.size] == row).any(axis=1))
+            self.refresh(affected)
+
+    def similar(self, job_id, limit):
+        """id các tin tương tự theo điểm giảm dần, None nếu tin không có trong index."""
+        with self.lock:
+            row = self.rows.get(job_id)
+            if row is None:
+                return None
+            neighbors = self.neighbors[row]
+            return [int(self.job_ids[n]) for n in neighbors[neighbors >= 0][:limit]]
+
+
+def new_index():
+    return SimilarJobIndex(features=app.config["SIMILAR_FEATURES"], top_k=app.config["SIMILAR_TOP_K"])
+
+
+similar_index = new_index()
+
+_updates = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+_requested = threading.Event()
+_feed = changes.ChangeFeed()
+REBUILD = "rebuild"
+
+
+def _fields(job):
+    return dict(title=job.title, requirements=job.requirements, description=job.description)
+
+
+def build_index():
+    """Dựng index mới rồi mới thay thế index cũ: request không phải chờ trong lúc dựng."""
+    global similar_index
+    _feed.mark()
+    rows = db.session.query(Job.id, Job.title, Job.requirements, Job.description) \
+        .filter(Job.status == JobStatus.OPEN.value).order_by(Job.id).all()
+    index = new_index()
+    index.build([row.id for row in rows], [_fields(row) for row in rows])
+    similar_index = index
+
+
+def _apply(job_id):
+    job = db.session.query(Job.id, Job.title, Job.requirements, Job.description, Job.status) \
+        .filter(Job.id == job_id).first()
+    if job is None or job.status != JobStatus.OPEN.value:
+        similar_index.remove(job_id)
+    else:
+        similar_index.add(job_id, **_fields(job))
+
+
+def _sync():
+    """Áp dụng các thay đổi tin do worker khác ghi vào job_change kể từ lần dựng/đọc trước."""
+    job_ids = _feed.poll()
+    if changes.REBUILD in job_ids:
+        build_index()
+        return
+    for job_id in job_ids:
+        _apply(job_id)
+
+
+def _run():
+    while True:
+        try:
+            item = _updates.get(timeout=app.config["JOB_CHANGE_POLL_SECONDS"])
+        except queue.Empty:
+            item = None
+        try:
+            with app.app_context():
+                if item == REBUILD:
+                    build_index()
+                elif similar_index.built:
+                    if item is not None:
+                        _apply(item)
+                    _sync()
+        except Exception:
+            app.logger.exception("Không cập nhật được gợi ý việc làm tương tự (%s)", item)
+            if item == REBUILD:
+                _requested.clear()
+
+
+def _submit(item):
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = threading.Thread(target=_run, name="similar-jobs", daemon=True)
+                _worker.start()
+    _updates.put(item)
+
+
+def invalidate():
+    """Bỏ index hiện tại (vd. sau khi xóa công ty kéo theo nhiều tin), dựng lại ở lần tra cứu tiếp theo."""
+    global similar_index
+    similar_index = new_index()
+    _requested.clear()
+
+
+def update_job(job_id):
+    """
+    Gọi sau khi commit tạo/sửa tin; tin không còn mở sẽ bị bỏ khỏi index. Luôn đưa vào hàng đợi, kể cả khi
+    index đang dựng: worker áp dụng sau khi dựng xong, nếu lúc đó index đã có.
+    """
+    _submit(job_id)
+
+
+def remove_job(job_id):
+    _submit(job_id)
+
+
+def similar_job_ids(job_id, limit):
+    """Danh sách id tin tương tự đã tính sẵn, None khi index đang dựng hoặc tin không có trong index."""
+    index = similar_index
+    if not index.built:
+        if not _requested.is_set():
+            _requested.set()
+            _submit(REBUILD)
+        return None
+    return index.similar(job_id, limit)
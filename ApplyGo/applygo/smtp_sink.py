@@ -0,0 +1,106 @@
+"""
+Máy chủ SMTP giả lập chạy cục bộ, dùng để test và benchmark outbox: nói giao thức SMTP thật
+(EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT), giữ mail nhận được trong bộ nhớ và có thể
+thêm độ trễ cho mỗi mail để giống máy chủ thật.
+"""
+import socketserver
+import threading
+import time
+from email import message_from_bytes, policy
+
+HOSTNAME = b"applygo-smtp-sink"
+
+
+class SinkHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, code, text):
+        self.wfile.write(f"{code} {text}\r\n".encode("ascii"))
+
+    def read_data(self):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                return b"".join(lines)
+            if line.startswith(b".."):
+                line = line[1:]
+            lines.append(line)
+
+    def handle(self):
+        self.server.opened()
+        self.wfile.write(b"220 " + HOSTNAME + b" ESMTP\r\n")
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command[:4].upper()
+            if verb == "EHLO":
+                self.wfile.write(b"250-" + HOSTNAME + b"\r\n250-8BITMIME\r\n250 SMTPUTF8\r\n")
+            elif verb == "HELO":
+                self.reply(250, HOSTNAME.decode())
+            elif verb == "MAIL":
+                sender, recipients = command[10:].split(" ")[0].strip("<>"), []
+                self.reply(250, "OK")
+            elif verb == "RCPT":
+                recipients.append(command[8:].split(" ")[0].strip("<>"))
+                self.reply(250, "OK")
+            elif verb == "DATA":
+                if not recipients:
+                    self.reply(503, "Need RCPT command")
+                    continue
+                self.reply(354, "End data with <CR><LF>.<CR><LF>")
+                self.server.deliver(sender, recipients, self.read_data())
+                self.reply(250, "OK queued")
+            elif verb == "RSET":
+                sender, recipients = None, []
+                self.reply(250, "OK")
+            elif verb == "NOOP":
+                self.reply(250, "OK")
+            elif verb == "QUIT":
+                self.reply(221, "Bye")
+                return
+            else:
+                self.reply(502, "Command not implemented")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0.0, keep=True):
+        super().__init__((host, port), SinkHandler)
+        self.latency_ms = latency_ms
+        self.keep = keep  # False: chỉ đếm, không giữ nội dung (benchmark lớn)
+        self.messages = []  # (sender, recipients, email.message.EmailMessage)
+        self.received = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def opened(self):
+        with self.lock:
+            self.connections += 1
+
+    def deliver(self, sender, recipients, data):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        message = message_from_bytes(data, policy=policy.default) if self.keep else None
+        with self.lock:
+            self.received += 1
+            if self.keep:
+                self.messages.append((sender, recipients, message))
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, name="smtp-sink", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,254 @@
+from collections import defaultdict
+
+from sqlalchemy import extract, func, inspect
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from applygo import db
+from applygo.models import User, Company, Job, Application, ApplicationMonthlyStat, UserRole, ApplicationStatus, \
+    CompanyStatus
+from applygo.routing import read_only
+
+STATUSES = [s.value for s in ApplicationStatus]
+
+# Số id mỗi câu IN (...) khi đọc lại các đơn sắp xóa
+FORGET_CHUNK = 1000
+
+
+def month_label(year, month):
+    return f"{int(year):04d}-{int(month):02d}"
+
+
+def month_key(dt):
+    return month_label(dt.year, dt.month)
+
+
+@read_only
+def get_totals():
+    """Các chỉ số tổng của trang báo cáo, gộp trong một câu SELECT."""
+    def count(model, *criteria):
+        return db.session.query(func.count(model.id)).filter(*criteria).scalar_subquery()
+
+    row = db.session.query(
+        count(User).label("total_users"),
+        count(User, User.role == UserRole.CANDIDATE.value).label("total_candidates"),
+        count(User, User.role == UserRole.COMPANY.value).label("total_companies"),
+        count(Job).label("total_jobs"),
+        count(Application).label("total_applications"),
+        count(Company, Company.status == CompanyStatus.APPROVED.value).label("total_approved_companies"),
+    ).one()
+    return row._asdict()
+
+
+def bump_application_stat(company_id, candidate_profile_id, applied_at, status, delta=1):
+    """
+    Cộng delta vào dòng rollup tương ứng. Không commit: chạy trong transaction
+    của thao tác trên Application để hai bảng luôn khớp nhau.
+    """
+    bump_application_stats(company_id, {(candidate_profile_id, month_key(applied_at), status): delta})
+
+
+def bump_application_stats(company_id, deltas):
+    """Như bump_application_stat cho cả lô: deltas là {(candidate_profile_id, month, status): delta}, một câu lệnh."""
+    table = ApplicationMonthlyStat.__table__
+    rows = [dict(company_id=company_id, candidate_profile_id=profile_id, month=month, status=status, count=delta)
+            for (profile_id, month, status), delta in deltas.items() if delta]
+    if not rows:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update(count=table.c.count + stmt.inserted.count)
+    elif dialect == "sqlite":
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(index_elements=list(table.primary_key.columns.keys()),
+                                          set_={"count": table.c.count + stmt.excluded.count})
+    else:
+        for values in rows:
+            keys = {k: v for k, v in values.items() if k != "count"}
+            updated = db.session.query(ApplicationMonthlyStat).filter_by(**keys) \
+                .update({ApplicationMonthlyStat.count: ApplicationMonthlyStat.count + values["count"]},
+                        synchronize_session=False)
+            if not updated:
+                db.session.execute(table.insert().values(**values))
+        return
+    db.session.execute(stmt, rows)
+
+
+def record_application(application, company_id, delta=1):
+    bump_application_stat(company_id, application.candidate_profile_id, application.applied_at,
+                          application.status, delta)
+
+
+def record_status_change(application, company_id, old_status):
+    if old_status == application.status:
+        return
+    bump_application_stat(company_id, application.candidate_profile_id, application.applied_at, old_status, -1)
+    bump_application_stat(company_id, application.candidate_profile_id, application.applied_at,
+                          application.status, 1)
+
+
+def record_status_changes(company_id, rows, new_status):
+    """Rollup cho một lô hồ sơ đổi sang new_status; rows có candidate_profile_id, applied_at, status (cũ)."""
+    deltas = defaultdict(int)
+    for row in rows:
+        if row.status == new_status:
+            continue
+        month = month_key(row.applied_at)
+        deltas[(row.candidate_profile_id, month, row.status)] -= 1
+        deltas[(row.candidate_profile_id, month, new_status)] += 1
+    bump_application_stats(company_id, deltas)
+
+
+def bump_grouped(deltas):
+    """deltas: {(company_id, candidate_profile_id, month, status): delta}; một câu lệnh cho mỗi công ty."""
+    by_company = defaultdict(dict)
+    for (company_id, profile_id, month, status), delta in deltas.items():
+        by_company[company_id][(profile_id, month, status)] = delta
+    for company_id, company_deltas in by_company.items():
+        bump_application_stats(company_id, company_deltas)
+
+
+def _old_value(obj, attr):
+    history = inspect(obj).attrs[attr].history
+    return history.deleted[0] if history.deleted else getattr(obj, attr)
+
+
+def record_application_change(application, is_created):
+    """
+    Rollup cho một Application vừa tạo hoặc sửa qua ORM (chưa commit): đơn mới cộng 1; đơn sửa trừ 1 ở khóa
+    (công ty, ứng viên, tháng, trạng thái) cũ và cộng 1 ở khóa mới, kể cả khi đổi tin (công ty) hay ngày nộp.
+    """
+    fields = ("job_id", "candidate_profile_id", "applied_at", "status")
+    new = {name: getattr(application, name) for name in fields}
+    old = None if is_created else {name: _old_value(application, name) for name in fields}
+    if old == new:
+        return
+    job_ids = {new["job_id"]} | ({old["job_id"]} if old else set())
+    companies = dict(db.session.query(Job.id, Job.company_id).filter(Job.id.in_(job_ids)))
+
+    deltas = defaultdict(int)
+    for values, delta in ((old, -1), (new, 1)):
+        if values is not None:
+            deltas[(companies[values["job_id"]], values["candidate_profile_id"], month_key(values["applied_at"]),
+                    values["status"])] += delta
+    bump_grouped(deltas)
+
+
+def forget_applications(applications):
+    """Trừ rollup cho các đơn sắp xóa: đọc lại khóa của cả lô bằng một câu SELECT (mỗi FORGET_CHUNK id)."""
+    ids = [application.id for application in applications]
+    deltas = defaultdict(int)
+    for start in range(0, len(ids), FORGET_CHUNK):
+        rows = db.session.query(Job.company_id, Application.candidate_profile_id, Application.applied_at,
+                                Application.status) \
+            .join(Job, Application.job_id == Job.id) \
+            .filter(Application.id.in_(ids[start:start + FORGET_CHUNK]))
+        for company_id, profile_id, applied_at, status in rows:
+            deltas[(company_id, profile_id, month_key(applied_at), status)] -= 1
+    bump_grouped(deltas)
+
+
+def count_applications_from_source():
+    """GROUP BY trên bảng Application gốc, dùng để dựng lại bảng rollup."""
+    year = extract('year', Application.applied_at).label('year')
+    month = extract('month', Application.applied_at).label('month')
+    return db.session.query(
+        Job.company_id, Application.candidate_profile_id, year, month, Application.status,
+        func.count(Application.id)
+    ).join(Job, Application.job_id == Job.id) \
+        .group_by(Job.company_id, Application.candidate_profile_id, year, month, Application.status).all()
+
+
+def rebuild_application_stats(batch_size=1000):
+    """Xóa và tính lại toàn bộ bảng rollup từ Application, trả về số dòng đã ghi."""
+    ApplicationMonthlyStat.__table__.create(db.engine, checkfirst=True)
+
+    rows = count_applications_from_source()
+    db.session.query(ApplicationMonthlyStat).delete(synchronize_session=False)
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(ApplicationMonthlyStat.__table__.insert(), [
+            dict(company_id=company_id, candidate_profile_id=profile_id, month=month_label(y, m),
+                 status=status, count=n)
+            for company_id, profile_id, y, m, status, n in rows[start:start + batch_size]
+        ])
+    db.session.commit()
+    return len(rows)
+
+
+def monthly_rows(group_by_company=False, start_date=None, **filters):
+    """Đọc bảng rollup: (company_id | None, month, status, count)."""
+    key = ApplicationMonthlyStat.company_id if group_by_company else db.literal(None)
+    query = db.session.query(
+        key, ApplicationMonthlyStat.month, ApplicationMonthlyStat.status,
+        func.sum(ApplicationMonthlyStat.count)
+    ).filter(*[getattr(ApplicationMonthlyStat, name) == value for name, value in filters.items()])
+    if start_date is not None:
+        query = query.filter(ApplicationMonthlyStat.month >= month_key(start_date))
+    group = [ApplicationMonthlyStat.month, ApplicationMonthlyStat.status]
+    if group_by_company:
+        group.insert(0, ApplicationMonthlyStat.company_id)
+    return query.group_by(*group).all()
+
+
+def pivot_by_month(rows, statuses=STATUSES):
+    """
+    rows: (key, month, status, count), key có thể là None.
+    Trả về (labels, {key: {status: [count theo từng tháng]}}), tháng tăng dần.
+    """
+    counts = defaultdict(int)
+    for key, month, status, n in rows:
+        if n:
+            counts[(key, month, status)] += int(n)
+
+    labels = sorted({month for _, month, _ in counts})
+    keys = {key for key, _, _ in counts}
+    series = {
+        key: {status: [counts.get((key, label, status), 0) for label in labels] for status in statuses}
+        for key in keys
+    }
+    return labels, series
+
+
+@read_only
+def get_application_report(start_date):
+    """Số hồ sơ theo tháng/trạng thái: tổng toàn hệ thống và theo từng công ty."""
+    rows = monthly_rows(group_by_company=True, start_date=start_date)
+    labels, by_company = pivot_by_month(rows)
+    _, overall = pivot_by_month((None, month, status, n) for _, month, status, n in rows)
+
+    status_data = overall.get(None, {status: [] for status in STATUSES})
+    company_status_data = {
+        name: by_company.get(company_id) or {status: [0] * len(labels) for status in STATUSES}
+        for company_id, name in db.session.query(Company.id, Company.name).order_by(Company.id)
+    }
+    return labels, status_data, company_status_data
+
+
+@read_only
+def get_candidate_dashboard(candidate_profile_id, start_date):
+    rows = monthly_rows(candidate_profile_id=candidate_profile_id)
+
+    status_count = {status: 0 for status in STATUSES}
+    for _, month, status, n in rows:
+        status_count[status] = status_count.get(status, 0) + int(n)
+
+    start = month_key(start_date)
+    labels, series = pivot_by_month(row for row in rows if row[1] >= start)
+    chart_data = series.get(None, {status: [] for status in STATUSES})
+    return sum(status_count.values()), status_count, labels, chart_data
+
+
+@read_only
+def get_company_dashboard(company_id, start_date, status="all"):
+    rows = monthly_rows(company_id=company_id, start_date=start_date)
+    if status != "all":
+        rows = [row for row in rows if row[2] == status]
+    labels, series = pivot_by_month(rows)
+    return labels, series.get(None, {s: [] for s in STATUSES})
+
+
+@read_only
+def count_jobs_by_location():
+    return db.session.query(Job.location, func.count(Job.id)).group_by(Job.location).all()
@@ -0,0 +1,387 @@
+"""
+Tải file lên chạy nền: request chỉ lưu file vào thư mục tạm và tạo một UploadJob,
+worker trong pool giới hạn tải lên kho lưu trữ (Cloudinary, static/uploads hoặc kho giả lập),
+thử lại với backoff khi lỗi và ghi URL vào bản ghi đích khi xong.
+
+Lưu trữ theo nội dung: file được băm sha256 ngay trong lúc ghi ra thư mục tạm; nếu digest
+đã có trong StoredBlob thì dùng lại URL cũ, không tải lên lần nữa.
+"""
+import hashlib
+import os
+import random
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import cloudinary.uploader
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import secure_filename
+
+from applygo import app, db, images
+from applygo.instrumentation import timed
+from applygo.models import User, Company, CandidateProfile, UploadJob, UploadStatus, StoredBlob
+
+CHUNK_SIZE = 64 * 1024
+
+# Cột ảnh -> cột lưu URL các bản thu nhỏ
+VARIANT_FIELDS = {
+    ("User", "image_url"): "image_variants",
+    ("Company", "logo_url"): "logo_variants",
+}
+
+# Các cột được phép nhận URL từ worker
+TARGETS = {
+    "User": (User, {"image_url"}),
+    "Company": (Company, {"logo_url"}),
+    "CandidateProfile": (CandidateProfile, {"uploaded_cv_path"}),
+}
+
+
+class CloudinaryStorage:
+    name = "cloudinary"
+
+    def upload(self, path, folder, filename, digest):
+        # public_id là digest: file trùng nội dung luôn về cùng một asset
+        res = cloudinary.uploader.upload(
+            path,
+            folder=folder,
+            public_id=digest,
+            overwrite=False,
+            resource_type="auto",
+            filename_override=filename,
+        )
+        return res.get("secure_url")
+
+
+def _content_path(root, digest, filename):
+    ext = os.path.splitext(filename)[1].lower()
+    return os.path.join(root, digest[:2], digest + ext)
+
+
+def _static_url(path):
+    path = os.path.abspath(path)
+    static = os.path.abspath(app.static_folder)
+    if path.startswith(static + os.sep):
+        return "/static/" + os.path.relpath(path, static).replace(os.sep, "/")
+    return "file://" + path
+
+
+class LocalStorage:
+    """Lưu vào static/uploads/<2 ký tự đầu digest>/<digest>.<ext>."""
+    name = "local"
+
+    def __init__(self, root):
+        self.root = root
+
+    def upload(self, path, folder, filename, digest):
+        dest = _content_path(self.root, digest, filename)
+        if not os.path.exists(dest):
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            tmp = f"{dest}.{uuid.uuid4().hex}.tmp"
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, dest)
+        return _static_url(dest)
+
+
+class LocalFakeStorage(LocalStorage):
+    """Kho giả lập để chạy/benchmark pipeline khi không có mạng: như LocalStorage nhưng có độ trễ và lỗi ngẫu nhiên."""
+    name = "fake"
+
+    def __init__(self, root, latency_ms=0, fail_rate=0.0):
+        super().__init__(root)
+        self.latency_ms = latency_ms
+        self.fail_rate = fail_rate
+
+    def upload(self, path, folder, filename, digest):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        if random.random() < self.fail_rate:
+            raise ConnectionError("Lỗi giả lập khi tải lên")
+        return super().upload(path, folder, filename, digest)
+
+
+def make_storage():
+    backend = app.config["UPLOAD_BACKEND"]
+    if backend == "fake":
+        return LocalFakeStorage(app.config["FAKE_STORAGE_DIR"], app.config["FAKE_STORAGE_LATENCY_MS"],
+                                app.config["FAKE_STORAGE_FAIL_RATE"])
+    if backend == "local":
+        return LocalStorage(app.config["LOCAL_STORAGE_DIR"])
+    return CloudinaryStorage()
+
+
+storage = make_storage()
+
+_lock = threading.Lock()
+_pool = None
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=app.config["UPLOAD_WORKERS"], thread_name_prefix="upload")
+                if app.config["UPLOAD_RESUME"]:
+                    # Tiến trình mới (khởi động lại, deploy): nhận lại các job dang dở và job chờ thử lại
+                    _pool.submit(_resume)
+    return _pool
+
+
+def _resume():
+    with app.app_context():
+        try:
+            resume_pending()
+        except Exception:
+            app.logger.exception("Không đưa lại được các upload job dang dở")
+            db.session.rollback()
+
+
+@app.before_request
+def start_pool():
+    """before_request: mở pool (và chạy resume_pending) ngay khi tiến trình web bắt đầu nhận request."""
+    get_pool()
+
+
+def stage(file, target, field, folder="applygo/other_files", user_id=None):
+    """
+    Lưu file (FileStorage) vào thư mục tạm và tạo UploadJob trong session hiện tại.
+    Job chỉ được đưa vào pool sau khi transaction commit.
+    """
+    if not file:
+        raise ValueError("No file to upload")
+    model_name = type(target).__name__
+    if field not in TARGETS.get(model_name, (None, ()))[1]:
+        raise ValueError(f"Không hỗ trợ tải lên cho {model_name}.{field}")
+
+    os.makedirs(app.config["UPLOAD_STAGING_DIR"], exist_ok=True)
+    filename = secure_filename(file.filename or "") or "file"
+    local_path = os.path.join(app.config["UPLOAD_STAGING_DIR"], f"{uuid.uuid4().hex}_{filename}")
+    with timed("upload"):
+        digest, size = save_and_hash(file.stream, local_path)
+
+    if target.id is None:
+        db.session.flush()
+    job = UploadJob(user_id=user_id, target_model=model_name, target_id=target.id, target_field=field,
+                    folder=folder, filename=filename, local_path=local_path, digest=digest, size=size,
+                    status=UploadStatus.PENDING.value, attempts=0)
+
+    variants_field = VARIANT_FIELDS.get((model_name, field))
+    blob = db.session.get(StoredBlob, (digest, storage.name))
+    if blob is not None and (variants_field is None or blob.variants is not None):
+        # Nội dung đã có trên kho: chỉ tốn một lượt băm, không tải lên lại
+        _remove_staged(local_path)
+        setattr(target, field, blob.url)
+        if variants_field:
+            setattr(target, variants_field, blob.variants)
+        job.url = blob.url
+        job.status = UploadStatus.DONE.value
+        job.deduplicated = True
+        db.session.add(job)
+        return job
+
+    db.session.add(job)
+    db.session.flush()
+    db.session.info.setdefault("staged_uploads", []).append((job.id, local_path))
+    return job
+
+
+def save_and_hash(stream, path):
+    """Ghi stream ra file và tính sha256 trong cùng một lượt đọc, trả về (digest, số byte)."""
+    sha = hashlib.sha256()
+    size = 0
+    with open(path, "wb") as out:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            sha.update(chunk)
+            out.write(chunk)
+            size += len(chunk)
+    return sha.hexdigest(), size
+
+
+def remember_blob(digest, url, size, variants=None):
+    try:
+        blob = db.session.get(StoredBlob, (digest, storage.name))
+        if blob is None:
+            db.session.add(StoredBlob(digest=digest, backend=storage.name, url=url, size=size, variants=variants))
+        elif variants is not None and blob.variants is None:
+            blob.variants = variants
+        db.session.commit()
+    except IntegrityError:
+        # Worker khác vừa ghi cùng digest
+        db.session.rollback()
+
+
+def store_file(path, folder, filename):
+    """Tải một file cục bộ lên kho (bỏ qua nếu nội dung đã có), trả về URL."""
+    with open(path, "rb") as f:
+        sha = hashlib.sha256()
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    blob = db.session.get(StoredBlob, (digest, storage.name))
+    if blob is not None:
+        return blob.url
+    url = storage.upload(path, folder, filename, digest)
+    remember_blob(digest, url, os.path.getsize(path))
+    return url
+
+
+def store_variants(path, folder, filename):
+    """Tạo và tải lên các bản thu nhỏ của ảnh tại path, trả về {"<width>": url} (rỗng nếu không phải ảnh)."""
+    stem = os.path.splitext(filename)[0]
+    ext = app.config["IMAGE_VARIANT_FORMAT"].lower()
+    result = {}
+    for width, data in images.render_variants(path).items():
+        tmp = os.path.join(app.config["UPLOAD_STAGING_DIR"], f"{uuid.uuid4().hex}_{stem}_{width}.{ext}")
+        os.makedirs(os.path.dirname(tmp), exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(data)
+        try:
+            result[str(width)] = store_file(tmp, folder, f"{stem}_{width}.{ext}")
+        finally:
+            _remove_staged(tmp)
+    return result
+
+
+def submit(upload_id, delay=0):
+    if delay:
+        timer = threading.Timer(delay, lambda: get_pool().submit(process, upload_id))
+        timer.daemon = True
+        timer.start()
+    else:
+        get_pool().submit(process, upload_id)
+
+
+def backoff(attempts):
+    """Giây chờ trước lần thử kế tiếp: lũy thừa 2 có jitter, tối đa UPLOAD_BACKOFF_MAX."""
+    delay = app.config["UPLOAD_BACKOFF_BASE"] * 2 ** (attempts - 1)
+    return min(delay, app.config["UPLOAD_BACKOFF_MAX"]) * random.uniform(0.5, 1.0)
+
+
+def process(upload_id):
+    with app.app_context():
+        try:
+            _process(upload_id)
+        except Exception:
+            app.logger.exception("Upload job %s lỗi ngoài dự kiến", upload_id)
+            db.session.rollback()
+
+
+def claim(upload_id):
+    """Nhận job Pending bằng một câu UPDATE có điều kiện: timer thử lại và resume_pending không chạy trùng job."""
+    claimed = db.session.query(UploadJob) \
+        .filter(UploadJob.id == upload_id, UploadJob.status == UploadStatus.PENDING.value) \
+        .update({UploadJob.status: UploadStatus.UPLOADING.value, UploadJob.attempts: UploadJob.attempts + 1},
+                synchronize_session=False)
+    db.session.commit()
+    return claimed == 1
+
+
+def _process(upload_id):
+    if not claim(upload_id):
+        return
+    job = db.session.get(UploadJob, upload_id)
+
+    blob = db.session.get(StoredBlob, (job.digest, storage.name)) if job.digest else None
+    try:
+        if blob is not None:
+            url, job.deduplicated = blob.url, True
+        else:
+            url = storage.upload(job.local_path, job.folder, job.filename, job.digest or uuid.uuid4().hex)
+    except Exception as e:
+        job.error = str(e)[:500]
+        if job.attempts >= app.config["UPLOAD_MAX_ATTEMPTS"]:
+            job.status = UploadStatus.FAILED.value
+            job.next_attempt_at = None
+            db.session.commit()
+            _remove_staged(job.local_path)
+            return
+        delay = backoff(job.attempts)
+        job.status = UploadStatus.PENDING.value
+        job.next_attempt_at = datetime.now() + timedelta(seconds=delay)
+        db.session.commit()
+        submit(upload_id, delay)
+        return
+
+    variants_field = VARIANT_FIELDS.get((job.target_model, job.target_field))
+    variants = None
+    if variants_field:
+        variants = blob.variants if blob is not None and blob.variants is not None else \
+            _try_variants(job.local_path, job.folder, job.filename)
+
+    model, _ = TARGETS[job.target_model]
+    target = db.session.get(model, job.target_id)
+    if target is not None:
+        setattr(target, job.target_field, url)
+        if variants_field:
+            setattr(target, variants_field, variants or None)
+    job.url = url
+    job.error = None
+    job.status = UploadStatus.DONE.value
+    digest, size, local_path = job.digest, job.size, job.local_path
+    db.session.commit()
+    _remove_staged(local_path)
+    if digest:
+        remember_blob(digest, url, size, variants)
+
+
+def _try_variants(path, folder, filename):
+    # Lỗi khi tạo bản thu nhỏ không làm hỏng lần tải ảnh gốc: trang sẽ dùng ảnh gốc
+    try:
+        return store_variants(path, folder, filename)
+    except Exception:
+        app.logger.exception("Không tạo được bản thu nhỏ cho %s", filename)
+        return None
+
+
+def _remove_staged(local_path):
+    try:
+        os.remove(local_path)
+    except OSError:
+        pass
+
+
+def resume_pending():
+    """
+    Đưa lại vào pool các job còn dang dở (vd. sau khi khởi động lại), trả về số job. Job "Uploading" chỉ được
+    nhận lại khi quá UPLOAD_CLAIM_TIMEOUT không cập nhật, để không tải trùng job mà tiến trình khác đang chạy.
+    """
+    cutoff = datetime.now() - timedelta(seconds=app.config["UPLOAD_CLAIM_TIMEOUT"])
+    db.session.query(UploadJob).filter(UploadJob.status == UploadStatus.UPLOADING.value,
+                                       UploadJob.updated_at < cutoff) \
+        .update({UploadJob.status: UploadStatus.PENDING.value}, synchronize_session=False)
+    db.session.commit()
+    now = datetime.now()
+    rows = db.session.query(UploadJob.id, UploadJob.next_attempt_at) \
+        .filter(UploadJob.status == UploadStatus.PENDING.value).all()
+    for upload_id, next_attempt_at in rows:
+        # Job đang chờ thử lại: giữ đúng lịch backoff thay vì thử ngay
+        delay = (next_attempt_at - now).total_seconds() if next_attempt_at else 0
+        submit(upload_id, max(0, delay))
+    return len(rows)
+
+
+def latest_upload(target, field):
+    """UploadJob mới nhất của một cột, để trang hiển thị trạng thái đang tải."""
+    return db.session.query(UploadJob).filter_by(
+        target_model=type(target).__name__, target_id=target.id, target_field=field
+    ).order_by(UploadJob.id.desc()).first()
+
+
+@event.listens_for(db.session, "after_commit")
+def submit_staged(session):
+    for upload_id, _ in session.info.pop("staged_uploads", ()):
+        submit(upload_id)
+
+
+@event.listens_for(db.session, "after_rollback")
+def discard_staged(session):
+    for _, local_path in session.info.pop("staged_uploads", ()):
+        _remove_staged(local_path)
@@ -0,0 +1,68 @@
+"""
+Cấu hình chung cho test: SQLite tạm thay MySQL, QUERY_DEBUG để đếm câu SQL của từng request (header
+X-Query-Count) và TESTING để request vượt query_budget bị lỗi. Các worker nền trong tiến trình web tắt hết.
+"""
+import os
+import sys
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="applygo-test-")
+_db_url = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.update({
+    "DATABASE_URL": _db_url,
+    # Replica là một engine riêng trỏ cùng file: dữ liệu luôn khớp, nhưng biết được câu SQL chạy ở engine nào
+    "DB_REPLICA_URIS": _db_url,
+    "QUERY_DEBUG": "1",
+    "MAIL_WORKER": "0",
+    "RECOMMEND_WORKER": "0",
+    "UPLOAD_BACKEND": "fake",
+    "UPLOAD_RESUME": "0",
+    "PAGE_CACHE_SYNC": "0",
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from applygo import app, db
+from applygo.benchmark import Fixtures, login
+from applygo.cache import page_cache, count_cache, identity_cache, cv_cache, match_cache
+from applygo.Data.generate_data import generate
+import applygo.index  # noqa: F401  đăng ký các route
+
+app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+
+with app.app_context():
+    db.create_all()
+
+
+def clear_caches():
+    for cache in (page_cache, count_cache, identity_cache, cv_cache, match_cache):
+        cache.clear()
+
+
+def seed_data(**counts):
+    """Sinh lại dữ liệu bằng generate_data, trả về Fixtures (tin nhiều đơn nhất, các user)."""
+    with app.app_context():
+        generate(echo=lambda *args: None, **counts)
+        fixtures = Fixtures()
+    clear_caches()
+    return fixtures
+
+
+@pytest.fixture
+def seed():
+    """seed(**counts): xem seed_data."""
+    return seed_data
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def query_count(client, path, user_id=None):
+    """Số câu SQL của một GET (user_id=None: khách), kiểm tra luôn mã trả về 200."""
+    login(client, user_id)
+    response = client.get(path)
+    assert response.status_code == 200, f"GET {path} trả về {response.status_code}"
+    return int(response.headers["X-Query-Count"])
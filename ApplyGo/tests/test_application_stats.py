@@ -0,0 +1,76 @@
+from datetime import datetime
+
+from applygo import app, db, stats
+from applygo.benchmark import login
+from applygo.models import Application, ApplicationMonthlyStat, CandidateProfile, Job
+
+
+def rollup():
+    return {(company_id, profile_id, month, status): n for company_id, profile_id, month, status, n in
+            db.session.query(ApplicationMonthlyStat.company_id, ApplicationMonthlyStat.candidate_profile_id,
+                             ApplicationMonthlyStat.month, ApplicationMonthlyStat.status,
+                             ApplicationMonthlyStat.count) if n}
+
+
+def from_source():
+    return {(company_id, profile_id, stats.month_label(y, m), status): n
+            for company_id, profile_id, y, m, status, n in stats.count_applications_from_source()}
+
+
+def form(job_id, profile_id, applied_at, status):
+    return dict(job_id=job_id, candidate_profile_id=profile_id, status=status,
+                applied_at=applied_at.strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def test_admin_create_edit_delete_keep_rollup_in_sync(client, seed):
+    fixtures = seed(candidates=10, companies=4, jobs=12, applications=30)
+    login(client, fixtures.admin_user_id)
+    with app.app_context():
+        assert rollup() == from_source()
+        profile_id = db.session.query(CandidateProfile.id).order_by(CandidateProfile.id).limit(1).scalar()
+        applied = db.session.query(Application.job_id).filter(Application.candidate_profile_id == profile_id)
+        job_id = db.session.query(Job.id).filter(Job.id.notin_(applied)).order_by(Job.id).limit(1).scalar()
+        other_job_id = db.session.query(Job.id).filter(Job.company_id != db.session.get(Job, job_id).company_id) \
+            .order_by(Job.id).limit(1).scalar()
+
+    response = client.post("/admin/application/new/", data=form(job_id, profile_id, datetime(2024, 1, 15), "Pending"))
+    assert response.status_code == 302
+    with app.app_context():
+        application_id = db.session.query(Application.id).filter_by(job_id=job_id, candidate_profile_id=profile_id) \
+            .scalar()
+        assert application_id is not None
+        assert rollup() == from_source()
+
+    # Đổi tin (sang công ty khác), ngày nộp (sang tháng khác) và trạng thái cùng lúc
+    response = client.post(f"/admin/application/edit/?id={application_id}",
+                           data=form(other_job_id, profile_id, datetime(2024, 3, 2), "Accepted"))
+    assert response.status_code == 302
+    with app.app_context():
+        assert db.session.get(Application, application_id).job_id == other_job_id
+        assert rollup() == from_source()
+
+    response = client.post("/admin/application/delete/", data=dict(id=application_id))
+    assert response.status_code == 302
+    with app.app_context():
+        assert db.session.get(Application, application_id) is None
+        assert rollup() == from_source()
+
+
+def test_forget_applications_reads_the_batch_in_one_query(seed):
+    fixtures = seed(candidates=10, companies=4, jobs=12, applications=60)
+    with app.app_context():
+        applications = Application.query.all()
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        db.event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            stats.forget_applications(applications)
+        finally:
+            db.event.remove(db.engine, "before_cursor_execute", listener)
+        companies = {application.job.company_id for application in applications}
+        # Một SELECT cho cả lô và một upsert cho mỗi công ty
+        assert len(statements) == 1 + len(companies)
+        for application in applications:
+            db.session.delete(application)
+        db.session.commit()
+        assert rollup() == from_source() == {}
@@ -0,0 +1,34 @@
+import pytest
+
+from applygo import app, db, dao
+from applygo.models import Application, CandidateProfile, Job, JobStatus
+
+
+def _unapplied_job(user_id, status):
+    applied = db.session.query(Application.job_id).join(CandidateProfile) \
+        .filter(CandidateProfile.user_id == user_id)
+    job = Job.query.filter(Job.id.notin_(applied)).order_by(Job.id).first()
+    job.status = status
+    db.session.commit()
+    return job.id
+
+
+def test_apply_job(seed):
+    fixtures = seed(candidates=10, companies=3, jobs=20, applications=20)
+    user_id = fixtures.candidate_user_id
+    with app.app_context():
+        job_id = _unapplied_job(user_id, JobStatus.OPEN.value)
+        application = db.session.get(Application, dao.apply_job(user_id=user_id, job_id=job_id))
+        assert application.job_id == job_id
+        assert application.candidate_profile.user_id == user_id
+
+        with pytest.raises(ValueError, match="đã ứng tuyển"):
+            dao.apply_job(user_id=user_id, job_id=job_id)
+
+        closed_id = _unapplied_job(user_id, JobStatus.CLOSED.value)
+        with pytest.raises(ValueError, match="đã đóng"):
+            dao.apply_job(user_id=user_id, job_id=closed_id)
+        with pytest.raises(ValueError, match="không tồn tại"):
+            dao.apply_job(user_id=user_id, job_id=10 ** 9)
+        with pytest.raises(ValueError, match="Chỉ ứng viên"):
+            dao.apply_job(user_id=fixtures.company_user_id, job_id=job_id)
@@ -0,0 +1,99 @@
+import pytest
+
+from applygo import app, db
+from applygo.benchmark import login
+from applygo.models import Application, ApplicationStatus, Company, Job, OutboxEmail
+
+PENDING, ACCEPTED, REJECTED = (ApplicationStatus.PENDING.value, ApplicationStatus.ACCEPTED.value,
+                               ApplicationStatus.REJECTED.value)
+
+
+@pytest.fixture
+def hiring(seed):
+    """Tin có nhiều hồ sơ nhất (mọi hồ sơ về Pending) và một tin của công ty khác."""
+    fixtures = seed(candidates=40, companies=3, jobs=6, applications=160)
+    with app.app_context():
+        db.session.execute(db.update(Application).values(status=PENDING))
+        db.session.commit()
+        job = db.session.get(Job, fixtures.job_id)
+        other = Job.query.join(Application).filter(Job.company_id != job.company_id).first()
+        fixtures.other_job_id = other.id
+        fixtures.other_company_user_id = db.session.get(Company, other.company_id).user_id
+    return fixtures
+
+
+def application_ids(job_id):
+    with app.app_context():
+        return [i for (i,) in db.session.query(Application.id).filter(Application.job_id == job_id)
+                .order_by(Application.id)]
+
+
+def statuses(job_id):
+    with app.app_context():
+        return dict(db.session.query(Application.id, Application.status).filter(Application.job_id == job_id))
+
+
+def post_status(client, job_id, **form):
+    response = client.post(f"/recruitment-post-detail/{job_id}/applications/status/", data=form)
+    assert response.status_code == 302
+    return response
+
+
+def test_changes_selected_applications_and_queues_mail(hiring, client):
+    ids = application_ids(hiring.job_id)
+    login(client, hiring.company_user_id)
+    with app.app_context():
+        queued = db.session.query(OutboxEmail).count()
+    post_status(client, hiring.job_id, status=ACCEPTED, application_ids=ids[:3])
+
+    after = statuses(hiring.job_id)
+    assert {i for i, s in after.items() if s == ACCEPTED} == set(ids[:3])
+    assert set(statuses(hiring.other_job_id).values()) == {PENDING}
+    with app.app_context():
+        assert db.session.query(OutboxEmail).count() == queued + 3
+
+
+def test_foreign_application_ids_are_rejected(hiring, client):
+    own = application_ids(hiring.job_id)
+    foreign = application_ids(hiring.other_job_id)
+    login(client, hiring.company_user_id)
+
+    # Trộn hồ sơ của tin khác vào lô: không đổi hồ sơ nào, kể cả hồ sơ của mình
+    post_status(client, hiring.job_id, status=REJECTED, application_ids=own[:2] + foreign[:1])
+    assert set(statuses(hiring.job_id).values()) == {PENDING}
+    assert set(statuses(hiring.other_job_id).values()) == {PENDING}
+
+    # Gửi lên tin của công ty khác
+    post_status(client, hiring.other_job_id, status=REJECTED, application_ids=foreign[:2])
+    post_status(client, hiring.other_job_id, status=REJECTED, all_matching="1")
+    assert set(statuses(hiring.other_job_id).values()) == {PENDING}
+
+
+def test_all_matching_respects_current_filter(hiring, client):
+    ids = application_ids(hiring.job_id)
+    with app.app_context():
+        db.session.execute(db.update(Application).where(Application.id.in_(ids[:4])).values(status=REJECTED))
+        db.session.commit()
+    login(client, hiring.company_user_id)
+
+    post_status(client, hiring.job_id, status=ACCEPTED, all_matching="1", current_status=PENDING)
+    after = statuses(hiring.job_id)
+    assert all(after[i] == REJECTED for i in ids[:4])
+    assert all(after[i] == ACCEPTED for i in ids[4:])
+    assert set(statuses(hiring.other_job_id).values()) == {PENDING}
+
+
+def test_query_count_does_not_grow_with_batch_size(hiring, client):
+    ids = application_ids(hiring.job_id)
+    assert len(ids) >= 12
+    login(client, hiring.company_user_id)
+
+    def count(batch, status):
+        response = post_status(client, hiring.job_id, status=status, application_ids=batch)
+        return int(response.headers["X-Query-Count"])
+
+    count(ids[:1], REJECTED)  # nạp cache identity của user đăng nhập
+    small = count(ids[1:3], ACCEPTED)
+    large = count(ids[3:], ACCEPTED)
+    assert small == large
+    assert count(ids, REJECTED) == small
@@ -0,0 +1,14 @@
+from applygo import app
+from applygo.migrations import checks
+
+
+def test_hot_queries_use_indexes(seed):
+    seed(candidates=60, companies=8, jobs=200, applications=600)
+    with app.app_context():
+        results = checks.check_hot_queries()
+    assert {name for name, _, _ in results} == {
+        "jobs_by_company_status", "jobs_by_category", "jobs_posted_recently", "jobs_by_salary",
+        "applications_by_job_status", "applications_by_candidate", "identity_candidate", "identity_company"}
+    for name, uses_index, plan in results:
+        assert plan, f"{name} không chạy câu SQL nào"
+        assert uses_index, f"{name} quét bảng:\n" + "\n".join(plan)
@@ -0,0 +1,16 @@
+from applygo import app, dao
+from applygo.models import Company, CandidateProfile
+
+
+def test_load_identity_reuses_instances_already_in_session(seed):
+    fixtures = seed(candidates=5, companies=3, jobs=5, applications=5)
+    with app.app_context():
+        # Lần đầu nạp từ DB và ghi identity_cache
+        dao.load_identity(fixtures.company_user_id)
+        dao.load_identity(fixtures.candidate_user_id)
+
+    with app.app_context():
+        company = Company.query.filter_by(user_id=fixtures.company_user_id).one()
+        assert dao.load_identity(fixtures.company_user_id).company is company
+        profile = CandidateProfile.query.filter_by(user_id=fixtures.candidate_user_id).one()
+        assert dao.load_identity(fixtures.candidate_user_id).candidate_profile is profile
@@ -0,0 +1,31 @@
+import io
+
+from PIL import Image
+
+from applygo import app
+from applygo.images import image_src, image_srcset, render_variants
+
+
+def test_every_variant_keeps_the_aspect_ratio(tmp_path):
+    path = tmp_path / "logo.png"
+    Image.new("RGB", (1000, 250), "red").save(path)
+    variants = render_variants(str(path))
+    assert sorted(variants) == sorted(app.config["IMAGE_VARIANT_WIDTHS"])
+    for width, data in variants.items():
+        with Image.open(io.BytesIO(data)) as img:
+            assert img.size == (width, width // 4)
+
+
+def test_small_images_are_not_upscaled(tmp_path):
+    path = tmp_path / "avatar.png"
+    Image.new("RGB", (100, 100), "blue").save(path)
+    assert sorted(render_variants(str(path))) == [64]
+
+
+def test_image_src_picks_the_smallest_fitting_variant():
+    variants = {"64": "/v/64.webp", "160": "/v/160.webp", "480": "/v/480.webp"}
+    with app.test_request_context():
+        assert image_src("/orig.png", variants, 50) == "/v/64.webp"
+        assert image_src("/orig.png", variants, 120) == "/v/160.webp"
+        assert image_src("/orig.png", variants, 1000) == "/orig.png"
+    assert image_srcset(variants) == "/v/64.webp 64w, /v/160.webp 160w, /v/480.webp 480w"
@@ -0,0 +1,64 @@
+import random
+import time
+from datetime import timedelta
+
+from applygo import app, db, matching
+from applygo.cache import match_cache
+from applygo.models import Application, CandidateProfile, Job
+
+SKILLS = ["python", "java", "sql", "excel", "kế toán", "marketing", "react", "docker", "bán hàng", "tiếng anh"]
+
+
+def test_scores_10k_profiles_well_under_a_second():
+    rng = random.Random(7)
+    profiles = [dict(skills=", ".join(rng.sample(SKILLS, 3)), experience=f"{rng.randint(0, 12)} năm kinh nghiệm",
+                     education="Đại học") for _ in range(10000)]
+    profiles[0] = dict(skills="python, sql, docker", experience="10 năm", education="Đại học")
+    profiles[1] = dict(skills="bán hàng", experience="", education="")
+    job = dict(title="Python backend developer", requirements="Python, SQL, Docker")
+
+    with app.app_context():
+        matching.score_profiles(job, profiles[:10])  # nạp sẵn NumPy/hàm băm
+        started = time.perf_counter()
+        scores = matching.score_profiles(job, profiles)
+        elapsed = time.perf_counter() - started
+
+    assert scores.shape == (10000,)
+    assert ((scores >= 0) & (scores <= 1.0001)).all()
+    assert scores[0] > scores[1] and scores[0] >= scores.max() - 1e-6
+    assert elapsed < 0.75, f"chấm 10k hồ sơ mất {elapsed:.2f}s"
+
+
+def test_only_stale_profiles_are_rescored(seed, monkeypatch):
+    fixtures = seed(candidates=30, companies=2, jobs=4, applications=80)
+    match_cache.clear()
+    scored = []
+    real = matching.score_profiles
+    monkeypatch.setattr(matching, "score_profiles",
+                        lambda job, profiles: scored.append(len(profiles)) or real(job, profiles))
+
+    with app.app_context():
+        job = db.session.get(Job, fixtures.job_id)
+        profile_ids = [i for (i,) in db.session.query(Application.candidate_profile_id)
+                       .filter(Application.job_id == job.id)]
+        ordered, scores = matching.ranked_applications(job)
+        assert len(ordered) == len(profile_ids) > 1 and scored == [len(profile_ids)]
+
+        # Không hồ sơ nào đổi: dùng lại toàn bộ điểm đã cache
+        assert matching.ranked_applications(job) == (ordered, scores)
+        assert scored == [len(profile_ids)]
+
+        # Một hồ sơ đổi updated_at: chỉ hồ sơ đó được chấm lại
+        profile = db.session.get(CandidateProfile, profile_ids[0])
+        profile.skills = (profile.skills or "") + ", quản lý dự án"
+        profile.updated_at = profile.updated_at + timedelta(seconds=1)
+        db.session.commit()
+        matching.ranked_applications(job)
+        assert scored == [len(profile_ids), 1]
+
+        # Tin đổi updated_at: chấm lại tất cả theo tin mới
+        job.requirements = (job.requirements or "") + " Agile"
+        job.updated_at = job.updated_at + timedelta(seconds=1)
+        db.session.commit()
+        matching.ranked_applications(job)
+        assert scored == [len(profile_ids), 1, len(profile_ids)]
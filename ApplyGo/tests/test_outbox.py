@@ -0,0 +1,156 @@
+import smtplib
+from datetime import datetime, timedelta
+
+import pytest
+
+from applygo import app, db, outbox
+from applygo.models import OutboxEmail, MailStatus
+
+
+class FakeConnection:
+    """Thay mail.connect(): ghi lại mail đã gửi, từ chối người nhận trong refuse, mất kết nối nếu drop."""
+
+    def __init__(self, refuse=(), drop=False):
+        self.sent, self.refuse, self.drop = [], set(refuse), drop
+
+    def __call__(self):
+        if self.drop:
+            raise smtplib.SMTPServerDisconnected("mất kết nối")
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def send(self, message):
+        if message.recipients[0] in self.refuse:
+            raise smtplib.SMTPRecipientsRefused({message.recipients[0]: (550, b"no such user")})
+        self.sent.append(message)
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    """queue(recipient, age=giây, **cột): thêm một thông báo đã chờ age giây vào outbox rỗng."""
+    monkeypatch.setitem(app.config, "MAIL_COALESCE_SECONDS", 60)
+    with app.app_context():
+        db.session.query(OutboxEmail).delete()
+        db.session.commit()
+
+    def add(recipient, age=120, **values):
+        with app.app_context():
+            outbox.notify(outbox.status_notice(recipient, "Kế toán", "Đã xem"))
+            db.session.commit()
+            row_id = db.session.query(db.func.max(OutboxEmail.id)).scalar()
+            db.session.execute(db.update(OutboxEmail).where(OutboxEmail.id == row_id)
+                               .values(created_at=datetime.now() - timedelta(seconds=age), **values))
+            db.session.commit()
+            return row_id
+
+    return add
+
+
+def connect(monkeypatch, **kwargs):
+    conn = FakeConnection(**kwargs)
+    monkeypatch.setattr(outbox.mail, "connect", conn)
+    return conn
+
+
+def load(row_id):
+    with app.app_context():
+        row = db.session.get(OutboxEmail, row_id)
+        db.session.expunge(row)
+        return row
+
+
+def test_claimed_rows_are_not_claimed_again(queue):
+    first, second = queue("a@x.vn"), queue("b@x.vn")
+    with app.app_context():
+        rows = outbox.claim_batch()
+        assert {row.id for row in rows} == {first, second}
+        assert {row.status for row in rows} == {MailStatus.SENDING.value}
+        assert len({row.claim for row in rows}) == 1 and all(row.attempts == 1 for row in rows)
+        assert outbox.claim_batch() == []
+
+
+def test_notices_wait_for_coalesce_window_then_go_out_as_one_digest(queue, monkeypatch):
+    conn = connect(monkeypatch)
+    queue("a@x.vn", age=10)
+    with app.app_context():
+        assert outbox.drain() == (0, 0)
+
+    # Thông báo cũ nhất đã chờ đủ MAIL_COALESCE_SECONDS: gửi cả nhóm trong một mail
+    queue("a@x.vn", age=90)
+    queue("a@x.vn", age=5)
+    queue("b@x.vn", age=90)
+    with app.app_context():
+        assert outbox.drain() == (2, 4)
+    digest = next(m for m in conn.sent if m.recipients == ["a@x.vn"])
+    assert "3 thông báo" in digest.subject and digest.body.count("• ") == 3
+    with app.app_context():
+        assert db.session.query(OutboxEmail).filter(OutboxEmail.status != MailStatus.SENT.value).count() == 0
+
+
+def test_refused_recipient_is_retried_with_backoff_then_fails(queue, monkeypatch):
+    monkeypatch.setitem(app.config, "MAIL_MAX_ATTEMPTS", 2)
+    connect(monkeypatch, refuse={"bad@x.vn"})
+    bad, good = queue("bad@x.vn"), queue("good@x.vn")
+    with app.app_context():
+        assert outbox.drain() == (1, 2)
+    row = load(bad)
+    assert row.status == MailStatus.PENDING.value and row.attempts == 1 and "no such user" in row.error
+    assert row.next_attempt_at > datetime.now()
+    assert load(good).status == MailStatus.SENT.value
+
+    # Chưa đến next_attempt_at thì không gửi lại
+    with app.app_context():
+        assert outbox.drain() == (0, 0)
+        db.session.execute(db.update(OutboxEmail).where(OutboxEmail.id == bad).values(next_attempt_at=None))
+        db.session.commit()
+        assert outbox.drain() == (0, 1)
+    row = load(bad)
+    assert row.status == MailStatus.FAILED.value and row.attempts == 2
+
+
+def test_lost_connection_requeues_whole_batch(queue, monkeypatch):
+    connect(monkeypatch, drop=True)
+    ids = [queue("a@x.vn"), queue("b@x.vn")]
+    with app.app_context():
+        assert outbox.drain() == (0, 2)
+    assert {load(i).status for i in ids} == {MailStatus.PENDING.value}
+
+
+def test_stale_claim_is_released_and_sent(queue, monkeypatch):
+    conn = connect(monkeypatch)
+    old = datetime.now() - timedelta(seconds=app.config["MAIL_CLAIM_TIMEOUT"] + 60)
+    stale = queue("a@x.vn", status=MailStatus.SENDING.value, claim="dead", claimed_at=old, attempts=1)
+    live = queue("b@x.vn", status=MailStatus.SENDING.value, claim="live", claimed_at=datetime.now(), attempts=1)
+    with app.app_context():
+        assert outbox.drain() == (1, 1)
+    assert [m.recipients for m in conn.sent] == [["a@x.vn"]]
+    assert load(stale).status == MailStatus.SENT.value and load(stale).attempts == 2
+    assert load(live).status == MailStatus.SENDING.value
+
+
+def test_worker_starts_with_process_and_drains_pending_mail(queue, monkeypatch, client):
+    conn = connect(monkeypatch)
+    queue("a@x.vn")
+    started = []
+    monkeypatch.setattr(outbox, "start_worker", lambda: started.append(True))
+    monkeypatch.setitem(app.config, "MAIL_WORKER", True)
+    client.get("/")
+    assert started
+
+    # Lượt đầu của worker gửi ngay mail còn tồn, không chờ thông báo mới hay MAIL_POLL_SECONDS
+    class Stop(Exception):
+        pass
+
+    class Wake:
+        def wait(self, timeout):
+            raise Stop
+
+    monkeypatch.setattr(outbox, "_wake", Wake())
+    with pytest.raises(Stop):
+        outbox._run()
+    assert [m.recipients for m in conn.sent] == [["a@x.vn"]]
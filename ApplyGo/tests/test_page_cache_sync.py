@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from applygo import app, cache, changes, db
+from applygo.models import Job, JobChange
+
+
+def test_pages_of_jobs_changed_by_another_worker_are_dropped(seed, monkeypatch):
+    fixtures = seed(candidates=5, companies=2, jobs=6, applications=5)
+    monkeypatch.setitem(app.config, "JOB_CHANGE_POLL_SECONDS", 0)
+    monkeypatch.setattr(cache, "_feed", changes.ChangeFeed())
+    with app.app_context():
+        job = db.session.get(Job, fixtures.job_id)
+        other = Job.query.filter(Job.company_id != job.company_id).first()
+        cache.sync_shared()  # lần đầu chỉ ghi nhận vị trí trong job_change
+
+        cache.page_cache.set(("/jobs/", ()), "list", tags={"job-list"})
+        cache.page_cache.set((f"/jobs/{job.id}/", ()), "detail", tags={f"job:{job.id}"})
+        cache.page_cache.set((f"/jobs/{other.id}/", ()), "other", tags={f"job:{other.id}"})
+        cache.count_cache.set(("company-jobs", job.company_id), 3, tags={f"company-jobs:{job.company_id}"})
+
+        # Worker khác sửa tin: chỉ có dòng job_change, không có after_commit trong tiến trình này
+        db.session.execute(JobChange.__table__.insert().values(job_id=job.id, changed_at=datetime.now()))
+        db.session.commit()
+        cache.sync_shared()
+
+        assert cache.page_cache.get(("/jobs/", ())) is None
+        assert cache.page_cache.get((f"/jobs/{job.id}/", ())) is None
+        assert cache.count_cache.get(("company-jobs", job.company_id)) is None
+        assert cache.page_cache.get((f"/jobs/{other.id}/", ())) == "other"
+
+        changes.record_rebuild()
+        cache.sync_shared()
+        assert cache.page_cache.get((f"/jobs/{other.id}/", ())) is None
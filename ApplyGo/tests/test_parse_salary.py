@@ -0,0 +1,54 @@
+import pytest
+
+from applygo.models import parse_salary
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("20-25 triệu", (20000, 25000)),
+    ("12,5 triệu", (12500, 12500)),
+    ("1.5 - 2 triệu", (1500, 2000)),
+    ("15.000.000 - 20.000.000 VNĐ", (15000, 20000)),
+    ("Trên 30 triệu", (30000, None)),
+    ("Từ 15 triệu", (15000, None)),
+    ("Dưới 20 triệu", (0, 20000)),
+    ("Tối đa 30 triệu", (0, 30000)),
+    ("Lên đến 40 triệu", (0, 40000)),
+    ("Up to $2000", (0, 50000)),
+    ("$1000 - $1500", (25000, 37500)),
+    ("Thỏa thuận", (None, None)),
+    ("", (None, None)),
+    (None, (None, None)),
+])
+def test_parse_salary(text, expected):
+    assert parse_salary(text) == expected
+
+
+def test_salary_filter_and_sort(client, seed, monkeypatch):
+    from applygo import app, db
+    from applygo.cache import page_cache, count_cache
+    from applygo.models import Job, JobStatus
+
+    seed(candidates=3, companies=2, jobs=2, applications=0)
+    salaries = {"Lương-A": "12,5 triệu", "Lương-B": "Tối đa 9 triệu", "Lương-C": "Trên 30 triệu",
+                "Lương-D": "10,2 - 10,4 triệu", "Lương-E": "Thỏa thuận"}
+    with app.app_context():
+        company_id = db.session.query(Job.company_id).limit(1).scalar()
+        db.session.query(Job).delete()
+        for title, salary in salaries.items():
+            db.session.add(Job(company_id=company_id, title=title, description="x", requirements="x",
+                               location="Hà Nội", salary=salary, status=JobStatus.OPEN.value))
+        db.session.commit()
+    page_cache.clear()
+    count_cache.clear()
+    monkeypatch.setitem(app.config, "PAGE_SIZE", 10)
+
+    def titles(query):
+        html = client.get(f"/jobs/?{query}").get_data(as_text=True)
+        return sorted((html.index(title), title) for title in salaries if title in html)
+
+    # 10,2 - 10,4 triệu vẫn nằm trong 10-20 (trước đây làm tròn thành 10-10)
+    assert {t for _, t in titles("salary_range=10-20")} == {"Lương-A", "Lương-D"}
+    assert {t for _, t in titles("salary_range=0-10")} == {"Lương-B"}
+    assert {t for _, t in titles("salary_range=30-999999")} == {"Lương-C"}
+    # Lương cao nhất trước; "Tối đa" (cận dưới 0) cuối; "Thỏa thuận" không có trong danh sách
+    assert [t for _, t in titles("sort=salary")] == ["Lương-C", "Lương-A", "Lương-D", "Lương-B"]
@@ -0,0 +1,147 @@
+import hashlib
+import threading
+
+import pytest
+
+from applygo import app, dao, db, passwords
+from applygo.models import User
+from applygo.passwords import PasswordHasherBusy
+
+
+@pytest.fixture(autouse=True)
+def cheap_cost(monkeypatch):
+    """Cost thấp nhất của PBKDF2, bỏ qua bước hiệu chỉnh; pool riêng cho từng test."""
+    monkeypatch.setitem(app.config, "PASSWORD_HASHER", "pbkdf2_sha256")
+    monkeypatch.setattr(passwords, "_cost", passwords.PBKDF2Hasher.min_cost)
+    monkeypatch.setattr(passwords, "_pool", None)
+    monkeypatch.setattr(passwords, "_pending", None)
+    monkeypatch.setattr(passwords, "_dummy_hash", None)
+
+
+@pytest.fixture
+def legacy_user(seed):
+    seed(candidates=2, companies=1, jobs=1, applications=0)
+    with app.app_context():
+        user = User(username="md5-user", email="md5@example.com",
+                    password=hashlib.md5("mật-khẩu-cũ".encode("utf-8")).hexdigest())
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+@pytest.mark.parametrize("encoded", [
+    "abc$def",
+    "pbkdf2_sha256$100000$c2FsdA",
+    "pbkdf2_sha256$nhiều$c2FsdA$aGFzaA",
+    "pbkdf2_sha256$100000$!!!$@@@",
+    "pbkdf2_sha256$100000$c2FsdA$aGFzaA$thừa",
+    "scrypt$1000$c2FsdA$aGFzaA",
+    "bcrypt$12$c2FsdA$aGFzaA",
+    "$$$",
+    "",
+])
+def test_malformed_hash_is_a_wrong_password(encoded):
+    with app.app_context():
+        assert passwords.verify_password("bất kỳ", encoded) is False
+        assert passwords.needs_rehash(encoded) in (True, False)
+
+
+def test_round_trip():
+    with app.app_context():
+        encoded = passwords.hash_password("đúng")
+        assert encoded.startswith(f"pbkdf2_sha256${passwords.PBKDF2Hasher.min_cost}$")
+        assert passwords.verify_password("đúng", encoded)
+        assert not passwords.verify_password("sai", encoded)
+
+
+def test_md5_password_is_upgraded_on_login(legacy_user):
+    with app.app_context():
+        assert dao.auth_user("md5-user", "sai") is None
+        assert len(db.session.get(User, legacy_user).password) == 32
+
+        user = dao.auth_user("md5-user", " mật-khẩu-cũ ")
+        assert user is not None and user.id == legacy_user
+        db.session.expire_all()
+        stored = db.session.get(User, legacy_user).password
+        assert stored.startswith("pbkdf2_sha256$") and not passwords.needs_rehash(stored)
+        assert dao.auth_user("md5-user", "mật-khẩu-cũ").id == legacy_user
+        db.session.expire_all()
+        assert db.session.get(User, legacy_user).password == stored
+
+
+def test_login_with_corrupt_stored_hash_fails_cleanly(legacy_user, client):
+    with app.app_context():
+        db.session.get(User, legacy_user).password = "pbkdf2_sha256$hỏng"
+        db.session.commit()
+        assert dao.auth_user("md5-user", "mật-khẩu-cũ") is None
+    response = client.post("/login/", data=dict(username="md5-user", password="mật-khẩu-cũ"))
+    assert response.status_code in (200, 302)
+
+
+def test_needs_rehash_has_hysteresis(monkeypatch):
+    monkeypatch.setattr(passwords, "_cost", 200_000)
+    with app.app_context():
+        # Lệch dưới 25% so với cost hiện tại (worker khác hiệu chỉnh hơi khác): không băm lại
+        assert not passwords.needs_rehash("pbkdf2_sha256$160000$c2FsdA$aGFzaA")
+        assert not passwords.needs_rehash("pbkdf2_sha256$250000$c2FsdA$aGFzaA")
+        assert passwords.needs_rehash("pbkdf2_sha256$140000$c2FsdA$aGFzaA")
+        assert passwords.needs_rehash(f"scrypt${2 ** 20}$c2FsdA$aGFzaA")
+        assert passwords.needs_rehash(hashlib.md5(b"x").hexdigest())
+
+
+def test_busy_when_queue_is_full(monkeypatch):
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_QUEUE", 1)
+    release = threading.Event()
+    started = threading.Barrier(3, timeout=5)
+
+    def blocked():
+        release.wait(5)
+        return "xong"
+
+    results = []
+    callers = [threading.Thread(target=lambda: (started.wait(), results.append(passwords._submit(blocked))))
+               for _ in range(2)]
+    for caller in callers:
+        caller.start()
+    started.wait()
+    try:
+        # Một việc đang chạy, một việc đang chờ: việc thứ ba bị từ chối ngay
+        for _ in range(100):
+            if passwords._pending is not None and passwords._pending._value == 0:
+                break
+            release.wait(0.01)
+        with pytest.raises(PasswordHasherBusy):
+            passwords._submit(lambda: "không chạy")
+    finally:
+        release.set()
+        for caller in callers:
+            caller.join(5)
+    assert results == ["xong", "xong"]
+    # Chỗ trong hàng đợi được trả lại sau khi xong
+    assert passwords._submit(lambda: "lại được") == "lại được"
+
+
+def test_busy_when_hash_times_out(monkeypatch):
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_TIMEOUT", 0.05)
+    release = threading.Event()
+    try:
+        with pytest.raises(PasswordHasherBusy):
+            passwords._submit(lambda: release.wait(5))
+    finally:
+        release.set()
+
+
+def test_burn_verify_costs_one_real_verification(monkeypatch):
+    verified = []
+    real = passwords._verify
+    monkeypatch.setattr(passwords, "_verify", lambda password, encoded: verified.append(encoded) or
+                        real(password, encoded))
+    with app.app_context():
+        assert passwords.burn_verify("đoán") is False
+        assert passwords.burn_verify("đoán lần nữa") is False
+        dummy = passwords._dummy_hash
+        assert dummy.startswith("pbkdf2_sha256$") and verified == [dummy, dummy]
+        # Username không tồn tại vẫn tốn một lần kiểm tra
+        assert dao.auth_user("không-có-user-này", "x") is None
+        assert verified == [dummy, dummy, dummy]
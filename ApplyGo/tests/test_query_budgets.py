@@ -0,0 +1,42 @@
+"""
+Chạy từng route có query_budget trên dữ liệu mẫu với TESTING=True: route nào vượt ngân sách thì
+check_query_budget ném QueryBudgetExceeded và test lỗi.
+"""
+import pytest
+
+from applygo.instrumentation import query_budgets
+from conftest import clear_caches, query_count, seed_data
+
+# endpoint -> (đường dẫn, user đăng nhập: None là khách)
+BUDGETED = {
+    "index": ("/", None),
+    "jobs": ("/jobs/", None),
+    "job_detail": ("/jobs/{f.job_id}/", None),
+    "recruitment_post_detail": ("/recruitment-post-detail/{f.job_id}/", "company"),
+    "recruitment_post_manager": ("/recruitment-post-manager/", "company"),
+    "user.index_view": ("/admin/user/", "admin"),
+    "company_admin.index_view": ("/admin/company_admin/", "admin"),
+    "company_approval.index_view": ("/admin/company_approval/", "admin"),
+    "job.index_view": ("/admin/job/", "admin"),
+    "application.index_view": ("/admin/application/", "admin"),
+    "candidateprofile.index_view": ("/admin/candidateprofile/", "admin"),
+    "report.index": ("/admin/report/", "admin"),
+}
+
+
+@pytest.fixture(scope="module")
+def fixtures():
+    return seed_data(candidates=40, companies=10, jobs=60, applications=300)
+
+
+def test_every_budget_is_covered():
+    assert set(BUDGETED) == set(query_budgets)
+
+
+@pytest.mark.parametrize("endpoint", sorted(BUDGETED))
+def test_endpoint_within_budget(client, fixtures, endpoint):
+    path, role = BUDGETED[endpoint]
+    users = {"company": fixtures.company_user_id, "admin": fixtures.admin_user_id}
+    # Đo đường đi tới DB, không đo trang đã cache
+    clear_caches()
+    assert query_count(client, path.format(f=fixtures), users.get(role)) <= query_budgets[endpoint]
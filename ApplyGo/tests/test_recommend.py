@@ -0,0 +1,86 @@
+from collections import Counter
+
+from applygo import app, db, recommend
+from applygo.models import CandidateProfile, Job, JobRecommendation, JobStatus, User
+
+
+def test_new_profile_is_picked_for_matching_job(seed):
+    fixtures = seed(candidates=20, companies=3, jobs=20, applications=20)
+    with app.app_context():
+        model = recommend.build_matrix()
+        recommend._index_skills(model)
+
+        user = User(username="zyx-candidate", email="zyx@example.com", password="x")
+        db.session.add(user)
+        db.session.flush()
+        profile = CandidateProfile(user_id=user.id, full_name="Zyx", skills="zyxlang quuxframework")
+        db.session.add(profile)
+        job = db.session.get(Job, fixtures.job_id)
+        job.status = JobStatus.OPEN.value
+        job.title = "Lập trình viên zyxlang quuxframework"
+        db.session.commit()
+
+        # Ảnh chụp kỹ năng dựng trước khi có hồ sơ: phải thêm hồ sơ mới vào
+        model.update_skills(recommend._profiles(ids=[profile.id]))
+        assert profile.id in recommend._job_changed(model, job.id)
+
+        # Xóa kỹ năng: dòng cũ không còn được chọn
+        profile.skills = ""
+        db.session.commit()
+        model.update_skills(recommend._profiles(ids=[profile.id]))
+        assert profile.id not in recommend._job_changed(model, job.id)
+
+
+def test_closing_a_job_recomputes_candidates_holding_it(seed, monkeypatch):
+    seed(candidates=30, companies=3, jobs=40, applications=30)
+    monkeypatch.setitem(app.config, "RECOMMEND_TOP_K", 5)
+    with app.app_context():
+        recommend.rebuild()
+        rows = db.session.query(JobRecommendation).all()
+        job_id = Counter(job_id for row in rows for job_id, _ in row.items).most_common(1)[0][0]
+        holders = {row.candidate_profile_id for row in rows if any(item[0] == job_id for item in row.items)}
+
+        model = recommend.build_matrix()
+        job = db.session.get(Job, job_id)
+        job.status = JobStatus.CLOSED.value
+        db.session.commit()
+        assert set(recommend._job_changed(model, job_id)) == holders
+        assert job_id not in model.rows
+
+        recommend._store(recommend.score(model, recommend._profiles(ids=sorted(holders))))
+        for profile_id in holders:
+            items = db.session.get(JobRecommendation, profile_id).items
+            assert job_id not in [item_id for item_id, _ in items]
+            assert len(items) == 5
+
+
+def test_job_matrix_compacts_dead_rows(seed, monkeypatch):
+    seed(candidates=10, companies=3, jobs=30, applications=10)
+    monkeypatch.setitem(app.config, "RECOMMEND_COMPACT_RATIO", 0.25)
+    with app.app_context():
+        model = recommend.build_matrix()
+        fresh = recommend.build_matrix()
+        live = len(model.rows)
+        job_ids = list(model.rows)
+        fields = {row.id: recommend._fields(row) for row in Job.query.filter(Job.id.in_(job_ids))}
+
+        # Mỗi lần sửa tin thêm một dòng mới; dòng chết không được tích lũy mãi
+        for _ in range(5):
+            for job_id in job_ids:
+                model.add(job_id, fields[job_id])
+                assert len(model.job_ids) <= live / (1 - 0.25) + 1
+        model.remove(job_ids[0])
+        assert len(model.rows) == live - 1
+
+        # Sau khi gộp, các dòng vẫn khớp với tin của nó
+        assert model.matrix.shape[0] == len(model.job_ids) and model.transposed.shape[1] == len(model.job_ids)
+        for job_id, row in model.rows.items():
+            assert model.job_ids[row] == job_id
+            difference = model.matrix[row] - fresh.matrix[fresh.rows[job_id]]
+            assert abs(difference).max() < 1e-5
+        fresh.remove(job_ids[0])
+        profiles = recommend._profiles(limit=5)
+        expected = recommend.score(fresh, profiles)
+        # Cùng điểm thì thứ tự theo vị trí dòng, nên so theo {tin: điểm}
+        for profile_id, items in recommend.score(model, profiles).items():
+            assert dict(map(tuple, items)) == dict(map(tuple, expected[profile_id]))
@@ -0,0 +1,74 @@
+import time
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, event
+
+from applygo import app, db, engine_options
+from applygo.benchmark import login
+from applygo.models import Application, CandidateProfile, Job, JobStatus
+
+
+@contextmanager
+def statements():
+    """Ghi lại (engine, câu SQL) của mọi câu lệnh chạy trên primary và replica trong khối lệnh."""
+    seen = []
+    with app.app_context():
+        engines = {"primary": db.engines[None], "replica": db.engines["replica_0"]}
+
+    def listener(name):
+        return lambda conn, cursor, statement, *args: seen.append((name, statement.split()[0].upper()))
+
+    listeners = {name: listener(name) for name in engines}
+    for name, engine in engines.items():
+        event.listen(engine, "before_cursor_execute", listeners[name])
+    try:
+        yield seen
+    finally:
+        for name, engine in engines.items():
+            event.remove(engine, "before_cursor_execute", listeners[name])
+
+
+def engines_used(seen, verb=None):
+    return {name for name, statement in seen if verb is None or statement == verb}
+
+
+@pytest.mark.parametrize("uri", ["sqlite://", "sqlite:///applygo.db", "mysql+pymysql://u:p@db/applygo"])
+def test_engine_options_fit_the_pool(uri):
+    options = engine_options(uri, pool_size=3, pool_recycle=60)
+    assert ("pool_size" in options) == uri.startswith("mysql")
+    if not uri.startswith("mysql"):
+        create_engine(uri, **options).dispose()
+
+
+def test_reads_go_to_replica_writes_to_primary_then_stick(seed, client):
+    fixtures = seed(candidates=5, companies=2, jobs=10, applications=5)
+    user_id = fixtures.candidate_user_id
+    with app.app_context():
+        applied = db.session.query(Application.job_id).join(CandidateProfile) \
+            .filter(CandidateProfile.user_id == user_id)
+        job_id = db.session.query(Job.id).filter(Job.id.notin_(applied), Job.status == JobStatus.OPEN.value) \
+            .order_by(Job.id).limit(1).scalar()
+    login(client, user_id)
+
+    with statements() as seen:
+        assert client.get("/candidate/profile/").status_code == 200
+    assert engines_used(seen) == {"replica"}
+
+    with statements() as seen:
+        client.post(f"/apply/{job_id}/")
+    assert engines_used(seen, "INSERT") == {"primary"}
+    with client.session_transaction() as session:
+        assert session["db_primary_until"] > time.time()
+
+    # Vừa ghi: các request GET sau đó đọc primary để thấy ngay đơn vừa nộp
+    with statements() as seen:
+        assert client.get("/candidate/profile/").status_code == 200
+    assert engines_used(seen) == {"primary"}
+
+    # Hết REPLICA_STICKY_SECONDS thì quay lại replica
+    with client.session_transaction() as session:
+        session["db_primary_until"] = time.time() - 1
+    with statements() as seen:
+        assert client.get("/candidate/profile/").status_code == 200
+    assert engines_used(seen) == {"replica"}
@@ -0,0 +1,9 @@
+from conftest import query_count
+
+
+def test_report_query_count_does_not_grow_with_companies(client, seed):
+    counts = []
+    for companies in (5, 50):
+        fixtures = seed(candidates=40, companies=companies, jobs=companies * 4, applications=200)
+        counts.append(query_count(client, "/admin/report/", fixtures.admin_user_id))
+    assert counts[0] == counts[1]
@@ -0,0 +1,146 @@
+import pytest
+
+from applygo import app, changes, db, search
+from applygo.benchmark import login
+from applygo.models import Company, Job
+from applygo.search import JobSearchIndex, fold, tokenize
+
+
+@pytest.mark.parametrize("text, folded", [
+    ("Hà Nội", "ha noi"),
+    ("ĐÀ NẴNG", "da nang"),
+    ("Kỹ sư phần mềm", "ky su phan mem"),
+    ("Nhân viên Kế toán tổng hợp", "nhan vien ke toan tong hop"),
+    (None, ""),
+])
+def test_fold_removes_diacritics_and_case(text, folded):
+    assert fold(text) == folded
+
+
+def test_tokenize_splits_on_punctuation():
+    assert tokenize("Lập trình viên C++/Python, 3 năm!") == ["lap", "trinh", "vien", "c", "python", "3", "nam"]
+
+
+def test_search_ignores_diacritics_and_requires_every_term():
+    index = JobSearchIndex()
+    index.add(1, title="Kế toán trưởng", description="Làm việc tại Hà Nội")
+    index.add(2, title="Kế toán viên", description="Làm việc tại Đà Nẵng")
+    index.add(3, title="Lập trình viên", description="Hà Nội")
+    assert {job_id for job_id, _ in index.search("ke toan ha noi")} == {1}
+    assert [job_id for job_id, _ in index.search("KẾ TOÁN hà nội")] == [1]
+    assert {job_id for job_id, _ in index.search("viên")} == {2, 3}
+    assert index.search("kế toán java") == []
+    assert index.search("!!!") == []
+
+
+def test_bm25_ranking():
+    index = JobSearchIndex()
+    # Trọng số trường: từ khóa ở tiêu đề hơn từ khóa ở mô tả
+    index.add(1, title="Python developer", description="làm web")
+    index.add(2, title="Developer", description="python làm web")
+    # Cùng tần suất nhưng văn bản ngắn hơn xếp trên
+    index.add(3, description="python " + "thêm chữ " * 20)
+    index.add(4, description="kế toán")
+    ranked = [job_id for job_id, _ in index.search("python")]
+    assert ranked == [1, 2, 3]
+
+    assert index.search("python", limit=2) == index.search("python")[:2]
+
+    # Từ hiếm (idf cao) đóng góp nhiều hơn từ phổ biến trong cùng văn bản
+    index = JobSearchIndex()
+    index.add(1, title="marketing online")
+    index.add(2, title="sales online")
+    index.add(3, title="admin online")
+    assert dict(index.search("marketing"))[1] > dict(index.search("online"))[1]
+
+
+def test_add_replaces_and_remove_forgets():
+    index = JobSearchIndex()
+    index.add(1, title="Kế toán")
+    index.add(2, title="Bán hàng")
+    index.add(1, title="Lập trình viên")
+    assert index.search("kế toán") == []
+    assert [job_id for job_id, _ in index.search("lập trình")] == [1]
+
+    index.remove(1)
+    index.remove(1)
+    assert index.search("lập trình") == []
+    assert index.doc_len == {2: index.total_len}
+    assert "lap" not in index.postings
+
+
+@pytest.fixture
+def built(seed, monkeypatch):
+    """Search index của worker này dựng từ dữ liệu mẫu, đọc job_change ở mỗi lần tìm."""
+    fixtures = seed(candidates=5, companies=3, jobs=10, applications=5)
+    monkeypatch.setitem(app.config, "JOB_CHANGE_POLL_SECONDS", 0)
+    monkeypatch.setattr(search, "job_index", JobSearchIndex())
+    monkeypatch.setattr(search, "_feed", changes.ChangeFeed())
+    with app.app_context():
+        search.ensure_index()
+    return fixtures
+
+
+def test_jobs_changed_by_another_worker_are_indexed_via_job_change(built):
+    with app.app_context():
+        job = db.session.get(Job, built.job_id)
+        # Sửa qua ORM nhưng không gọi indexing: chỉ còn dòng job_change để worker này biết
+        job.title = "Chuyên viên điều phối Zyxqua"
+        other = Job.query.filter(Job.id != job.id).first()
+        other_id = other.id
+        db.session.delete(other)
+        db.session.commit()
+        assert search.search_job_ids("zyxqua") == [job.id]
+        assert other_id not in search.job_index.doc_len
+
+        company = db.session.get(Company, job.company_id)
+        company.name = "Công ty Thủy Sản Qwertyvn"
+        db.session.commit()
+        assert set(search.search_job_ids("thuy san qwertyvn")) == \
+            {j.id for j in Job.query.filter(Job.company_id == company.id)}
+
+
+def test_rebuild_marker_rebuilds_whole_index(built, monkeypatch):
+    rebuilt = []
+    monkeypatch.setattr(search, "rebuild_in_background", lambda: rebuilt.append(True) or search.build_index())
+    with app.app_context():
+        # Ghi hàng loạt bằng Core (không có job_change cho từng tin) rồi ghi dấu dựng lại
+        db.session.execute(db.update(Job).where(Job.id == built.job_id).values(title="Thợ lặn biển sâu"))
+        db.session.commit()
+        assert search.search_job_ids("thợ lặn") == []
+        changes.record_rebuild()
+        assert search.search_job_ids("thợ lặn") == [built.job_id]
+    assert rebuilt == [True]
+
+
+def test_company_profile_rename_updates_search_through_indexing(built, client, monkeypatch):
+    calls = []
+    real = search.index_company_jobs
+    monkeypatch.setattr(search, "index_company_jobs", lambda company: calls.append(company.id) or real(company))
+    login(client, built.company_user_id)
+    with app.app_context():
+        company = Company.query.filter_by(user_id=built.company_user_id).one()
+        company_id = company.id
+        form = dict(name="Hải Âu Logistics", address=company.address or "", website=company.website or "",
+                    mst=company.mst)
+    assert client.post("/company/profile/", data=form).status_code == 302
+    assert calls == [company_id]
+    # Không cần đợi job_change: index của worker này đã cập nhật ngay
+    with app.app_context():
+        assert search.job_index.search("hai au logistics")
+
+
+def test_company_profile_saved_even_if_reindex_fails(built, client, monkeypatch):
+    def broken(company):
+        raise RuntimeError("index hỏng")
+
+    monkeypatch.setattr(search, "index_company_jobs", broken)
+    login(client, built.company_user_id)
+    with app.app_context():
+        company = Company.query.filter_by(user_id=built.company_user_id).one()
+        company_id = company.id
+        form = dict(name="Sao Mai Group", address=company.address or "", website=company.website or "",
+                    mst=company.mst)
+    assert client.post("/company/profile/", data=form).status_code == 302
+    with app.app_context():
+        assert db.session.get(Company, company_id).name == "Sao Mai Group"
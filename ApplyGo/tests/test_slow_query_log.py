@@ -0,0 +1,32 @@
+import json
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from applygo import app, db, instrumentation
+
+
+def test_slow_query_log_works_without_request_metrics(tmp_path, monkeypatch):
+    log = tmp_path / "slow.log"
+    for name in ("before_cursor_execute", "after_cursor_execute"):
+        hook = instrumentation.before_execute if name.startswith("before") else instrumentation.after_execute
+        if event.contains(Engine, name, hook):
+            event.remove(Engine, name, hook)
+    monkeypatch.setitem(app.config, "QUERY_DEBUG", False)
+    monkeypatch.setitem(app.config, "REQUEST_TIMING", False)
+    monkeypatch.setitem(app.config, "SLOW_QUERY_LOG", str(log))
+    monkeypatch.setitem(app.config, "SLOW_QUERY_MS", 0)
+    handlers = list(instrumentation.slow_query_logger.handlers)
+    try:
+        instrumentation.init_app(app)
+        with app.app_context():
+            db.session.execute(text("SELECT 42"))
+        for handler in instrumentation.slow_query_logger.handlers:
+            handler.flush()
+        entries = [json.loads(line.split(" ", 2)[2]) for line in log.read_text(encoding="utf-8").splitlines()]
+        assert any(entry["sql"] == "SELECT ?" for entry in entries)
+    finally:
+        for handler in instrumentation.slow_query_logger.handlers:
+            if handler not in handlers:
+                instrumentation.slow_query_logger.removeHandler(handler)
+                handler.close()
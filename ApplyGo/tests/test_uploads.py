@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from applygo import app, db, uploads
+from applygo.models import CandidateProfile, UploadJob, UploadStatus
+
+
+@pytest.fixture
+def staged(tmp_path, monkeypatch, seed):
+    """Tạo UploadJob cho cột uploaded_cv_path của một hồ sơ; submit chỉ ghi lại (id, delay), không chạy pool."""
+    seed(candidates=3, companies=1, jobs=1, applications=0)
+    submitted = []
+    monkeypatch.setattr(uploads, "submit", lambda upload_id, delay=0: submitted.append((upload_id, delay)))
+    monkeypatch.setattr(uploads, "storage", uploads.LocalFakeStorage(str(tmp_path / "store")))
+    monkeypatch.setitem(app.config, "UPLOAD_BACKOFF_BASE", 2)
+
+    def create(status=UploadStatus.PENDING.value, **values):
+        path = tmp_path / f"cv-{len(list(tmp_path.iterdir()))}.pdf"
+        path.write_bytes(b"%PDF-1.4 " + str(path).encode())
+        with app.app_context():
+            profile_id = db.session.query(CandidateProfile.id).order_by(CandidateProfile.id).limit(1).scalar()
+            job = UploadJob(target_model="CandidateProfile", target_id=profile_id, target_field="uploaded_cv_path",
+                            folder="cv", filename=path.name, local_path=str(path), status=status, attempts=0,
+                            **values)
+            db.session.add(job)
+            db.session.commit()
+            return job.id
+
+    create.submitted = submitted
+    return create
+
+
+def load(upload_id):
+    with app.app_context():
+        job = db.session.get(UploadJob, upload_id)
+        db.session.expunge(job)
+        return job
+
+
+def test_failed_upload_is_retried_with_backoff_then_succeeds(staged, monkeypatch):
+    upload_id = staged()
+    monkeypatch.setattr(uploads.storage, "fail_rate", 1.0)
+    uploads.process(upload_id)
+    job = load(upload_id)
+    assert job.status == UploadStatus.PENDING.value and job.attempts == 1 and job.error
+    assert job.next_attempt_at > datetime.now()
+    assert staged.submitted == [(upload_id, pytest.approx(1.5, abs=0.5))]
+
+    monkeypatch.setattr(uploads.storage, "fail_rate", 0.0)
+    uploads.process(upload_id)
+    job = load(upload_id)
+    assert job.status == UploadStatus.DONE.value and job.attempts == 2 and job.url
+    with app.app_context():
+        profile = db.session.get(CandidateProfile, job.target_id)
+        assert profile.uploaded_cv_path == job.url
+
+
+def test_gives_up_after_max_attempts(staged, monkeypatch):
+    upload_id = staged()
+    monkeypatch.setattr(uploads.storage, "fail_rate", 1.0)
+    monkeypatch.setitem(app.config, "UPLOAD_MAX_ATTEMPTS", 2)
+    uploads.process(upload_id)
+    uploads.process(upload_id)
+    job = load(upload_id)
+    assert job.status == UploadStatus.FAILED.value and job.attempts == 2
+
+
+def test_job_is_processed_once_even_if_submitted_twice(staged):
+    upload_id = staged()
+    uploads.process(upload_id)
+    uploads.process(upload_id)
+    assert load(upload_id).attempts == 1
+
+
+def test_restart_recovers_stale_and_waiting_jobs_only(staged, monkeypatch):
+    stale = datetime.now() - timedelta(seconds=app.config["UPLOAD_CLAIM_TIMEOUT"] + 60)
+    pending_id = staged()
+    waiting_id = staged(next_attempt_at=datetime.now() + timedelta(seconds=30))
+    stale_id = staged(status=UploadStatus.UPLOADING.value)
+    live_id = staged(status=UploadStatus.UPLOADING.value)
+    with app.app_context():
+        db.session.execute(db.update(UploadJob).where(UploadJob.id == stale_id).values(updated_at=stale))
+        db.session.commit()
+
+    # Pool của tiến trình mới khởi động: chạy resume_pending
+    monkeypatch.setitem(app.config, "UPLOAD_RESUME", True)
+    monkeypatch.setattr(uploads, "_pool", None)
+    uploads.get_pool().shutdown(wait=True)
+
+    delays = dict(staged.submitted)
+    assert set(delays) == {pending_id, waiting_id, stale_id}
+    assert delays[pending_id] == 0 and delays[stale_id] == 0
+    assert 25 < delays[waiting_id] <= 30
+    # Job còn được tiến trình khác cập nhật gần đây (chưa quá UPLOAD_CLAIM_TIMEOUT) không bị nhận lại
+    assert load(live_id).status == UploadStatus.UPLOADING.value
+    assert load(stale_id).status == UploadStatus.PENDING.value